@@ -1,11 +1,33 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 import subprocess
 import os
-import json
 import threading
 from pathlib import Path
 import platform
+import sys
+import time
+
+# Shared headless build engine lives in UI/Core/Python
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Core" / "Python"))
+import build_engine
+from build_engine import BuildEngine, BuildOptions, BuildError, SOURCE_SEPARATOR, split_sources
+from batch_build import default_jobs
+from symbol_index import SymbolIndex, suggestion_message
+from output_stream import run_streaming
+from output_renderer import OutputRenderer
+from ui_wakeup import Wakeup
+from diagnostics import DiagnosticSet
+from build_history import BuildHistory
+from build_estimate import DurationModel, ProgressTracker
+from build_trace import span, traced, flush_trace
+from run_benchmark import Benchmark, Comparison, summary_lines, comparison_lines, format_seconds
+from runtime_profile import Profiler, profile_lines
+from build_matrix import (BuildMatrix, expand_matrix, cell_title, row_status,
+                          MATRIX_COMPILERS, MATRIX_OPT_LEVELS, MATRIX_LIBRARIES)
+
+# How often the build progress bar and its ETA are refreshed
+PROGRESS_MS = 250
 
 class CompilerGUILinux:
     def __init__(self, root):
@@ -20,49 +42,24 @@ class CompilerGUILinux:
         # Load configuration
         self.config_file = "compiler_config_linux.json"
         self.config = self.load_config()
+        self.engine = BuildEngine(self.config)
+        self.symbols = SymbolIndex.from_config(self.config)
+        self.history = BuildHistory.from_config(self.config)
+        self.estimates = DurationModel(self.history)
+        self.progress_job = None
+        self.benchmark = None
         
         self.setup_ui()
         self.load_saved_config()
     
     def load_config(self):
         """Load configuration from file or create default for Linux"""
-        default_config = {
-            "gcc_path": "/usr/bin/g++",
-            "clang_path": "/usr/bin/clang++",
-            "msvc_path": "",  # Not available on Linux
-            "csc_path": "/usr/bin/mcs",  # Mono C# compiler
-            "dotnet_path": "/usr/bin/dotnet",  # .NET Core
-            "javac_path": "/usr/bin/javac",
-            "java_path": "/usr/bin/java",
-            "cryptopp_include": "/usr/include/cryptopp",
-            "cryptopp_lib_gcc": "/usr/lib/x86_64-linux-gnu",
-            "cryptopp_lib_clang": "/usr/lib/x86_64-linux-gnu",
-            "cryptopp_lib_msvc": "",
-            "openssl_include_gcc": "/usr/include/openssl",
-            "openssl_lib_gcc": "/usr/lib/x86_64-linux-gnu",
-            "openssl_include_clang": "/usr/include/openssl",
-            "openssl_lib_clang": "/usr/lib/x86_64-linux-gnu",
-            "openssl_include_msvc": "",
-            "openssl_lib_msvc": "",
-            "jdk_include": "/usr/lib/jvm/default-java/include",
-            "jdk_include_linux": "/usr/lib/jvm/default-java/include/linux"
-        }
-        
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
-                    default_config.update(loaded_config)
-        except Exception as e:
-            print(f"Error loading config: {e}")
-        
-        return default_config
+        return build_engine.load_config(self.config_file)
     
     def save_config(self):
         """Save current configuration to file"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            build_engine.save_config(self.config, self.config_file)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save config: {e}")
     
@@ -154,6 +151,9 @@ class CompilerGUILinux:
         self.pic_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(options_frame, text="Position Independent (-fPIC)", variable=self.pic_var).grid(row=1, column=1, sticky="w", padx=5, pady=2)
         
+        self.time_report_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Time Report (per phase)", variable=self.time_report_var).grid(row=1, column=2, sticky="w", padx=5, pady=2)
+        
         # Command preview
         cmd_frame = ttk.LabelFrame(self.build_frame, text="Command Preview")
         cmd_frame.pack(fill="both", expand=True, padx=5, pady=5)
@@ -171,11 +171,22 @@ class CompilerGUILinux:
         
         ttk.Button(action_frame, text="Update Command", command=self.update_command_preview).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Build", command=self.build_project).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Build Matrix", command=self.open_build_matrix).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Build History", command=self.open_build_history).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Run Executable", command=self.run_executable).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Benchmark", command=self.benchmark_executable).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Debug (GDB)", command=self.debug_executable).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Profile", command=self.profile_executable).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Open Output Folder", command=self.open_output_folder).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Clear Output", command=self.clear_output).pack(side="left", padx=5)
         
+        # Predicted progress of the running build, shown only while building
+        progress_frame = ttk.Frame(self.build_frame)
+        progress_frame.pack(fill="x", padx=5)
+        self.build_progress = ttk.Progressbar(progress_frame, mode="determinate", maximum=100)
+        self.eta_var = tk.StringVar()
+        self.eta_label = ttk.Label(progress_frame, textvariable=self.eta_var)
+        
         # Output with tabs for different types
         output_notebook = ttk.Notebook(self.build_frame)
         output_notebook.pack(fill="both", expand=True, padx=5, pady=5)
@@ -187,6 +198,10 @@ class CompilerGUILinux:
         self.output_text = tk.Text(build_output_frame, height=8)
         build_scrollbar = ttk.Scrollbar(build_output_frame, orient="vertical", command=self.output_text.yview)
         self.output_text.configure(yscrollcommand=build_scrollbar.set)
+        # Compiler stderr is streamed into the same pane, tagged in red; output
+        # is coalesced into one insert per frame
+        self.output_renderer = OutputRenderer(self.root, self.output_text,
+                                              tags={"stderr": {"foreground": "#c00000"}})
         
         self.output_text.pack(side="left", fill="both", expand=True)
         build_scrollbar.pack(side="right", fill="y")
@@ -198,6 +213,8 @@ class CompilerGUILinux:
         self.runtime_text = tk.Text(runtime_output_frame, height=8)
         runtime_scrollbar = ttk.Scrollbar(runtime_output_frame, orient="vertical", command=self.runtime_text.yview)
         self.runtime_text.configure(yscrollcommand=runtime_scrollbar.set)
+        self.runtime_renderer = OutputRenderer(self.root, self.runtime_text,
+                                               tags={"stderr": {"foreground": "#c00000"}})
         
         self.runtime_text.pack(side="left", fill="both", expand=True)
         runtime_scrollbar.pack(side="right", fill="y")
@@ -209,6 +226,7 @@ class CompilerGUILinux:
         self.debug_text = tk.Text(debug_output_frame, height=8)
         debug_scrollbar = ttk.Scrollbar(debug_output_frame, orient="vertical", command=self.debug_text.yview)
         self.debug_text.configure(yscrollcommand=debug_scrollbar.set)
+        self.debug_renderer = OutputRenderer(self.root, self.debug_text)
         
         self.debug_text.pack(side="left", fill="both", expand=True)
         debug_scrollbar.pack(side="right", fill="y")
@@ -219,6 +237,10 @@ class CompilerGUILinux:
         
         self.error_summary = tk.Text(error_frame, height=3, bg="#fff2f2")
         self.error_summary.pack(fill="x", padx=5, pady=5)
+        # Diagnostics are parsed as output streams in; the summary is
+        # refreshed at most once per event loop wakeup
+        self.summary_wakeup = Wakeup(self.root, self.refresh_error_summary)
+        self.start_output_stream()
     
     def setup_config_tab(self):
         """Setup the configuration tab"""
@@ -327,6 +349,24 @@ class CompilerGUILinux:
         
         jdk_frame.columnconfigure(1, weight=1)
         
+        # Build executor: C++ steps can be handed to ninja
+        executor_frame = ttk.LabelFrame(scrollable_frame, text="Build Executor")
+        executor_frame.pack(fill="x", padx=5, pady=5)
+        
+        ninja_enabled_var = tk.BooleanVar()
+        self.config_vars["ninja_enabled"] = ninja_enabled_var
+        ttk.Checkbutton(executor_frame, text="Run C++ builds through ninja (build.ninja next to the objects)",
+                       variable=ninja_enabled_var).grid(row=0, column=0, columnspan=3, sticky="w", padx=5, pady=2)
+        
+        ttk.Label(executor_frame, text="Ninja Path:").grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        ninja_path_var = tk.StringVar()
+        self.config_vars["ninja_path"] = ninja_path_var
+        ttk.Entry(executor_frame, textvariable=ninja_path_var, width=50).grid(row=1, column=1, sticky="ew", padx=5, pady=2)
+        ttk.Button(executor_frame, text="Browse", 
+                  command=lambda: self.browse_config_file("ninja_path")).grid(row=1, column=2, padx=5, pady=2)
+        
+        executor_frame.columnconfigure(1, weight=1)
+        
         # Package installation helper
         pkg_frame = ttk.LabelFrame(scrollable_frame, text="Package Installation Helper")
         pkg_frame.pack(fill="x", padx=5, pady=10)
@@ -342,6 +382,8 @@ class CompilerGUILinux:
                   command=self.install_cryptopp).pack(side="left", padx=5)
         ttk.Button(pkg_buttons_frame, text="Install OpenSSL Dev", 
                   command=self.install_openssl).pack(side="left", padx=5)
+        ttk.Button(pkg_buttons_frame, text="Install Ninja", 
+                  command=self.install_ninja).pack(side="left", padx=5)
         
         # Save button
         save_frame = ttk.Frame(scrollable_frame)
@@ -374,6 +416,14 @@ class CompilerGUILinux:
         ]
         self.run_package_install(commands, "OpenSSL Development")
     
+    def install_ninja(self):
+        """Install the ninja build executor"""
+        commands = [
+            "sudo apt update",
+            "sudo apt install -y ninja-build"
+        ]
+        self.run_package_install(commands, "Ninja")
+    
     def run_package_install(self, commands, package_name):
         """Run package installation commands"""
         result = messagebox.askyesno("Install Package", 
@@ -381,22 +431,20 @@ class CompilerGUILinux:
         if not result:
             return
         
-        self.output_text.insert(tk.END, f"\n📦 Installing {package_name}...\n")
-        self.output_text.see(tk.END)
+        self.append_output(f"\n📦 Installing {package_name}...\n")
         
         for cmd in commands:
-            self.output_text.insert(tk.END, f"Running: {cmd}\n")
+            self.append_output(f"Running: {cmd}\n")
             try:
                 result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
                 if result.returncode == 0:
-                    self.output_text.insert(tk.END, "✅ Success\n")
+                    self.append_output("✅ Success\n")
                 else:
-                    self.output_text.insert(tk.END, f"❌ Error: {result.stderr}\n")
+                    self.append_output(f"❌ Error: {result.stderr}\n")
             except Exception as e:
-                self.output_text.insert(tk.END, f"❌ Exception: {e}\n")
+                self.append_output(f"❌ Exception: {e}\n")
         
-        self.output_text.insert(tk.END, f"📦 {package_name} installation completed.\n\n")
-        self.output_text.see(tk.END)
+        self.append_output(f"📦 {package_name} installation completed.\n\n")
     
     def load_saved_config(self):
         """Load saved configuration into UI"""
@@ -430,6 +478,14 @@ class CompilerGUILinux:
         else:
             filetypes = [("All files", "*.*")]
         
+        if language == "C++":
+            # Several sources build one target: objects compile in parallel, then link once
+            filenames = filedialog.askopenfilenames(filetypes=filetypes)
+            if filenames:
+                self.input_file_var.set(SOURCE_SEPARATOR.join(filenames))
+                self.auto_generate_output_filename()
+            return
+        
         filename = filedialog.askopenfilename(filetypes=filetypes)
         if filename:
             self.input_file_var.set(filename)
@@ -460,36 +516,11 @@ class CompilerGUILinux:
     
     def auto_generate_output_filename(self):
         """Auto-generate output filename based on input"""
-        input_file = self.input_file_var.get()
-        if not input_file:
+        sources = split_sources(self.input_file_var.get())
+        if not sources:
             return
         
-        input_path = Path(input_file)
-        language = self.language_var.get()
-        compiler = self.compiler_var.get().lower()
-        build_type = self.build_type_var.get()
-        
-        # Create compiler-specific output directory
-        output_dir = input_path.parent / compiler
-        output_dir.mkdir(exist_ok=True)
-        
-        if language == "C++":
-            if build_type == "Executable":
-                ext = ""  # No extension for Linux executables
-            elif build_type == "Shared Library":
-                ext = ".so"
-            else:  # Static Library
-                ext = ".a"
-            output_filename = f"{input_path.stem}_{compiler}{ext}"
-        elif language == "C#":
-            output_filename = f"{input_path.stem}.exe"
-        elif language == "Java":
-            output_filename = f"{input_path.stem}.class"
-        else:
-            output_filename = f"{input_path.stem}_{compiler}"
-        
-        output_path = output_dir / output_filename
-        self.output_file_var.set(str(output_path))
+        self.output_file_var.set(self.engine.default_output_file(self.build_options(), sources[0]))
     
     def browse_config_file(self, key):
         """Browse for configuration file"""
@@ -510,200 +541,40 @@ class CompilerGUILinux:
         for key, var in self.config_vars.items():
             self.config[key] = var.get()
         self.save_config()
+        # Pick up executor changes such as ninja_enabled and new library paths
+        self.engine = BuildEngine(self.config)
+        self.symbols = SymbolIndex.from_config(self.config)
+        self.history = BuildHistory.from_config(self.config)
+        self.estimates = DurationModel(self.history)
         messagebox.showinfo("Success", "Configuration saved successfully!")
     
-    def generate_command(self):
-        """Generate build command based on current settings"""
-        language = self.language_var.get()
-        compiler = self.compiler_var.get()
-        build_type = self.build_type_var.get()
-        library = self.library_var.get()
-        input_file = self.input_file_var.get()
-        output_file = self.output_file_var.get()
-        
-        if not input_file or not output_file:
-            return "Please select input and output files"
-        
-        if language == "C++":
-            return self.generate_cpp_command(compiler, build_type, library, input_file, output_file)
-        elif language == "C#":
-            return self.generate_csharp_command(compiler, input_file, output_file)
-        elif language == "Java":
-            return self.generate_java_command(input_file, output_file)
-        elif language == "JNI":
-            return self.generate_jni_command(compiler, input_file, output_file)
-        
-        return "Unsupported language"
-    
-    def generate_cpp_command(self, compiler, build_type, library, input_file, output_file):
-        """Generate C++ build command for Linux"""
-        cmd_parts = []
-        
-        # Compiler path
-        compiler_key = f"{compiler.lower()}_path"
-        compiler_path = self.config.get(compiler_key, "")
-        if not compiler_path:
-            return f"Please configure {compiler} compiler path"
-        
-        cmd_parts.append(f'"{compiler_path}"')
-        
-        # Debug flags
-        if self.debug_var.get():
-            cmd_parts.extend(["-g", "-ggdb"])
-        
-        # Optimization flags
-        if self.optimize_var.get():
-            cmd_parts.extend(["-O3", "-DNDEBUG"])
-        else:
-            cmd_parts.extend(["-O0", "-DDEBUG"])
-        
-        # Verbose flag
-        if self.verbose_var.get():
-            cmd_parts.append("-v")
-        
-        # Position Independent Code
-        if self.pic_var.get() or build_type == "Shared Library":
-            cmd_parts.append("-fPIC")
-        
-        # Build type specific flags
-        if build_type == "Shared Library":
-            cmd_parts.append("-shared")
-        elif build_type == "Static Library":
-            # For static library, we need ar command instead
-            return self.generate_static_lib_command(input_file, output_file)
-        
-        # Standard flags
-        cmd_parts.extend(["-std=c++17", "-Wall", "-Wextra"])
-        
-        # Input and output
-        cmd_parts.extend([f'"{input_file}"', "-o", f'"{output_file}"'])
-        
-        # Library-specific flags
-        if library == "CryptoPP":
-            self.add_cryptopp_flags(cmd_parts, compiler)
-        elif library == "OpenSSL":
-            self.add_openssl_flags(cmd_parts, compiler)
-        elif library == "Both":
-            self.add_cryptopp_flags(cmd_parts, compiler)
-            self.add_openssl_flags(cmd_parts, compiler)
-        
-        # Threading
-        cmd_parts.append("-lpthread")
-        
-        # Add auto-run if enabled
-        if self.auto_run_var.get() and build_type == "Executable":
-            cmd_parts.extend(["&&", f'"{output_file}"'])
-        
-        return " ".join(cmd_parts)
-    
-    def generate_static_lib_command(self, input_file, output_file):
-        """Generate static library build command"""
-        input_path = Path(input_file)
-        output_path = Path(output_file)
-        
-        # First compile to object file
-        obj_file = output_path.with_suffix('.o')
-        compiler_path = self.config.get("gcc_path", "/usr/bin/g++")
-        
-        compile_cmd = [f'"{compiler_path}"', "-c"]
-        
-        if self.debug_var.get():
-            compile_cmd.extend(["-g", "-ggdb"])
-        if self.optimize_var.get():
-            compile_cmd.extend(["-O3", "-DNDEBUG"])
-        
-        compile_cmd.extend(["-fPIC", "-std=c++17", "-Wall"])
-        compile_cmd.extend([f'"{input_file}"', "-o", f'"{obj_file}"'])
-        
-        # Then create archive
-        ar_cmd = ["ar", "rcs", f'"{output_file}"', f'"{obj_file}"']
-        
-        return " ".join(compile_cmd) + " && " + " ".join(ar_cmd)
-    
-    def add_cryptopp_flags(self, cmd_parts, compiler):
-        """Add CryptoPP library flags for Linux"""
-        include_dir = self.config.get("cryptopp_include", "")
-        lib_dir = self.config.get(f"cryptopp_lib_{compiler.lower()}", "")
-        
-        if include_dir:
-            cmd_parts.extend([f"-I{include_dir}"])
-        
-        if lib_dir:
-            cmd_parts.extend([f"-L{lib_dir}"])
-        
-        # Standard CryptoPP library name on Linux
-        cmd_parts.extend(["-lcryptopp"])
-    
-    def add_openssl_flags(self, cmd_parts, compiler):
-        """Add OpenSSL library flags for Linux"""
-        include_dir = self.config.get(f"openssl_include_{compiler.lower()}", "")
-        lib_dir = self.config.get(f"openssl_lib_{compiler.lower()}", "")
-        
-        if include_dir:
-            cmd_parts.extend([f"-I{include_dir}"])
-        
-        if lib_dir:
-            cmd_parts.extend([f"-L{lib_dir}"])
-        
-        # Standard OpenSSL libraries on Linux
-        cmd_parts.extend(["-lssl", "-lcrypto"])
-    
-    def generate_csharp_command(self, compiler, input_file, output_file):
-        """Generate C# build command for Linux"""
-        if compiler == "Mono":
-            csc_path = self.config.get("csc_path", "mcs")
-            cmd_parts = [f'"{csc_path}"']
-        else:  # .NET Core
-            dotnet_path = self.config.get("dotnet_path", "dotnet")
-            # For dotnet, we need a project file, this is simplified
-            return f'"{dotnet_path}" build'
-        
-        if self.debug_var.get():
-            cmd_parts.append("-debug")
-        if self.optimize_var.get():
-            cmd_parts.append("-optimize+")
-        
-        cmd_parts.extend([f'"{input_file}"', "-out:" + f'"{output_file}"'])
-        
-        if self.auto_run_var.get():
-            cmd_parts.extend(["&&", "mono", f'"{output_file}"'])
-        
-        return " ".join(cmd_parts)
+    def build_options(self):
+        """Collect build options from the UI"""
+        return BuildOptions(
+            language=self.language_var.get(),
+            compiler=self.compiler_var.get(),
+            build_type=self.build_type_var.get(),
+            library=self.library_var.get(),
+            debug=self.debug_var.get(),
+            optimize=self.optimize_var.get(),
+            verbose=self.verbose_var.get(),
+            pic=self.pic_var.get(),
+            auto_run=self.auto_run_var.get(),
+            time_report=self.time_report_var.get()
+        )
     
-    def generate_java_command(self, input_file, output_file):
-        """Generate Java build command"""
-        javac_path = self.config.get("javac_path", "javac")
-        cmd_parts = [f'"{javac_path}"', f'"{input_file}"']
-        
-        if self.auto_run_var.get():
-            java_path = self.config.get("java_path", "java")
-            class_name = Path(input_file).stem
-            input_dir = Path(input_file).parent
-            cmd_parts.extend(["&&", "cd", f'"{input_dir}"', "&&", f'"{java_path}"', class_name])
-        
-        return " ".join(cmd_parts)
+    def generate_steps(self):
+        """Generate build steps based on current settings"""
+        return self.engine.generate_steps(self.build_options(),
+                                          self.input_file_var.get(),
+                                          self.output_file_var.get())
     
-    def generate_jni_command(self, compiler, input_file, output_file):
-        """Generate JNI build command for Linux"""
-        compiler_path = self.config.get(f"{compiler.lower()}_path", "")
-        jdk_include = self.config.get("jdk_include", "")
-        jdk_linux_include = self.config.get("jdk_include_linux", "")
-        
-        if not all([compiler_path, jdk_include, jdk_linux_include]):
-            return "Please configure JDK paths for JNI"
-        
-        cmd_parts = [f'"{compiler_path}"']
-        cmd_parts.extend(["-shared", "-fPIC"])
-        
-        if self.debug_var.get():
-            cmd_parts.extend(["-g", "-ggdb"])
-        if self.optimize_var.get():
-            cmd_parts.extend(["-O3"])
-        
-        cmd_parts.extend([f"-I{jdk_include}", f"-I{jdk_linux_include}"])
-        cmd_parts.extend([f'"{input_file}"', "-o", f'"{output_file}"'])
-        
-        return " ".join(cmd_parts)
+    def generate_command(self):
+        """Generate build command based on current settings"""
+        try:
+            return self.engine.format_command(self.generate_steps())
+        except BuildError as e:
+            return str(e)
     
     def update_command_preview(self):
         """Update command preview"""
@@ -713,91 +584,379 @@ class CompilerGUILinux:
     
     def build_project(self):
         """Build the project"""
-        command = self.generate_command()
-        if "Please" in command or "Unsupported" in command:
-            messagebox.showerror("Error", command)
+        try:
+            steps = self.generate_steps()
+        except BuildError as e:
+            messagebox.showerror("Error", str(e))
             return
         
-        self.output_text.insert(tk.END, f"Executing: {command}\n\n")
-        self.output_text.see(tk.END)
+        command = self.engine.format_command(steps)
+        self.append_output(f"Executing: {command}\n\n")
+        self.start_output_stream()
+        
+        # What the build is recorded under in the build history
+        options = self.build_options()
+        sources = split_sources(self.input_file_var.get())
+        output_file = self.output_file_var.get()
+        build = (options, sources, output_file)
+        # Predicted from earlier builds of the same target, else from the sources
+        estimate, basis = self.estimates.predict(sources, output_file, options.compiler,
+                                                 options.to_dict(), default_jobs(self.config))
+        self.append_output(f"⏳ Estimated build time: ~{estimate:.1f}s ({basis})\n\n")
+        tracker = ProgressTracker({"build": estimate})
+        tracker.started("build")
+        self.show_progress(tracker)
         
         # Run in separate thread to avoid freezing UI
-        thread = threading.Thread(target=self.execute_build, args=(command,))
+        thread = threading.Thread(target=self.execute_build, args=(steps, build, tracker))
         thread.daemon = True
         thread.start()
     
-    def execute_build(self, command):
-        """Execute build command in separate thread"""
+    def execute_build(self, steps, build=None, tracker=None):
+        """Execute build steps in separate thread"""
         try:
-            process = subprocess.Popen(
-                command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            # Output is shown and analyzed while the compiler runs
+            result = self.engine.execute(steps, default_jobs(self.config),
+                                         on_output=self.stream_build_output,
+                                         diagnostics=self.diagnostics)
+            if tracker is not None:
+                tracker.finished("build", result.duration)
+                self.root.after(0, self.hide_progress)
+            if build is not None:
+                self.record_history(result, steps, *build)
             
-            # Read output and errors
-            stdout, stderr = process.communicate()
+            # Full analysis of the captured stderr, with library flag hints
+            if result.stderr or result.diagnostics:
+                self.root.after(0, self.analyze_errors, self.library_hints(result))
             
-            # Display output
-            if stdout:
-                self.root.after(0, self.append_output, stdout)
-            if stderr:
-                self.root.after(0, self.append_output, f"\n--- STDERR ---\n{stderr}")
-                self.root.after(0, self.analyze_errors, stderr)
+            if result.cache["hits"] or result.cache["misses"]:
+                self.root.after(0, self.append_output, f"\n{result.cache_summary()}\n")
+            
+            if result.timing is not None:
+                self.root.after(0, self.append_output, "\n" + "\n".join(result.timing.summary_lines()) + "\n")
+                self.root.after(0, self.show_timing, result.timing)
             
-            if process.returncode == 0:
+            if result.error:
+                self.root.after(0, self.append_output, f"\n❌ Error executing command: {result.error}\n")
+            elif result.up_to_date:
+                self.root.after(0, self.append_output,
+                                f"\n{result.up_to_date_message(self.output_file_var.get())}\n")
+            elif result.success:
                 self.root.after(0, self.append_output, "\n✅ Build completed successfully!\n")
             else:
-                self.root.after(0, self.append_output, f"\n❌ Build failed with return code {process.returncode}\n")
+                self.root.after(0, self.append_output, f"\n❌ Build failed with return code {result.returncode}\n")
+            flush_trace()
                 
         except Exception as e:
             self.root.after(0, self.append_output, f"\n❌ Error executing command: {str(e)}\n")
+            self.root.after(0, self.hide_progress)
     
-    def analyze_errors(self, error_text):
-        """Analyze and categorize build errors"""
-        if not hasattr(self, 'error_summary'):
+    def show_progress(self, tracker):
+        """Show a progress bar and ETA driven by a ProgressTracker"""
+        self.hide_progress()
+        self.build_progress.pack(side="left", fill="x", expand=True, padx=5, pady=2)
+        self.eta_label.pack(side="left", padx=5)
+        self.update_progress(tracker)
+    
+    def update_progress(self, tracker):
+        """Refresh the progress bar and ETA until hide_progress is called"""
+        self.build_progress.config(value=100 * tracker.fraction())
+        self.eta_var.set(tracker.status())
+        self.progress_job = self.root.after(PROGRESS_MS, self.update_progress, tracker)
+    
+    def hide_progress(self):
+        """Hide the progress bar"""
+        if self.progress_job is not None:
+            self.root.after_cancel(self.progress_job)
+            self.progress_job = None
+        self.build_progress.pack_forget()
+        self.eta_label.pack_forget()
+    
+    def record_history(self, result, steps, options, sources, output_file):
+        """Add a finished build to the build history (runs in the build thread)"""
+        if self.history is None or result.error:
+            return
+        try:
+            self.history.record(result, steps, sources, output_file, options.compiler,
+                                self.engine.compiler_version(steps[0].argv[0]),
+                                options.to_dict(), origin="gui")
+        except Exception as e:
+            self.root.after(0, self.append_output, f"\n⚠️ Build history not updated: {e}\n")
+    
+    def open_build_history(self):
+        """Window with recorded builds per target, their daily trend and regressions"""
+        if self.history is None:
+            messagebox.showinfo("Build History", "Build history is disabled (build_history_enabled)")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Build History")
+        window.geometry("760x560")
+        
+        regressions = self.history.regressions()
+        regressions += self.history.regressions(metric="max_rss_kb")
+        text = "\n".join(f"⚠️ {item['message']}" for item in regressions) or "✅ No build time or memory regressions this week"
+        ttk.Label(window, text=text, justify="left").pack(fill="x", padx=5, pady=5)
+        
+        columns = (("target", "Target", 260), ("compiler", "Compiler", 100), ("builds", "Builds", 80),
+                   ("last", "Last build", 160))
+        targets = ttk.Treeview(window, columns=[column for column, _, _ in columns], show="headings", height=8)
+        for column, heading, width in columns:
+            targets.heading(column, text=heading)
+            targets.column(column, width=width, anchor="w" if column == "target" else "center")
+        for target, compiler, count, last in self.history.targets():
+            targets.insert("", tk.END, values=(target, compiler, count,
+                                               time.strftime("%Y-%m-%d %H:%M", time.localtime(last))))
+        
+        columns = ("day", "builds", "failed", "median", "memory", "size", "warnings")
+        headings = ("Day", "Builds", "Failed", "Median (s)", "Peak MB", "Size (KB)", "Warnings")
+        trend = ttk.Treeview(window, columns=columns, show="headings", height=10)
+        for column, heading in zip(columns, headings):
+            trend.heading(column, text=heading)
+            trend.column(column, width=95, anchor="center")
+        
+        fmt = lambda value, scale, spec: format(value / scale, spec) if value is not None else "-"
+        
+        def show_trend(event=None):
+            trend.delete(*trend.get_children())
+            selection = targets.selection()
+            if not selection:
+                return
+            target, compiler = [str(value) for value in targets.item(selection[0], "values")[:2]]
+            for day in self.history.trend(target, compiler):
+                trend.insert("", tk.END, values=(day["day"], day["builds"], day["failed"],
+                                                 fmt(day["median_duration"], 1, ".2f"),
+                                                 fmt(day["max_rss_kb"], 1024, ".0f"),
+                                                 fmt(day["output_size"], 1024, ".1f"), day["warnings"]))
+        
+        targets.bind("<<TreeviewSelect>>", show_trend)
+        targets.pack(fill="both", expand=True, padx=5, pady=5)
+        ttk.Label(window, text="Daily trend of the selected target (time, memory and size of clean builds):").pack(anchor="w", padx=5)
+        trend.pack(fill="both", expand=True, padx=5, pady=5)
+    
+    def open_build_matrix(self):
+        """Open the build matrix window (compiler x optimization x library)"""
+        input_file = self.input_file_var.get()
+        if not input_file or self.language_var.get() != "C++":
+            messagebox.showerror("Error", "Build matrix needs a C++ input file")
             return
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"Build Matrix - {Path(input_file).name}")
+        window.geometry("700x450")
+        
+        axes_frame = ttk.LabelFrame(window, text="Axes")
+        axes_frame.pack(fill="x", padx=5, pady=5)
+        
+        axis_vars = {}
+        axes = [
+            ("Compiler", "compiler", MATRIX_COMPILERS, [self.compiler_var.get()]),
+            ("Optimization", "opt_level", MATRIX_OPT_LEVELS, ["O0", "O3"]),
+            ("Library", "library", MATRIX_LIBRARIES, [self.library_var.get()])
+        ]
+        for row, (label, key, values, selected) in enumerate(axes):
+            ttk.Label(axes_frame, text=f"{label}:").grid(row=row, column=0, sticky="w", padx=5, pady=2)
+            axis_vars[key] = {}
+            for column, value in enumerate(values, start=1):
+                var = tk.BooleanVar(value=value in selected)
+                axis_vars[key][value] = var
+                ttk.Checkbutton(axes_frame, text=value, variable=var).grid(row=row, column=column, sticky="w", padx=5, pady=2)
+        
+        columns = ("compiler", "opt_level", "library", "status", "time", "size")
+        headings = ("Compiler", "Opt", "Library", "Status", "Time (s)", "Size (KB)")
+        table = ttk.Treeview(window, columns=columns, show="headings", height=12)
+        for column, heading in zip(columns, headings):
+            table.heading(column, text=heading)
+            table.column(column, width=100, anchor="center")
+        
+        summary_var = tk.StringVar(value="Select axes and press Run Matrix")
+        built = []
+        
+        def add_row(row):
+            if row["success"] and not row["output"].endswith(('.so', '.a')):
+                built.append(row)
+            size = f"{row['size'] / 1024:.1f}" if row.get("size") is not None else "-"
+            table.insert("", tk.END, values=(row["compiler"], row["opt_level"], row["library"],
+                                             row_status(row), f"{row.get('duration', 0.0):.2f}", size))
+            message = row.get("stderr") or row.get("error")
+            if not row["success"] and not row.get("skipped") and message:
+                self.append_output(f"\n--- {row['cell']} ---\n{message}")
+        
+        def run_matrix():
+            cells = expand_matrix(
+                *[[value for value, var in axis_vars[key].items() if var.get()]
+                  for key in ("compiler", "opt_level", "library")]
+            )
+            if not cells:
+                messagebox.showerror("Error", "Select at least one value on every axis", parent=window)
+                return
+            table.delete(*table.get_children())
+            built.clear()
+            summary_var.set(f"Building {len(cells)} combination(s)...")
+            options = self.build_options()
             
-        error_analysis = []
-        lines = error_text.split('\n')
+            def worker():
+                try:
+                    matrix = BuildMatrix(self.config, self.config.get("parallel_jobs"))
+                    _, summary = matrix.run(input_file, cells, options,
+                                            lambda row: self.root.after(0, add_row, row))
+                    text = (f"{summary['succeeded']}/{summary['total']} succeeded in "
+                            f"{summary['wall_time']:.2f}s with {summary['jobs']} job(s)")
+                except Exception as e:
+                    text = f"❌ Matrix failed: {e}"
+                self.root.after(0, summary_var.set, text)
+            
+            threading.Thread(target=worker, daemon=True).start()
+        
+        def compare_runtime():
+            if self.benchmark is not None:
+                messagebox.showinfo("Compare", "A benchmark is already running", parent=window)
+                return
+            if len(built) < 2:
+                messagebox.showerror("Error", "Build at least two executables with Run Matrix first", parent=window)
+                return
+            # Baseline: the first cell in matrix order
+            order = {cell_title(cell): index for index, cell in enumerate(
+                expand_matrix(MATRIX_COMPILERS, MATRIX_OPT_LEVELS, MATRIX_LIBRARIES))}
+            rows = sorted(built, key=lambda row: order.get(cell_title(row), 0))
+            variants = [(cell_title(row), [os.path.abspath(row["output"])]) for row in rows]
+            self.benchmark = Comparison.from_config(self.config, variants, cwd=str(Path(input_file).parent),
+                                                    name=Path(input_file).name)
+            summary_var.set(f"Comparing {len(variants)} builds, {self.benchmark.runs} interleaved runs each...")
+            
+            def worker():
+                try:
+                    with span(f"compare {Path(input_file).name}", "run"):
+                        report = self.benchmark.run()
+                    flush_trace()
+                    self.append_runtime_output("\n".join(comparison_lines(report)) + "\n")
+                    comparisons = report["comparisons"]
+                    if len(comparisons) == 1:
+                        text = comparisons[0]["message"]
+                    else:
+                        significant = sum(1 for comparison in comparisons if comparison["significant"])
+                        text = (f"{significant} of {len(comparisons)} builds differ significantly from "
+                                f"{report['baseline']}; see Runtime output")
+                except Exception as e:
+                    text = f"❌ Comparison failed: {e}"
+                finally:
+                    self.benchmark = None
+                self.root.after(0, summary_var.set, text)
+            
+            threading.Thread(target=worker, daemon=True).start()
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Common error patterns for Linux
-            if 'error:' in line.lower():
-                if 'no such file or directory' in line.lower():
-                    error_analysis.append("❌ Missing file/header - Check include paths or install package")
-                elif 'undefined reference' in line.lower():
-                    error_analysis.append("❌ Linking error - Check library paths (-L) and library names (-l)")
-                elif 'permission denied' in line.lower():
-                    error_analysis.append("❌ Permission denied - Check file permissions (chmod +x)")
-                elif 'syntax error' in line.lower():
-                    error_analysis.append("❌ Syntax error in source code")
-                elif 'cannot find -l' in line.lower():
-                    error_analysis.append("❌ Library not found - Install development package")
-                else:
-                    error_analysis.append(f"❌ {line}")
-            elif 'warning:' in line.lower():
-                error_analysis.append(f"⚠️ {line}")
-            elif 'fatal error:' in line.lower():
-                error_analysis.append(f"💀 {line}")
-        
-        if error_analysis:
-            summary = "\n".join(error_analysis[:10])
-            if len(error_analysis) > 10:
-                summary += f"\n... and {len(error_analysis) - 10} more errors"
-        else:
-            summary = "No specific errors detected in output"
+        controls = ttk.Frame(window)
+        controls.pack(fill="x", padx=5, pady=5)
+        ttk.Button(controls, text="Run Matrix", command=run_matrix).pack(side="left", padx=5)
+        ttk.Button(controls, text="Compare Runtime", command=compare_runtime).pack(side="left", padx=5)
+        ttk.Label(controls, textvariable=summary_var).pack(side="left", padx=5)
+        
+        table.pack(fill="both", expand=True, padx=5, pady=5)
+    
+    def show_timing(self, timing):
+        """Window with the per-phase compile time breakdown of the last build"""
+        window = tk.Toplevel(self.root)
+        window.title(f"Compile Time - {timing.target}")
+        window.geometry("650x450")
+        
+        table = ttk.Treeview(window, columns=("seconds", "share"), height=16)
+        table.heading("#0", text="Phase / item")
+        table.heading("seconds", text="Time (s)")
+        table.heading("share", text="%")
+        table.column("#0", width=420)
+        table.column("seconds", width=90, anchor="e")
+        table.column("share", width=70, anchor="e")
+        
+        total = timing.total() or 1.0
+        for name, seconds in timing.categories.items():
+            if seconds:
+                table.insert("", tk.END, text=name,
+                             values=(f"{seconds:.3f}", f"{100 * seconds / total:.1f}"))
+        for title, table_data in (("Translation units", timing.units),
+                                  ("Most expensive headers", timing.headers),
+                                  ("Most expensive templates", timing.templates)):
+            entries = timing.top(table_data)
+            if entries:
+                parent = table.insert("", tk.END, text=title, open=True)
+                for name, seconds in entries:
+                    table.insert(parent, tk.END, text=name,
+                                 values=(f"{seconds:.3f}", f"{100 * seconds / total:.1f}"))
+        
+        def open_flamegraph():
+            try:
+                output_dir = Path(self.output_file_var.get() or ".").parent
+                svg_file = timing.write_flamegraph(str(output_dir / f"{timing.target}.time.svg"))
+                subprocess.Popen(['xdg-open', svg_file])
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to open flamegraph: {e}", parent=window)
         
+        controls = ttk.Frame(window)
+        controls.pack(fill="x", padx=5, pady=5)
+        ttk.Button(controls, text="Open Flamegraph", command=open_flamegraph).pack(side="left", padx=5)
+        ttk.Label(controls, text=f"Total {timing.total():.2f}s").pack(side="left", padx=5)
+        table.pack(fill="both", expand=True, padx=5, pady=5)
+    
+    def start_output_stream(self):
+        """Reset the live error summary before a build starts"""
+        # Filled by the engine, which parses and deduplicates the output
+        self.diagnostics = DiagnosticSet()
+        self.summary_version = 0
         self.error_summary.delete(1.0, tk.END)
-        self.error_summary.insert(1.0, summary)
+    
+    def stream_build_output(self, stream, text):
+        """Forward a chunk of build output as it arrives (called from build threads)"""
+        self.output_renderer.write(text, "stderr" if stream == "stderr" else None)
+        if self.diagnostics.version != self.summary_version:
+            self.summary_wakeup.notify()
+    
+    @traced("error summary", "ui")
+    def refresh_error_summary(self):
+        """Show the errors and warnings found so far"""
+        self.summary_version = self.diagnostics.version
+        self.show_error_summary(self.diagnostics.summary())
+    
+    def library_hints(self, result):
+        """Exact -I/-L/-l suggestions for missing headers and symbols (runs in the build thread)"""
+        if self.symbols is None or result.success:
+            return []
+        try:
+            self.symbols.refresh()
+            return self.symbols.diagnose(result.stderr)
+        except Exception:
+            return []
+    
+    def analyze_errors(self, hints=None):
+        """Final error summary once the build has finished"""
+        if not hasattr(self, 'error_summary'):
+            return
+        
+        # Flags resolved from the header/symbol index come first
+        self.show_error_summary([(suggestion_message(hint), []) for hint in hints or []]
+                                + self.diagnostics.summary())
+    
+    def show_error_summary(self, summary):
+        """Show (text, details) summary entries; clicking an entry shows its details"""
+        self.error_summary.delete(1.0, tk.END)
+        if not summary:
+            self.error_summary.insert(1.0, "No specific errors detected in output")
+            return
+        
+        for index, (text, details) in enumerate(summary):
+            if not details:
+                self.error_summary.insert(tk.END, f"{text}\n")
+                continue
+            # The first occurrence's notes, collapsed until the entry is clicked
+            entry, body = f"entry{index}", f"details{index}"
+            self.error_summary.insert(tk.END, f"▸ {text}\n", entry)
+            self.error_summary.insert(tk.END, "".join(f"      {line}\n" for line in details), body)
+            self.error_summary.tag_configure(body, elide=True)
+            self.error_summary.tag_bind(entry, "<Button-1>",
+                                        lambda event, tag=body: self.toggle_summary_details(tag))
+    
+    def toggle_summary_details(self, tag):
+        """Expand or collapse the details of one summary entry"""
+        hidden = str(self.error_summary.tag_cget(tag, "elide")) in ("1", "true", "True")
+        self.error_summary.tag_configure(tag, elide=not hidden)
     
     def run_executable(self):
         """Run the compiled executable"""
@@ -825,9 +984,8 @@ class CompilerGUILinux:
             self.run_mono_executable(output_file)
             return
         
-        self.runtime_text.insert(tk.END, f"🚀 Running: {output_file}\n")
-        self.runtime_text.insert(tk.END, "=" * 50 + "\n")
-        self.runtime_text.see(tk.END)
+        self.append_runtime_output(f"🚀 Running: {output_file}\n")
+        self.append_runtime_output("=" * 50 + "\n")
         
         # Run in separate thread
         thread = threading.Thread(target=self.execute_runtime, args=(output_file,))
@@ -841,45 +999,72 @@ class CompilerGUILinux:
             exe_dir = os.path.dirname(executable_path)
             exe_name = os.path.basename(executable_path)
             
-            process = subprocess.Popen(
-                f"./{exe_name}",
-                cwd=exe_dir,
-                # [os.path.abspath(executable_path)],
-                #  cwd=exe_dir if exe_dir else None, Nếu có lỗi
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            
-            # Read output in real-time
-            while True:
-                output = process.stdout.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    self.root.after(0, self.append_runtime_output, output)
+            # Output goes straight to the renderer, one insert per frame
+            with span(f"run {exe_name}", "run"):
+                returncode, _, _ = run_streaming([f"./{exe_name}"], self.stream_runtime_output, cwd=exe_dir)
+            flush_trace()
             
-            # Get any remaining output
-            stdout, stderr = process.communicate()
-            if stdout:
-                self.root.after(0, self.append_runtime_output, stdout)
-            if stderr:
-                self.root.after(0, self.append_runtime_output, f"\n--- Runtime Errors ---\n{stderr}")
-            
-            self.root.after(0, self.append_runtime_output, f"\n🏁 Program finished with exit code: {process.returncode}\n")
+            self.append_runtime_output(f"\n🏁 Program finished with exit code: {returncode}\n")
             
         except Exception as e:
             self.root.after(0, self.append_runtime_output, f"\n❌ Runtime error: {str(e)}\n")
     
+    def benchmark_executable(self):
+        """Run the compiled executable repeatedly and report runtime statistics"""
+        output_file = self.output_file_var.get()
+        if not output_file or not os.path.isfile(output_file):
+            messagebox.showerror("Error", f"Output file does not exist: {output_file}")
+            return
+        if self.language_var.get() in ("Java", "C#") or output_file.endswith(('.so', '.a', '.exe')):
+            messagebox.showerror("Error", "Benchmarks run native executables only")
+            return
+        if self.benchmark is not None:
+            if messagebox.askyesno("Benchmark", "A benchmark is running. Stop it after the current run?"):
+                self.benchmark.cancel()
+            return
+        
+        runs = simpledialog.askinteger("Benchmark", "Measured runs:", parent=self.root,
+                                       initialvalue=self.config.get("benchmark_runs", 10),
+                                       minvalue=1, maxvalue=10000)
+        if runs is None:
+            return
+        
+        exe_dir = os.path.dirname(os.path.abspath(output_file))
+        self.benchmark = Benchmark.from_config(self.config, [f"./{os.path.basename(output_file)}"], cwd=exe_dir)
+        self.benchmark.runs = runs
+        self.append_runtime_output(f"⏱️ Benchmarking: {output_file} "
+                                   f"({self.benchmark.warmup} warmup + {runs} runs)\n")
+        self.append_runtime_output("=" * 50 + "\n")
+        
+        thread = threading.Thread(target=self.execute_benchmark, args=(self.benchmark,))
+        thread.daemon = True
+        thread.start()
+    
+    def execute_benchmark(self, benchmark):
+        """Run a benchmark and print its summary to the runtime output"""
+        def on_run(index, sample):
+            label = f"run {index + 1}/{benchmark.runs}" if index >= 0 else "warmup"
+            status = "" if sample["returncode"] == 0 else f" (exit code {sample['returncode']})"
+            self.append_runtime_output(f"   {label}: {format_seconds(sample['wall'])}{status}\n")
+        
+        try:
+            with span(f"benchmark {os.path.basename(benchmark.argv[0])}", "run"):
+                report = benchmark.run(on_run)
+            flush_trace()
+            if report["output"]:
+                self.append_runtime_output(f"--- Output of the first run ---\n{report['output']}\n")
+            self.append_runtime_output("\n".join(summary_lines(report)) + "\n")
+            if self.history is not None and report["runs"]:
+                self.history.record_benchmark(report, origin="gui")
+        except Exception as e:
+            self.append_runtime_output(f"\n❌ Benchmark error: {str(e)}\n")
+        finally:
+            self.benchmark = None
+    
     def run_mono_executable(self, executable_path):
         """Run C# executable with Mono"""
-        self.runtime_text.insert(tk.END, f"🚀 Running with Mono: {executable_path}\n")
-        self.runtime_text.insert(tk.END, "=" * 50 + "\n")
-        self.runtime_text.see(tk.END)
+        self.append_runtime_output(f"🚀 Running with Mono: {executable_path}\n")
+        self.append_runtime_output("=" * 50 + "\n")
         
         command = f'mono "{executable_path}"'
         thread = threading.Thread(target=self.execute_mono_runtime, args=(command,))
@@ -913,6 +1098,10 @@ class CompilerGUILinux:
         except Exception as e:
             self.root.after(0, self.append_runtime_output, f"\n❌ Mono runtime error: {str(e)}\n")
     
+    def stream_runtime_output(self, stream, text):
+        """Forward program output to the runtime pane (called from the runner thread)"""
+        self.runtime_renderer.write(text, "stderr" if stream == "stderr" else None)
+    
     def run_java_class(self):
         """Run Java class file"""
         input_file = self.input_file_var.get()
@@ -926,9 +1115,8 @@ class CompilerGUILinux:
         
         command = f'cd "{class_dir}" && "{java_path}" {class_name}'
         
-        self.runtime_text.insert(tk.END, f"🚀 Running Java: {command}\n")
-        self.runtime_text.insert(tk.END, "=" * 50 + "\n")
-        self.runtime_text.see(tk.END)
+        self.append_runtime_output(f"🚀 Running Java: {command}\n")
+        self.append_runtime_output("=" * 50 + "\n")
         
         thread = threading.Thread(target=self.execute_java_runtime, args=(command,))
         thread.daemon = True
@@ -961,6 +1149,34 @@ class CompilerGUILinux:
         except Exception as e:
             self.root.after(0, self.append_runtime_output, f"\n❌ Java runtime error: {str(e)}\n")
     
+    def profile_executable(self):
+        """Profile the compiled executable with perf (or callgrind) and write a flamegraph"""
+        output_file = self.output_file_var.get()
+        if not output_file or not os.path.isfile(output_file):
+            messagebox.showerror("Error", f"Output file does not exist: {output_file}")
+            return
+        if self.language_var.get() in ("Java", "C#") or output_file.endswith(('.so', '.a', '.exe')):
+            messagebox.showerror("Error", "Profiling needs a native executable")
+            return
+        
+        executable = os.path.abspath(output_file)
+        self.append_runtime_output(f"🔥 Profiling: {output_file}\n")
+        self.append_runtime_output("=" * 50 + "\n")
+        profiler = Profiler.from_config(self.config, [executable], cwd=os.path.dirname(executable))
+        
+        thread = threading.Thread(target=self.execute_profile, args=(profiler,))
+        thread.daemon = True
+        thread.start()
+    
+    def execute_profile(self, profiler):
+        """Run the profiler and print the hot functions to the runtime output"""
+        try:
+            report = profiler.run()
+            flush_trace()
+            self.append_runtime_output("\n".join(profile_lines(report)) + "\n")
+        except Exception as e:
+            self.append_runtime_output(f"\n❌ Profiling error: {str(e)}\n")
+    
     def debug_executable(self):
         """Debug the executable with GDB"""
         output_file = self.output_file_var.get()
@@ -980,19 +1196,18 @@ class CompilerGUILinux:
         except:
             pass
         
-        self.debug_text.insert(tk.END, f"🐛 Starting GDB for: {output_file}\n")
-        self.debug_text.insert(tk.END, "💡 Basic GDB commands:\n")
-        self.debug_text.insert(tk.END, "  - run: Start the program\n")
-        self.debug_text.insert(tk.END, "  - break main: Set breakpoint at main\n")
-        self.debug_text.insert(tk.END, "  - step: Step through code line by line\n")
-        self.debug_text.insert(tk.END, "  - next: Execute next line\n")
-        self.debug_text.insert(tk.END, "  - continue: Continue execution\n")
-        self.debug_text.insert(tk.END, "  - backtrace (bt): Show call stack\n")
-        self.debug_text.insert(tk.END, "  - print <var>: Print variable value\n")
-        self.debug_text.insert(tk.END, "  - list: Show source code\n")
-        self.debug_text.insert(tk.END, "  - quit: Exit debugger\n")
-        self.debug_text.insert(tk.END, "=" * 50 + "\n")
-        self.debug_text.see(tk.END)
+        self.debug_renderer.write(f"🐛 Starting GDB for: {output_file}\n")
+        self.debug_renderer.write("💡 Basic GDB commands:\n")
+        self.debug_renderer.write("  - run: Start the program\n")
+        self.debug_renderer.write("  - break main: Set breakpoint at main\n")
+        self.debug_renderer.write("  - step: Step through code line by line\n")
+        self.debug_renderer.write("  - next: Execute next line\n")
+        self.debug_renderer.write("  - continue: Continue execution\n")
+        self.debug_renderer.write("  - backtrace (bt): Show call stack\n")
+        self.debug_renderer.write("  - print <var>: Print variable value\n")
+        self.debug_renderer.write("  - list: Show source code\n")
+        self.debug_renderer.write("  - quit: Exit debugger\n")
+        self.debug_renderer.write("=" * 50 + "\n")
         
         # Try to launch GDB in terminal
         try:
@@ -1011,19 +1226,19 @@ class CompilerGUILinux:
             for terminal_cmd in terminals:
                 try:
                     subprocess.Popen(terminal_cmd, cwd=exe_dir)
-                    self.debug_text.insert(tk.END, f"🚀 GDB launched in {terminal_cmd[0]}\n")
+                    self.debug_renderer.write(f"🚀 GDB launched in {terminal_cmd[0]}\n")
                     launched = True
                     break
                 except FileNotFoundError:
                     continue
             
             if not launched:
-                self.debug_text.insert(tk.END, "❌ No supported terminal found\n")
-                self.debug_text.insert(tk.END, f"💡 Manual command: cd {exe_dir} && gdb {exe_name}\n")
+                self.debug_renderer.write("❌ No supported terminal found\n")
+                self.debug_renderer.write(f"💡 Manual command: cd {exe_dir} && gdb {exe_name}\n")
         
         except Exception as e:
-            self.debug_text.insert(tk.END, f"❌ Failed to launch GDB: {e}\n")
-            self.debug_text.insert(tk.END, f"💡 Manual command: gdb {output_file}\n")
+            self.debug_renderer.write(f"❌ Failed to launch GDB: {e}\n")
+            self.debug_renderer.write(f"💡 Manual command: gdb {output_file}\n")
     
     def open_output_folder(self):
         """Open the output folder in file manager"""
@@ -1057,23 +1272,24 @@ class CompilerGUILinux:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open folder: {e}")
     
-    def append_output(self, text):
-        """Append text to output (called from main thread)"""
-        self.output_text.insert(tk.END, text)
-        self.output_text.see(tk.END)
+    def append_output(self, text, tag=None):
+        """Append text to output; rendered with the next frame"""
+        self.output_renderer.write(text, tag)
     
     def append_runtime_output(self, text):
-        """Append text to runtime output"""
-        if hasattr(self, 'runtime_text'):
-            self.runtime_text.insert(tk.END, text)
-            self.runtime_text.see(tk.END)
+        """Append text to runtime output; rendered with the next frame"""
+        if hasattr(self, 'runtime_renderer'):
+            self.runtime_renderer.write(text)
     
     def clear_output(self):
         """Clear all outputs"""
+        self.output_renderer.clear()
         self.output_text.delete(1.0, tk.END)
         if hasattr(self, 'runtime_text'):
+            self.runtime_renderer.clear()
             self.runtime_text.delete(1.0, tk.END)
         if hasattr(self, 'debug_text'):
+            self.debug_renderer.clear()
             self.debug_text.delete(1.0, tk.END)
         if hasattr(self, 'error_summary'):
             self.error_summary.delete(1.0, tk.END)
@@ -1114,6 +1330,7 @@ def main():
     app.auto_run_var.trace('w', update_preview)
     app.verbose_var.trace('w', update_preview)
     app.pic_var.trace('w', update_preview)
+    app.time_report_var.trace('w', update_preview)
     
     root.mainloop()
 
@@ -5,6 +5,14 @@ import os
 import json
 import threading
 from pathlib import Path
+import sys
+
+# Shared output streaming lives in UI/Core/Python
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Core" / "Python"))
+from output_stream import run_streaming
+from output_renderer import OutputRenderer
+from ui_wakeup import Wakeup
+from diagnostics import DiagnosticParser, DiagnosticSet
 
 class CompilerGUI:
     def __init__(self, root):
@@ -175,6 +183,10 @@ class CompilerGUI:
         self.output_text = tk.Text(build_output_frame, height=8)
         build_scrollbar = ttk.Scrollbar(build_output_frame, orient="vertical", command=self.output_text.yview)
         self.output_text.configure(yscrollcommand=build_scrollbar.set)
+        # Compiler stderr is streamed into the same pane, tagged in red; output
+        # is coalesced into one insert per frame
+        self.output_renderer = OutputRenderer(self.root, self.output_text,
+                                              tags={"stderr": {"foreground": "#c00000"}})
         
         self.output_text.pack(side="left", fill="both", expand=True)
         build_scrollbar.pack(side="right", fill="y")
@@ -186,6 +198,8 @@ class CompilerGUI:
         self.runtime_text = tk.Text(runtime_output_frame, height=8)
         runtime_scrollbar = ttk.Scrollbar(runtime_output_frame, orient="vertical", command=self.runtime_text.yview)
         self.runtime_text.configure(yscrollcommand=runtime_scrollbar.set)
+        self.runtime_renderer = OutputRenderer(self.root, self.runtime_text,
+                                               tags={"stderr": {"foreground": "#c00000"}})
         
         self.runtime_text.pack(side="left", fill="both", expand=True)
         runtime_scrollbar.pack(side="right", fill="y")
@@ -197,6 +211,7 @@ class CompilerGUI:
         self.debug_text = tk.Text(debug_output_frame, height=8)
         debug_scrollbar = ttk.Scrollbar(debug_output_frame, orient="vertical", command=self.debug_text.yview)
         self.debug_text.configure(yscrollcommand=debug_scrollbar.set)
+        self.debug_renderer = OutputRenderer(self.root, self.debug_text)
         
         self.debug_text.pack(side="left", fill="both", expand=True)
         debug_scrollbar.pack(side="right", fill="y")
@@ -207,6 +222,10 @@ class CompilerGUI:
         
         self.error_summary = tk.Text(error_frame, height=3, bg="#fff2f2")
         self.error_summary.pack(fill="x", padx=5, pady=5)
+        # Diagnostics are parsed as output streams in; the summary is
+        # refreshed at most once per event loop wakeup
+        self.summary_wakeup = Wakeup(self.root, self.refresh_error_summary)
+        self.start_output_stream()
     
     def setup_config_tab(self):
         """Setup the configuration tab"""
@@ -593,8 +612,8 @@ class CompilerGUI:
             messagebox.showerror("Error", command)
             return
         
-        self.output_text.insert(tk.END, f"Executing: {command}\n\n")
-        self.output_text.see(tk.END)
+        self.append_output(f"Executing: {command}\n\n")
+        self.start_output_stream()
         
         # Run in separate thread to avoid freezing UI
         thread = threading.Thread(target=self.execute_build, args=(command,))
@@ -604,73 +623,81 @@ class CompilerGUI:
     def execute_build(self, command):
         """Execute build command in separate thread"""
         try:
-            process = subprocess.Popen(
-                command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                encoding="utf-8",
-                errors="replace"
-            )
-            
-            # Read output and errors
-            stdout, stderr = process.communicate()
+            # Output is shown and analyzed while the compiler runs; only a
+            # bounded head and tail of each stream is kept for the final analysis
+            returncode, stdout, stderr = run_streaming(command, self.stream_build_output, shell=True)
+            self.finish_output_stream()
             
-            # Display output
-            if stdout:
-                self.root.after(0, self.append_output, stdout)
             if stderr:
-                self.root.after(0, self.append_output, f"\n--- STDERR ---\n{stderr}")
-                self.root.after(0, self.analyze_errors, stderr)
+                self.root.after(0, self.analyze_errors)
             
-            if process.returncode == 0:
+            if returncode == 0:
                 self.root.after(0, self.append_output, "\n✅ Build completed successfully!\n")
             else:
-                self.root.after(0, self.append_output, f"\n❌ Build failed with return code {process.returncode}\n")
+                self.root.after(0, self.append_output, f"\n❌ Build failed with return code {returncode}\n")
                 
         except Exception as e:
             self.root.after(0, self.append_output, f"\n❌ Error executing command: {str(e)}\n")
     
-    def analyze_errors(self, error_text):
-        """Analyze and categorize build errors"""
+    def start_output_stream(self):
+        """Reset the live error summary before a build starts"""
+        self.diagnostics = DiagnosticSet()
+        # One parser per stream; repeated diagnostics are left out of the pane
+        self.diagnostic_parsers = {stream: DiagnosticParser(self.diagnostics)
+                                   for stream in ("stdout", "stderr")}
+        self.summary_version = 0
+        self.error_summary.delete(1.0, tk.END)
+    
+    def stream_build_output(self, stream, text):
+        """Forward a chunk of build output as it arrives (called from build threads)"""
+        text = self.diagnostic_parsers[stream].feed(text)
+        if text:
+            self.output_renderer.write(text, "stderr" if stream == "stderr" else None)
+        if self.diagnostics.version != self.summary_version:
+            self.summary_wakeup.notify()
+    
+    def finish_output_stream(self):
+        """Flush output the parsers still hold once the build has exited"""
+        for stream, parser in self.diagnostic_parsers.items():
+            text = parser.finish()
+            if text:
+                self.output_renderer.write(text, "stderr" if stream == "stderr" else None)
+    
+    def refresh_error_summary(self):
+        """Show the errors and warnings found so far"""
+        self.summary_version = self.diagnostics.version
+        self.show_error_summary(self.diagnostics.summary())
+    
+    def analyze_errors(self):
+        """Final error summary once the build has finished"""
         if not hasattr(self, 'error_summary'):
             return
-            
-        error_analysis = []
-        lines = error_text.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Common error patterns
-            if 'error:' in line.lower():
-                if 'no such file or directory' in line.lower():
-                    error_analysis.append("❌ Missing file/header - Check include paths")
-                elif 'undefined reference' in line.lower():
-                    error_analysis.append("❌ Linking error - Check library paths")
-                elif 'permission denied' in line.lower():
-                    error_analysis.append("❌ Permission denied - Check file permissions")
-                elif 'syntax error' in line.lower():
-                    error_analysis.append("❌ Syntax error in source code")
-                else:
-                    error_analysis.append(f"❌ {line}")
-            elif 'warning:' in line.lower():
-                error_analysis.append(f"⚠️ {line}")
-        
-        if error_analysis:
-            summary = "\n".join(error_analysis[:10])  # Show first 10 errors
-            if len(error_analysis) > 10:
-                summary += f"\n... and {len(error_analysis) - 10} more errors"
-        else:
-            summary = "No specific errors detected in output"
         
+        self.show_error_summary(self.diagnostics.summary())
+    
+    def show_error_summary(self, summary):
+        """Show (text, details) summary entries; clicking an entry shows its details"""
         self.error_summary.delete(1.0, tk.END)
-        self.error_summary.insert(1.0, summary)
+        if not summary:
+            self.error_summary.insert(1.0, "No specific errors detected in output")
+            return
+        
+        for index, (text, details) in enumerate(summary):
+            if not details:
+                self.error_summary.insert(tk.END, f"{text}\n")
+                continue
+            # The first occurrence's notes, collapsed until the entry is clicked
+            entry, body = f"entry{index}", f"details{index}"
+            self.error_summary.insert(tk.END, f"▸ {text}\n", entry)
+            self.error_summary.insert(tk.END, "".join(f"      {line}\n" for line in details), body)
+            self.error_summary.tag_configure(body, elide=True)
+            self.error_summary.tag_bind(entry, "<Button-1>",
+                                        lambda event, tag=body: self.toggle_summary_details(tag))
+    
+    def toggle_summary_details(self, tag):
+        """Expand or collapse the details of one summary entry"""
+        hidden = str(self.error_summary.tag_cget(tag, "elide")) in ("1", "true", "True")
+        self.error_summary.tag_configure(tag, elide=not hidden)
     
     def run_executable(self):
         """Run the compiled executable"""
@@ -693,9 +720,8 @@ class CompilerGUI:
                 messagebox.showerror("Error", "Not an executable file")
                 return
         
-        self.runtime_text.insert(tk.END, f"🚀 Running: {output_file}\n")
-        self.runtime_text.insert(tk.END, "=" * 50 + "\n")
-        self.runtime_text.see(tk.END)
+        self.append_runtime_output(f"🚀 Running: {output_file}\n")
+        self.append_runtime_output("=" * 50 + "\n")
         
         # Run in separate thread
         thread = threading.Thread(target=self.execute_runtime, args=(output_file,))
@@ -707,41 +733,20 @@ class CompilerGUI:
         try:
             # Change to executable directory
             exe_dir = os.path.dirname(executable_path)
-            exe_name = os.path.basename(executable_path)
             exe_full_path = os.path.abspath(executable_path)
             
-            process = subprocess.Popen(
-                exe_full_path,
-                cwd=exe_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                encoding="utf-8",
-                errors="replace",
-            )
-            
-            # Read output in real-time
-            while True:
-                output = process.stdout.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    self.root.after(0, self.append_runtime_output, output)
-            
-            # Get any remaining output
-            stdout, stderr = process.communicate()
-            if stdout:
-                self.root.after(0, self.append_runtime_output, stdout)
-            if stderr:
-                self.root.after(0, self.append_runtime_output, f"\n--- Runtime Errors ---\n{stderr}")
+            # Output goes straight to the renderer, one insert per frame
+            returncode, _, _ = run_streaming([exe_full_path], self.stream_runtime_output, cwd=exe_dir)
             
-            self.root.after(0, self.append_runtime_output, f"\n🏁 Program finished with exit code: {process.returncode}\n")
+            self.append_runtime_output(f"\n🏁 Program finished with exit code: {returncode}\n")
             
         except Exception as e:
             self.root.after(0, self.append_runtime_output, f"\n❌ Runtime error: {str(e)}\n")
     
+    def stream_runtime_output(self, stream, text):
+        """Forward program output to the runtime pane (called from the runner thread)"""
+        self.runtime_renderer.write(text, "stderr" if stream == "stderr" else None)
+    
     def run_java_class(self):
         """Run Java class file"""
         input_file = self.input_file_var.get()
@@ -755,9 +760,8 @@ class CompilerGUI:
         
         command = f'cd "{class_dir}" && "{java_path}" {class_name}'
         
-        self.runtime_text.insert(tk.END, f"🚀 Running Java: {command}\n")
-        self.runtime_text.insert(tk.END, "=" * 50 + "\n")
-        self.runtime_text.see(tk.END)
+        self.append_runtime_output(f"🚀 Running Java: {command}\n")
+        self.append_runtime_output("=" * 50 + "\n")
         
         thread = threading.Thread(target=self.execute_java_runtime, args=(command,))
         thread.daemon = True
@@ -820,16 +824,15 @@ class CompilerGUI:
             messagebox.showerror("Error", "Debug not supported for this compiler")
             return
         
-        self.debug_text.insert(tk.END, f"🐛 Starting debugger: {debug_command}\n")
-        self.debug_text.insert(tk.END, "💡 Basic GDB commands:\n")
-        self.debug_text.insert(tk.END, "  - run: Start the program\n")
-        self.debug_text.insert(tk.END, "  - break main: Set breakpoint at main\n")
-        self.debug_text.insert(tk.END, "  - step: Step through code\n")
-        self.debug_text.insert(tk.END, "  - continue: Continue execution\n")
-        self.debug_text.insert(tk.END, "  - backtrace: Show call stack\n")
-        self.debug_text.insert(tk.END, "  - quit: Exit debugger\n")
-        self.debug_text.insert(tk.END, "=" * 50 + "\n")
-        self.debug_text.see(tk.END)
+        self.debug_renderer.write(f"🐛 Starting debugger: {debug_command}\n")
+        self.debug_renderer.write("💡 Basic GDB commands:\n")
+        self.debug_renderer.write("  - run: Start the program\n")
+        self.debug_renderer.write("  - break main: Set breakpoint at main\n")
+        self.debug_renderer.write("  - step: Step through code\n")
+        self.debug_renderer.write("  - continue: Continue execution\n")
+        self.debug_renderer.write("  - backtrace: Show call stack\n")
+        self.debug_renderer.write("  - quit: Exit debugger\n")
+        self.debug_renderer.write("=" * 50 + "\n")
         
         # Try to launch debugger in external terminal
         try:
@@ -837,14 +840,14 @@ class CompilerGUI:
                 # Try to launch in new command prompt
                 debug_cmd = f'start cmd /k "cd /d {os.path.dirname(output_file)} && {debug_command}"'
                 subprocess.Popen(debug_cmd, shell=True)
-                self.debug_text.insert(tk.END, "🚀 Debugger launched in new terminal window\n")
+                self.debug_renderer.write("🚀 Debugger launched in new terminal window\n")
             else:  # Linux/Mac
                 debug_cmd = f'gnome-terminal -- bash -c "cd {os.path.dirname(output_file)} && {debug_command}; exec bash"'
                 subprocess.Popen(debug_cmd, shell=True)
-                self.debug_text.insert(tk.END, "🚀 Debugger launched in new terminal window\n")
+                self.debug_renderer.write("🚀 Debugger launched in new terminal window\n")
         except Exception as e:
-            self.debug_text.insert(tk.END, f"❌ Failed to launch debugger: {e}\n")
-            self.debug_text.insert(tk.END, f"💡 Manual command: {debug_command}\n")
+            self.debug_renderer.write(f"❌ Failed to launch debugger: {e}\n")
+            self.debug_renderer.write(f"💡 Manual command: {debug_command}\n")
     
     def open_output_folder(self):
         """Open the output folder in file explorer"""
@@ -867,22 +870,23 @@ class CompilerGUI:
             messagebox.showerror("Error", f"Failed to open folder: {e}")
     
     def append_runtime_output(self, text):
-        """Append text to runtime output"""
-        if hasattr(self, 'runtime_text'):
-            self.runtime_text.insert(tk.END, text)
-            self.runtime_text.see(tk.END)
+        """Append text to runtime output; rendered with the next frame"""
+        if hasattr(self, 'runtime_renderer'):
+            self.runtime_renderer.write(text)
     
-    def append_output(self, text):
-        """Append text to output (called from main thread)"""
-        self.output_text.insert(tk.END, text)
-        self.output_text.see(tk.END)
+    def append_output(self, text, tag=None):
+        """Append text to output; rendered with the next frame"""
+        self.output_renderer.write(text, tag)
     
     def clear_output(self):
         """Clear all outputs"""
+        self.output_renderer.clear()
         self.output_text.delete(1.0, tk.END)
         if hasattr(self, 'runtime_text'):
+            self.runtime_renderer.clear()
             self.runtime_text.delete(1.0, tk.END)
         if hasattr(self, 'debug_text'):
+            self.debug_renderer.clear()
             self.debug_text.delete(1.0, tk.END)
         if hasattr(self, 'error_summary'):
             self.error_summary.delete(1.0, tk.END)
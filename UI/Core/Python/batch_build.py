@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Parallel batch builds for the build engine
+Compiles many sources concurrently in a bounded worker pool sized by parallel_jobs,
+longest predicted jobs first, with a progress fraction and ETA while they run
+"""
+
+import os
+import glob
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from build_estimate import ProgressTracker, longest_first
+from build_trace import span
+
+SOURCE_EXTENSIONS = (".cpp", ".cxx", ".cc", ".c++", ".c")
+
+
+def expand_sources(patterns, root="."):
+    """Expand file names, directories and glob patterns into a sorted source list"""
+    sources = []
+    seen = set()
+    for pattern in patterns:
+        full_pattern = pattern if os.path.isabs(pattern) else os.path.join(root, pattern)
+        if os.path.isdir(full_pattern):
+            matches = [str(p) for p in Path(full_pattern).rglob("*")
+                       if p.suffix.lower() in SOURCE_EXTENSIONS]
+        else:
+            matches = glob.glob(full_pattern, recursive=True)
+        for match in sorted(matches):
+            path = os.path.normpath(match)
+            if os.path.isfile(path) and path not in seen:
+                seen.add(path)
+                sources.append(path)
+    return sources
+
+
+def default_jobs(config):
+    """Worker count from build.parallel_jobs / parallel_jobs, falling back to CPU count"""
+    jobs = config.get("parallel_jobs")
+    if jobs is None and isinstance(config.get("build"), dict):
+        jobs = config["build"].get("parallel_jobs")
+    return max(1, int(jobs or os.cpu_count() or 4))
+
+
+def engine_build_func(engine, options, history=None):
+    """Return a batch job that builds one source with the build engine
+
+    Each build is recorded in history (a BuildHistory) when given.
+    """
+    def build_one(source):
+        output_file = engine.default_output_file(options, source)
+        steps = engine.generate_steps(options, source, output_file)
+        result = engine.execute(steps)
+        if history is not None:
+            history.record(result, steps, [source], output_file, options.compiler,
+                           engine.compiler_version(steps[0].argv[0]), options.to_dict(), origin="batch")
+        data = result.to_dict()
+        data["output"] = output_file
+        return data
+    return build_one
+
+
+class BatchBuilder:
+    """Run build jobs concurrently and stream their results"""
+
+    def __init__(self, jobs=None):
+        self.jobs = max(1, int(jobs or os.cpu_count() or 4))
+        self.cancelled = threading.Event()
+        # ProgressTracker of the running batch when it was given estimates
+        self.progress = None
+
+    def cancel(self):
+        """Skip every job that has not started yet"""
+        self.cancelled.set()
+
+    def run(self, sources, build_func, on_result=None, estimates=None):
+        """Build all sources and return a summary
+
+        build_func(source) must return a dict with at least "success".
+        on_result(job) is called from worker threads as each job finishes.
+        estimates maps sources to predicted seconds: jobs then start longest
+        first and self.progress reports the fraction done and the ETA.
+        """
+        self.cancelled.clear()
+        start = time.perf_counter()
+        results = []
+        self.progress = None
+        predicted = None
+        if estimates:
+            sources = longest_first(sources, lambda source: estimates.get(source, 0.0))
+            self.progress = ProgressTracker({source: estimates.get(source, 0.0) for source in sources},
+                                            self.jobs)
+            predicted = self.progress.eta()
+        progress = self.progress
+
+        def run_job(source):
+            if self.cancelled.is_set():
+                if progress is not None:
+                    progress.discard(source)
+                return {"source": source, "success": False, "skipped": True, "duration": 0.0}
+            if progress is not None:
+                progress.started(source)
+            job_start = time.perf_counter()
+            try:
+                with span(os.path.basename(str(source)), "batch", source=str(source)):
+                    job = build_func(source)
+            except Exception as e:
+                job = {"success": False, "error": str(e)}
+            job["source"] = source
+            job.setdefault("duration", round(time.perf_counter() - job_start, 4))
+            if progress is not None:
+                progress.finished(source, job["duration"])
+                job["estimate"] = round(progress.estimates.get(source, 0.0), 4)
+            return job
+
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="batch") as executor:
+            futures = [executor.submit(run_job, source) for source in sources]
+            for future in as_completed(futures):
+                job = future.result()
+                results.append(job)
+                if on_result:
+                    on_result(job)
+
+        return self.summarize(results, time.perf_counter() - start, predicted)
+
+    def summarize(self, results, wall_time, predicted=None):
+        """Aggregate job results into a batch summary"""
+        cpu_time = sum(job.get("duration", 0.0) for job in results)
+        succeeded = [job for job in results if job.get("success")]
+        skipped = [job for job in results if job.get("skipped")]
+        failed = [job["source"] for job in results
+                  if not job.get("success") and not job.get("skipped")]
+        summary = {
+            "jobs": self.jobs,
+            "total": len(results),
+            "succeeded": len(succeeded),
+            "failed": len(failed),
+            "skipped": len(skipped),
+            "failed_sources": sorted(failed),
+            "wall_time": round(wall_time, 4),
+            "job_time": round(cpu_time, 4),
+            "speedup": round(cpu_time / wall_time, 2) if wall_time > 0 else None
+        }
+        if predicted is not None:
+            summary["predicted_wall_time"] = round(predicted, 4)
+        return summary
@@ -0,0 +1,1006 @@
+#!/usr/bin/env python3
+"""
+Crypto++ Build Engine
+GUI-free command generation and execution shared by the Linux GUIs and the crypto-build CLI
+"""
+
+import os
+import json
+import shlex
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from compile_cache import CompileCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE_MB, output_path_of
+from pch_manager import PchManager, DEFAULT_PCH_DIR
+from dep_tracker import DependencyTracker
+from ninja_export import NinjaExecutor, step_output
+from symbol_index import DEFAULT_INDEX_FILE
+from output_stream import run_streaming, BoundedCapture, DEFAULT_CAPTURE_CHARS
+from diagnostics import DiagnosticParser, DiagnosticSet, diagnostics_flags
+from toolchain_probe import ProbeCache
+from compile_timing import TimingReport, timing_flags, read_step_timing
+from build_history import DEFAULT_HISTORY_FILE
+from build_estimate import DurationModel, longest_first
+from build_trace import span, traced, trace_from_config
+
+DEFAULT_CONFIG = {
+    "gcc_path": "/usr/bin/g++",
+    "clang_path": "/usr/bin/clang++",
+    "msvc_path": "",  # Not available on Linux
+    "csc_path": "/usr/bin/mcs",  # Mono C# compiler
+    "dotnet_path": "/usr/bin/dotnet",  # .NET Core
+    "javac_path": "/usr/bin/javac",
+    "java_path": "/usr/bin/java",
+    "cryptopp_include": "/usr/include/cryptopp",
+    "cryptopp_lib_gcc": "/usr/lib/x86_64-linux-gnu",
+    "cryptopp_lib_clang": "/usr/lib/x86_64-linux-gnu",
+    "cryptopp_lib_msvc": "",
+    "openssl_include_gcc": "/usr/include/openssl",
+    "openssl_lib_gcc": "/usr/lib/x86_64-linux-gnu",
+    "openssl_include_clang": "/usr/include/openssl",
+    "openssl_lib_clang": "/usr/lib/x86_64-linux-gnu",
+    "openssl_include_msvc": "",
+    "openssl_lib_msvc": "",
+    "jdk_include": "/usr/lib/jvm/default-java/include",
+    "jdk_include_linux": "/usr/lib/jvm/default-java/include/linux",
+    "compile_cache_enabled": True,
+    "compile_cache_dir": DEFAULT_CACHE_DIR,
+    "compile_cache_max_mb": DEFAULT_MAX_SIZE_MB,
+    "parallel_jobs": os.cpu_count() or 4,
+    "pch_enabled": True,
+    "pch_dir": DEFAULT_PCH_DIR,
+    "incremental_enabled": True,
+    # Hand compile/link/archive steps to ninja when it is installed
+    "ninja_enabled": False,
+    "ninja_path": "ninja",
+    # Header/symbol index used to suggest -I/-L/-l flags for failed builds
+    "symbol_index_enabled": True,
+    "symbol_index_file": DEFAULT_INDEX_FILE,
+    # Per-stream cap on the compiler output kept in memory (head and tail)
+    "output_capture_kb": DEFAULT_CAPTURE_CHARS // 1024,
+    # Compiler diagnostics format: "text" (parsed while it streams), or "auto" (GCC JSON/SARIF),
+    # "json" or "sarif", which GCC only writes when it exits - for CI logs, not interactive builds
+    "diagnostics_format": "text",
+    # SQLite log of GUI/CLI builds for trend and regression reports
+    "build_history_enabled": True,
+    "build_history_file": DEFAULT_HISTORY_FILE,
+    # Chrome trace (chrome://tracing, Perfetto) of every build step; "" turns tracing off
+    "trace_file": "",
+    # Runtime benchmarks: measured runs, unmeasured warmup runs and a per-run limit in seconds (0 = none)
+    "benchmark_runs": 10,
+    "benchmark_warmup": 2,
+    "benchmark_timeout": 0,
+    # CPUs benchmark runs are pinned to: "auto" (the last CPU), "" (no pinning), "2,3" or "2-3"
+    "benchmark_cpus": "auto",
+    # Nice value of benchmark runs; values below the current one need root or CAP_SYS_NICE
+    "benchmark_nice": -5,
+    # CPU profiles: "auto" tries perf record, then valgrind --tool=callgrind
+    "profile_tool": "auto",
+    "perf_path": "perf",
+    "valgrind_path": "valgrind",
+    # perf sampling rate (Hz) and stack unwinding ("dwarf" works without frame pointers, "fp" is cheaper)
+    "profile_frequency": 999,
+    "profile_call_graph": "dwarf",
+    # Rows of the hot-function table
+    "profile_top": 20,
+    # Relative increase of cachegrind instruction/cache-miss counts reported as a regression
+    "instruction_regression_threshold": 0.02
+}
+
+LANGUAGES = ["C++", "C#", "Java", "JNI"]
+COMPILERS = ["GCC", "Clang", "Mono", ".NET Core", "OpenJDK"]
+BUILD_TYPES = ["Executable", "Shared Library", "Static Library"]
+LIBRARIES = ["None", "CryptoPP", "OpenSSL", "Both"]
+
+# Steps whose output can be checked against their inputs
+TRACKED_STEP_KINDS = ("compile", "link", "archive")
+
+# Separator for several sources typed into a single input field
+SOURCE_SEPARATOR = ";"
+
+
+class BuildError(Exception):
+    """Raised when a build cannot be planned from the current configuration"""
+
+
+@traced("load config", "config")
+def load_config(config_file="compiler_config_linux.json"):
+    """Load configuration from file merged over the Linux defaults"""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config.update(json.load(f))
+    except Exception as e:
+        print(f"Error loading config: {e}")
+    return config
+
+
+def save_config(config, config_file="compiler_config_linux.json"):
+    """Save configuration to file"""
+    with open(config_file, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+
+
+def split_sources(input_file):
+    """Return the list of sources named by an input field, path or list"""
+    if isinstance(input_file, (list, tuple)):
+        return [str(source) for source in input_file if str(source).strip()]
+    return [source.strip() for source in str(input_file).split(SOURCE_SEPARATOR) if source.strip()]
+
+
+def step_label(step):
+    """Short name of a step for traces: its kind and output file or program"""
+    target = step_output(step) if step.kind in TRACKED_STEP_KINDS else step.argv[0]
+    return f"{step.kind} {os.path.basename(target or '')}".strip()
+
+
+def object_files(sources, output_file):
+    """Map each source to its object under <output dir>/obj/<output name>/"""
+    output_path = Path(output_file)
+    object_dir = output_path.parent / "obj" / output_path.name
+    objects = []
+    used = set()
+    for source in sources:
+        stem = Path(source).stem
+        name = f"{stem}.o"
+        index = 1
+        # Same file name in different directories
+        while name in used:
+            index += 1
+            name = f"{stem}_{index}.o"
+        used.add(name)
+        objects.append(str(object_dir / name))
+    object_dir.mkdir(parents=True, exist_ok=True)
+    return objects
+
+
+class BuildOptions:
+    """Build settings mirroring the options of the Complex GUI"""
+
+    def __init__(self, language="C++", compiler="GCC", build_type="Executable",
+                 library="None", debug=True, optimize=True, verbose=False,
+                 pic=False, auto_run=False, opt_level=None, time_report=False):
+        self.language = language
+        self.compiler = compiler
+        self.build_type = build_type
+        self.library = library
+        self.debug = debug
+        self.optimize = optimize
+        self.verbose = verbose
+        self.pic = pic
+        self.auto_run = auto_run
+        # Explicit level such as "O2" overrides the optimize on/off switch
+        self.opt_level = opt_level
+        # Collect per-phase compile timing (-ftime-report / -ftime-trace)
+        self.time_report = time_report
+
+    def optimization_flags(self):
+        """Return optimization flags for this build"""
+        if self.opt_level:
+            return [f"-{self.opt_level}", "-DDEBUG" if self.opt_level == "O0" else "-DNDEBUG"]
+        if self.optimize:
+            return ["-O3", "-DNDEBUG"]
+        return ["-O0", "-DDEBUG"]
+
+    def copy(self, **changes):
+        """Return a copy with some options changed"""
+        options = BuildOptions(**self.to_dict())
+        for key, value in changes.items():
+            setattr(options, key, value)
+        return options
+
+    def to_dict(self):
+        """Return options as a plain dictionary"""
+        return dict(self.__dict__)
+
+
+class BuildStep:
+    """One process invocation of a build: compile, link, archive or run"""
+
+    def __init__(self, argv, kind="compile", cwd=None):
+        self.argv = [str(arg) for arg in argv]
+        self.kind = kind
+        self.cwd = str(cwd) if cwd else None
+        # PchSpec the step depends on, set by PchManager.attach
+        self.pch = None
+        # {"format", "file", "unit", "links"} when the step reports its phase timing
+        self.timing = None
+        # {"max_rss_kb", "user", "sys"} of the last run, where the platform reports it
+        self.usage = None
+
+    def command_line(self):
+        """Render the step as a shell command"""
+        command = shlex.join(self.argv)
+        if self.cwd:
+            command = f"cd {shlex.quote(self.cwd)} && {command}"
+        return command
+
+
+class BuildResult:
+    """Outcome of executing a list of build steps"""
+
+    def __init__(self):
+        self.success = False
+        self.returncode = None
+        self.stdout = ""
+        self.stderr = ""
+        self.duration = 0.0
+        self.steps = []
+        self.error = None
+        self.cache = {"hits": 0, "misses": 0}
+        self.up_to_date = False
+        # TimingReport when the build ran with time_report
+        self.timing = None
+        # Distinct errors and warnings of compile/link/archive steps, with repeat counts
+        self.diagnostics = []
+
+    def to_dict(self):
+        """Return a JSON-serialisable summary"""
+        return {
+            "success": self.success,
+            "returncode": self.returncode,
+            "duration": round(self.duration, 4),
+            "stdout": self.stdout,
+            "stderr": self.stderr,
+            "error": self.error,
+            "up_to_date": self.up_to_date,
+            "cache": self.cache,
+            "steps": self.steps,
+            "diagnostics": self.diagnostics,
+            "max_rss_kb": self.max_rss_kb(),
+            "timing": self.timing.to_dict() if self.timing else None
+        }
+
+    def max_rss_kb(self):
+        """Peak resident memory of the hungriest step in KiB, None where unknown"""
+        return max((record["max_rss_kb"] for record in self.steps if "max_rss_kb" in record),
+                   default=None)
+
+    def up_to_date_message(self, output_file):
+        """Clear message for a build that had nothing to do"""
+        return f"✅ {output_file} is up to date - nothing to rebuild"
+
+    def cache_summary(self):
+        """One-line compile cache report for build output"""
+        return f"📦 Compile cache: {self.cache['hits']} hit(s), {self.cache['misses']} miss(es)"
+
+
+class BuildEngine:
+    """Generate and execute build commands without any GUI dependency"""
+
+    def __init__(self, config=None, use_cache=True, use_pch=True, incremental=True, use_ninja=True):
+        self.config = config if config is not None else load_config()
+        self.cache = CompileCache.from_config(self.config) if use_cache else None
+        self.pch = PchManager.from_config(self.config) if use_pch else None
+        self.deps = DependencyTracker.from_config(self.config) if incremental else None
+        self.ninja = NinjaExecutor.from_config(self.config) if use_ninja else None
+        self.compiler_versions = {}
+        # One probe cache per engine, so its lock covers every save
+        self.probes = ProbeCache()
+        # Relative unit costs used to start the longest compiles first
+        self.durations = DurationModel()
+        trace_from_config(self.config)
+
+    @traced("generate steps", "plan")
+    def generate_steps(self, options, input_file, output_file):
+        """Generate build steps based on the given options"""
+        if not input_file or not output_file:
+            raise BuildError("Please select input and output files")
+
+        language = options.language
+        sources = split_sources(input_file)
+        if not sources:
+            raise BuildError("Please select input and output files")
+        if len(sources) > 1 and language != "C++":
+            raise BuildError(f"{language} builds take a single input file")
+        input_file = sources[0]
+
+        if language == "C++" and (len(sources) > 1 or options.build_type == "Static Library"):
+            # Per-object compiles followed by one link or ar step
+            steps = self.generate_target_steps(options, sources, output_file)
+        elif language == "C++":
+            steps = self.generate_cpp_steps(options, input_file, output_file)
+        elif language == "C#":
+            steps = self.generate_csharp_steps(options, input_file, output_file)
+        elif language == "Java":
+            steps = self.generate_java_steps(options, input_file, output_file)
+        elif language == "JNI":
+            steps = self.generate_jni_steps(options, input_file, output_file)
+        else:
+            raise BuildError("Unsupported language")
+
+        # Dependency files for incremental up-to-date checks
+        if self.deps is not None:
+            for step in steps:
+                self.deps.attach(step)
+        return steps
+
+    def generate_command(self, options, input_file, output_file):
+        """Generate the build as a single shell command line"""
+        steps = self.generate_steps(options, input_file, output_file)
+        return self.format_command(steps)
+
+    def format_command(self, steps):
+        """Join build steps the way a shell would chain them"""
+        return " && ".join(step.command_line() for step in steps)
+
+    def compiler_version(self, compiler_path):
+        """First line of `compiler --version`, from the probe cache; None if unknown"""
+        if compiler_path not in self.compiler_versions:
+            try:
+                self.compiler_versions[compiler_path] = self.probes.tool(compiler_path)["version"]
+                self.probes.save()
+            except Exception:
+                self.compiler_versions[compiler_path] = None
+        return self.compiler_versions[compiler_path]
+
+    def diagnostic_flags(self, compiler_path):
+        """Flags for machine-readable diagnostics supported by this compiler"""
+        fmt = self.config.get("diagnostics_format", "text")
+        if fmt == "text":
+            return []
+        return diagnostics_flags(self.compiler_version(compiler_path), fmt)
+
+    def attach_timing(self, step, options, source, output_file, links=False):
+        """Make a compile step report its phase timing when options.time_report is set"""
+        if not options.time_report:
+            return
+        trace_file = f"{output_file}.time-trace.json"
+        flags = timing_flags(self.compiler_version(step.argv[0]), trace_file)
+        if not flags:
+            return
+        step.argv[1:1] = flags
+        step.timing = {
+            "format": "trace" if flags[0].startswith("-ftime-trace") else "report",
+            "file": trace_file,
+            "unit": str(source),
+            "links": links
+        }
+
+    def compiler_path(self, compiler):
+        """Resolve configured compiler executable"""
+        compiler_path = self.config.get(f"{compiler.lower()}_path", "")
+        if not compiler_path:
+            raise BuildError(f"Please configure {compiler} compiler path")
+        return compiler_path
+
+    def generate_cpp_steps(self, options, input_file, output_file):
+        """Generate C++ build steps for Linux"""
+        compiler = options.compiler
+        build_type = options.build_type
+        library = options.library
+
+        cmd_parts = [self.compiler_path(compiler)]
+
+        # Debug flags
+        if options.debug:
+            cmd_parts.extend(["-g", "-ggdb"])
+
+        # Optimization flags
+        cmd_parts.extend(options.optimization_flags())
+
+        # Verbose flag
+        if options.verbose:
+            cmd_parts.append("-v")
+
+        # Position Independent Code
+        if options.pic or build_type == "Shared Library":
+            cmd_parts.append("-fPIC")
+
+        if build_type == "Shared Library":
+            cmd_parts.append("-shared")
+
+        # Standard flags
+        cmd_parts.extend(["-std=c++17", "-Wall", "-Wextra"])
+        cmd_parts.extend(self.diagnostic_flags(cmd_parts[0]))
+
+        # Input and output
+        cmd_parts.extend([str(input_file), "-o", str(output_file)])
+
+        # Library-specific flags
+        if library == "CryptoPP":
+            self.add_cryptopp_flags(cmd_parts, compiler)
+        elif library == "OpenSSL":
+            self.add_openssl_flags(cmd_parts, compiler)
+        elif library == "Both":
+            self.add_cryptopp_flags(cmd_parts, compiler)
+            self.add_openssl_flags(cmd_parts, compiler)
+
+        # Threading
+        cmd_parts.append("-lpthread")
+
+        steps = [BuildStep(cmd_parts, "compile")]
+
+        # Precompiled Crypto++/OpenSSL headers
+        self.attach_pch(steps[0], options)
+        self.attach_timing(steps[0], options, input_file, output_file, links=True)
+
+        # Add auto-run if enabled
+        if options.auto_run and build_type == "Executable":
+            steps.append(BuildStep([output_file], "run"))
+
+        return steps
+
+    def attach_pch(self, step, options):
+        """Use the precompiled Crypto++/OpenSSL header for a compile step"""
+        if self.pch is None or options.library == "None":
+            return
+        libraries = ["CryptoPP", "OpenSSL"] if options.library == "Both" else [options.library]
+        self.pch.attach(step, options.compiler, libraries)
+
+    def library_flags(self, options):
+        """Return (compile flags, link flags) for the selected libraries"""
+        flags = []
+        if options.library in ("CryptoPP", "Both"):
+            self.add_cryptopp_flags(flags, options.compiler)
+        if options.library in ("OpenSSL", "Both"):
+            self.add_openssl_flags(flags, options.compiler)
+        compile_flags = [flag for flag in flags if flag.startswith("-I")]
+        link_flags = [flag for flag in flags if not flag.startswith("-I")]
+        return compile_flags, link_flags
+
+    def generate_target_steps(self, options, sources, output_file):
+        """Generate per-source compile steps followed by one link or ar step"""
+        if not sources:
+            raise BuildError("Please select input and output files")
+
+        compiler = options.compiler
+        build_type = options.build_type
+        compiler_path = self.compiler_path(compiler)
+        compile_flags, link_flags = self.library_flags(options)
+
+        base = [compiler_path, "-c"]
+        if options.debug:
+            base.extend(["-g", "-ggdb"])
+        base.extend(options.optimization_flags())
+        if options.verbose:
+            base.append("-v")
+        if options.pic or build_type != "Executable":
+            base.append("-fPIC")
+        base.extend(["-std=c++17", "-Wall", "-Wextra"])
+        base.extend(self.diagnostic_flags(compiler_path))
+        base.extend(compile_flags)
+
+        objects = object_files(sources, output_file)
+
+        steps = []
+        for source, obj_file in zip(sources, objects):
+            step = BuildStep(base + [str(source), "-o", obj_file], "compile")
+            self.attach_pch(step, options)
+            self.attach_timing(step, options, source, obj_file)
+            steps.append(step)
+
+        if build_type == "Static Library":
+            steps.append(BuildStep(["ar", "rcs", str(output_file)] + objects, "archive"))
+            return steps
+
+        link_cmd = [compiler_path]
+        if build_type == "Shared Library":
+            link_cmd.append("-shared")
+        link_cmd.extend(objects + ["-o", str(output_file)])
+        link_cmd.extend(link_flags)
+        link_cmd.append("-lpthread")
+        steps.append(BuildStep(link_cmd, "link"))
+
+        if options.auto_run and build_type == "Executable":
+            steps.append(BuildStep([output_file], "run"))
+        return steps
+
+    def add_cryptopp_flags(self, cmd_parts, compiler):
+        """Add CryptoPP library flags for Linux"""
+        include_dir = self.config.get("cryptopp_include", "")
+        lib_dir = self.config.get(f"cryptopp_lib_{compiler.lower()}", "")
+
+        if include_dir:
+            cmd_parts.append(f"-I{include_dir}")
+
+        if lib_dir:
+            cmd_parts.append(f"-L{lib_dir}")
+
+        # Standard CryptoPP library name on Linux
+        cmd_parts.append("-lcryptopp")
+
+    def add_openssl_flags(self, cmd_parts, compiler):
+        """Add OpenSSL library flags for Linux"""
+        include_dir = self.config.get(f"openssl_include_{compiler.lower()}", "")
+        lib_dir = self.config.get(f"openssl_lib_{compiler.lower()}", "")
+
+        if include_dir:
+            cmd_parts.append(f"-I{include_dir}")
+
+        if lib_dir:
+            cmd_parts.append(f"-L{lib_dir}")
+
+        # Standard OpenSSL libraries on Linux
+        cmd_parts.extend(["-lssl", "-lcrypto"])
+
+    def generate_csharp_steps(self, options, input_file, output_file):
+        """Generate C# build steps for Linux"""
+        if options.compiler != "Mono":
+            # For dotnet, we need a project file, this is simplified
+            dotnet_path = self.config.get("dotnet_path", "dotnet")
+            return [BuildStep([dotnet_path, "build"], "compile")]
+
+        cmd_parts = [self.config.get("csc_path", "mcs")]
+
+        if options.debug:
+            cmd_parts.append("-debug")
+        if options.optimize:
+            cmd_parts.append("-optimize+")
+
+        cmd_parts.extend([str(input_file), f"-out:{output_file}"])
+
+        steps = [BuildStep(cmd_parts, "compile")]
+        if options.auto_run:
+            steps.append(BuildStep(["mono", output_file], "run"))
+        return steps
+
+    def generate_java_steps(self, options, input_file, output_file):
+        """Generate Java build steps"""
+        javac_path = self.config.get("javac_path", "javac")
+        steps = [BuildStep([javac_path, input_file], "compile")]
+
+        if options.auto_run:
+            java_path = self.config.get("java_path", "java")
+            class_name = Path(input_file).stem
+            input_dir = Path(input_file).parent
+            steps.append(BuildStep([java_path, class_name], "run", cwd=input_dir))
+
+        return steps
+
+    def generate_jni_steps(self, options, input_file, output_file):
+        """Generate JNI build steps for Linux"""
+        compiler_path = self.config.get(f"{options.compiler.lower()}_path", "")
+        jdk_include = self.config.get("jdk_include", "")
+        jdk_linux_include = self.config.get("jdk_include_linux", "")
+
+        if not all([compiler_path, jdk_include, jdk_linux_include]):
+            raise BuildError("Please configure JDK paths for JNI")
+
+        cmd_parts = [compiler_path, "-shared", "-fPIC"]
+
+        if options.debug:
+            cmd_parts.extend(["-g", "-ggdb"])
+        if options.optimize:
+            cmd_parts.append("-O3")
+
+        cmd_parts.extend([f"-I{jdk_include}", f"-I{jdk_linux_include}"])
+        cmd_parts.extend([str(input_file), "-o", str(output_file)])
+
+        return [BuildStep(cmd_parts, "compile")]
+
+    def default_output_file(self, options, input_file):
+        """Derive output filename from the input, inside a per-compiler directory"""
+        input_path = Path(input_file)
+        compiler = options.compiler.lower()
+
+        # Create compiler-specific output directory
+        output_dir = input_path.parent / compiler
+        output_dir.mkdir(exist_ok=True)
+
+        if options.language == "C++":
+            if options.build_type == "Executable":
+                ext = ""  # No extension for Linux executables
+            elif options.build_type == "Shared Library":
+                ext = ".so"
+            else:  # Static Library
+                ext = ".a"
+            output_filename = f"{input_path.stem}_{compiler}{ext}"
+        elif options.language == "C#":
+            output_filename = f"{input_path.stem}.exe"
+        elif options.language == "Java":
+            output_filename = f"{input_path.stem}.class"
+        else:
+            output_filename = f"{input_path.stem}_{compiler}"
+
+        return str(output_dir / output_filename)
+
+    def capture_limit(self):
+        """Characters of output kept per stream"""
+        return int(self.config.get("output_capture_kb", DEFAULT_CAPTURE_CHARS // 1024)) * 1024
+
+    def run_step(self, step, on_output=None):
+        """Run a single build step, streaming its output to on_output(stream, text)"""
+        step.usage = {}
+        with span(os.path.basename(step.argv[0]), "process", argv=step.argv):
+            return run_streaming(step.argv, on_output, cwd=step.cwd,
+                                 max_capture=self.capture_limit(), usage=step.usage)
+
+    def run_compile_step(self, step, runner=None, on_output=None):
+        """Run a step, going through the compile cache for compile steps
+
+        runner() performs the real work and defaults to run_step(step).
+        Returns (returncode, stdout, stderr, cache outcome).
+        """
+        runner = runner or (lambda: self.run_step(step, on_output))
+        # A cached result would replay the timing of an old compile
+        if self.cache is None or step.kind != "compile" or step.timing is not None:
+            returncode, stdout, stderr = runner()
+            return returncode, stdout, stderr, "skip"
+        with span("compile cache", "cache"):
+            returncode, stdout, stderr, outcome = self.cache.run(step.argv, step.cwd, runner)
+        if outcome == "hit" and on_output is not None:
+            # Replay the warnings stored with the cached object
+            for stream, text in (("stdout", stdout), ("stderr", stderr)):
+                if text:
+                    on_output(stream, text)
+        return returncode, stdout, stderr, outcome
+
+    @traced(lambda self, step, *args, **kwargs: step_label(step), "step")
+    def execute_step(self, step, on_output=None, diagnostics=None):
+        """Run one step with PCH, up-to-date check and cache; return (record, stdout, stderr)
+
+        Diagnostics of compile/link/archive steps are collected in diagnostics,
+        a DiagnosticSet shared by the steps of one build.
+        """
+        step_start = time.perf_counter()
+        step.usage = None
+        pch_status = None
+        if step.pch is not None and self.pch is not None:
+            pch_status = self.pch.ensure(step.pch)
+
+        # Skip compile/link/archive steps whose output is still current
+        if self.deps is not None and step.kind in TRACKED_STEP_KINDS and step.timing is None:
+            fresh, reason = self.deps.check(step)
+            if fresh:
+                return {
+                    "kind": step.kind,
+                    "command": step.command_line(),
+                    "returncode": 0,
+                    "duration": round(time.perf_counter() - step_start, 4),
+                    "cache": "skip",
+                    "up_to_date": True
+                }, "", ""
+
+        if step.kind in TRACKED_STEP_KINDS:
+            returncode, stdout, stderr, outcome = self.run_parsed_step(step, on_output, diagnostics)
+        else:
+            returncode, stdout, stderr, outcome = self.run_compile_step(step, on_output=on_output)
+        if returncode == 0 and self.deps is not None:
+            self.deps.record(step)
+        record = {
+            "kind": step.kind,
+            "command": step.command_line(),
+            "returncode": returncode,
+            "duration": round(time.perf_counter() - step_start, 4),
+            "cache": outcome
+        }
+        if pch_status is not None:
+            record["pch"] = pch_status
+        if step.usage:
+            record["max_rss_kb"] = step.usage["max_rss_kb"]
+        if step.timing is not None:
+            timing = read_step_timing(step, stderr, record["duration"])
+            if timing is not None:
+                record["timing"] = timing
+        return record, stdout, stderr
+
+    def run_parsed_step(self, step, on_output=None, diagnostics=None):
+        """Run a compile/link/archive step, parsing its diagnostics as they stream
+
+        Callers get the output as displayed: JSON/SARIF turned into text and
+        repeated diagnostics left out. Returns run_compile_step's tuple.
+        """
+        if diagnostics is None:
+            diagnostics = DiagnosticSet()
+        parsers = {stream: DiagnosticParser(diagnostics) for stream in ("stdout", "stderr")}
+        shown = {stream: BoundedCapture(self.capture_limit()) for stream in ("stdout", "stderr")}
+
+        def forward(stream, text):
+            text = parsers[stream].feed(text)
+            if text:
+                shown[stream].append(text)
+                if on_output is not None:
+                    on_output(stream, text)
+
+        returncode, _, _, outcome = self.run_compile_step(step, on_output=forward)
+        for stream, parser in parsers.items():
+            text = parser.finish()
+            if text:
+                shown[stream].append(text)
+                if on_output is not None:
+                    on_output(stream, text)
+        return returncode, shown["stdout"].text(), shown["stderr"].text(), outcome
+
+    def step_groups(self, steps, jobs):
+        """Group consecutive compile steps so they can run side by side"""
+        groups = []
+        for step in steps:
+            if (jobs > 1 and step.kind == "compile" and groups
+                    and groups[-1][-1].kind == "compile"):
+                groups[-1].append(step)
+            else:
+                groups.append([step])
+        return groups
+
+    @traced("build")
+    def execute(self, steps, jobs=1, on_output=None, diagnostics=None):
+        """Execute build steps in order, stopping at the first failure
+
+        With jobs > 1, consecutive compile steps (the objects of a target)
+        run concurrently before the link or archive step. on_output(stream, text)
+        receives line-aligned output chunks as they arrive, from worker threads.
+        diagnostics is an optional DiagnosticSet to collect errors and warnings in.
+        """
+        if diagnostics is None:
+            diagnostics = DiagnosticSet()
+        # Timed compiles need their own stderr, which ninja merges
+        if (self.ninja is not None and self.ninja.supports(steps)
+                and not any(step.timing for step in steps)):
+            return self.execute_with_ninja(steps, jobs, on_output, diagnostics)
+
+        result = BuildResult()
+        start = time.perf_counter()
+        stdout_parts = []
+        stderr_parts = []
+
+        tracked = 0
+        skipped = 0
+
+        try:
+            for group in self.step_groups(steps, jobs or 1):
+                if len(group) == 1:
+                    outcomes = [self.execute_step(group[0], on_output, diagnostics)]
+                else:
+                    with ThreadPoolExecutor(max_workers=min(jobs, len(group)),
+                                            thread_name_prefix="compile") as executor:
+                        # Longest units first, so a big one never runs alone at the end
+                        futures = {step: executor.submit(self.execute_step, step, on_output, diagnostics)
+                                   for step in longest_first(group, self.durations.predict_step)}
+                        outcomes = [futures[step].result() for step in group]
+
+                failed = False
+                for record, stdout, stderr in outcomes:
+                    result.steps.append(record)
+                    stdout_parts.append(stdout)
+                    stderr_parts.append(stderr)
+                    if record["kind"] in TRACKED_STEP_KINDS and self.deps is not None:
+                        tracked += 1
+                        skipped += 1 if record.get("up_to_date") else 0
+                    if record["cache"] == "hit":
+                        result.cache["hits"] += 1
+                    elif record["cache"] == "miss":
+                        result.cache["misses"] += 1
+                    if record["returncode"] != 0 and not failed:
+                        failed = True
+                        result.returncode = record["returncode"]
+                if failed:
+                    break
+                result.returncode = outcomes[-1][0]["returncode"]
+            result.success = result.returncode == 0
+            result.up_to_date = tracked > 0 and skipped == tracked
+        except Exception as e:
+            result.error = str(e)
+        if self.cache is not None:
+            self.cache.flush()
+
+        result.stdout = "".join(stdout_parts)
+        result.stderr = "".join(stderr_parts)
+        result.diagnostics = diagnostics.records
+        result.timing = self.timing_report(steps, result.steps)
+        result.duration = time.perf_counter() - start
+        return result
+
+    def timing_report(self, steps, records):
+        """Aggregate the unit timings in step records into a TimingReport, or None"""
+        if not any("timing" in record for record in records):
+            return None
+        # "ar rcs <archive> ..." names its output without -o
+        outputs = [step.argv[2] if step.kind == "archive" else output_path_of(step.argv)
+                   for step in steps if step.kind in TRACKED_STEP_KINDS]
+        report = TimingReport(Path(outputs[-1]).name if outputs and outputs[-1] else "build")
+        for record in records:
+            timing = record.pop("timing", None)
+            if timing is not None:
+                report.add_unit(timing["unit"], timing)
+            elif record["kind"] in ("link", "archive"):
+                report.add_link(record["duration"])
+        return report
+
+    @traced("ninja build")
+    def execute_with_ninja(self, steps, jobs=1, on_output=None, diagnostics=None):
+        """Let ninja schedule compile/link/archive steps, then run any run steps"""
+        result = BuildResult()
+        start = time.perf_counter()
+        try:
+            for step in steps:
+                if step.pch is not None and self.pch is not None:
+                    self.pch.ensure(step.pch)
+
+            # ninja prints each command's output in one piece on its stdout
+            if diagnostics is None:
+                diagnostics = DiagnosticSet()
+            parser = DiagnosticParser(diagnostics)
+            shown = BoundedCapture(self.capture_limit())
+
+            def forward(stream, text):
+                text = parser.feed(text)
+                if text:
+                    shown.append(text)
+                    if on_output is not None:
+                        on_output(stream, text)
+
+            usage = {}
+            # Without incremental builds every step runs, so ninja starts from a clean tree
+            returncode, _, command, up_to_date = self.ninja.run(steps, jobs, forward,
+                                                                self.capture_limit(), usage,
+                                                                clean=self.deps is None)
+            tail = parser.finish()
+            if tail:
+                shown.append(tail)
+                if on_output is not None:
+                    on_output("stdout", tail)
+            result.diagnostics = diagnostics.records
+            result.returncode = returncode
+            result.stdout = shown.text()
+            result.up_to_date = up_to_date and returncode == 0
+            result.steps.append({
+                "kind": "ninja",
+                "command": command,
+                "returncode": returncode,
+                "duration": round(time.perf_counter() - start, 4),
+                "cache": "skip"
+            })
+            if usage:
+                result.steps[-1]["max_rss_kb"] = usage["max_rss_kb"]
+
+            if returncode == 0:
+                for step in steps:
+                    if step.kind == "run":
+                        record, stdout, stderr = self.execute_step(step, on_output)
+                        result.steps.append(record)
+                        result.stdout += stdout
+                        result.stderr += stderr
+                        result.returncode = record["returncode"]
+            result.success = result.returncode == 0
+        except Exception as e:
+            result.error = str(e)
+
+        result.duration = time.perf_counter() - start
+        return result
+
+    def build(self, options, input_file, output_file=None, jobs=1, on_output=None):
+        """Plan and execute a build, returning a BuildResult"""
+        if not output_file:
+            output_file = self.default_output_file(options, split_sources(input_file)[0])
+        steps = self.generate_steps(options, input_file, output_file)
+        result = self.execute(steps, jobs, on_output)
+        result.output_file = output_file
+        return result
+
+
+def profile_libraries(config, library):
+    """Library sections of a LinuxCompilerConfig profile ("none" and "both" allowed)"""
+    library = library.lower()
+    if library == "none":
+        return []
+    names = ["cryptopp", "openssl"] if library == "both" else [library]
+    try:
+        return [config["libraries"][name] for name in names]
+    except KeyError as e:
+        raise BuildError(f"Library {e} is not configured")
+
+
+def profile_compile_flags(config, compiler, library, build_mode):
+    """Compiler flags and include directories from a LinuxCompilerConfig profile"""
+    compiler_config = config["compilers"][compiler]
+
+    # Add flags based on build mode
+    if build_mode == "debug":
+        flags = list(compiler_config["debug_flags"])
+    else:
+        flags = list(compiler_config["flags"])
+
+    # Include directories
+    for lib_config in profile_libraries(config, library):
+        for inc_dir in lib_config.get("include_dirs", []):
+            if os.path.exists(inc_dir):
+                flags.append(f"-I{inc_dir}")
+    return flags
+
+
+def profile_link_flags(config, compiler, library):
+    """Library directories, libraries and tuning flags from a LinuxCompilerConfig profile"""
+    compiler_config = config["compilers"][compiler]
+    flags = []
+
+    for lib_config in profile_libraries(config, library):
+        # Library directories
+        for lib_dir in lib_config.get("lib_dirs", []):
+            if os.path.exists(lib_dir):
+                flags.append(f"-L{lib_dir}")
+
+        # Libraries
+        for lib in lib_config.get("libs", []):
+            flags.append(f"-l{lib}")
+
+    # Additional compiler libraries
+    flags.extend(compiler_config["libs"])
+
+    # Linux-specific optimizations
+    if compiler == "gcc":
+        flags.extend(["-march=native", "-mtune=native"])
+    return flags
+
+
+def profile_output_file(config, compiler, source_file, build_type):
+    """Output path of a Simple GUI build, named after its first source"""
+    base_name = Path(source_file).stem
+    output_dir = Path(source_file).parent / config["build"]["output_dir"] / compiler
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if build_type == "shared_library":
+        return output_dir / f"lib{base_name}.so"
+    elif build_type == "static_library":
+        return output_dir / f"lib{base_name}.a"
+    return output_dir / f"{base_name}_{compiler}"
+
+
+def build_profile_command(config, compiler, library, source_file, build_type, build_mode):
+    """Generate a build command from a LinuxCompilerConfig profile (Simple GUI)"""
+    cmd = [config["compilers"][compiler]["executable"]]
+    cmd.extend(profile_compile_flags(config, compiler, library, build_mode))
+
+    # Source file
+    cmd.append(source_file)
+
+    if build_type == "shared_library":
+        cmd.append("-shared")
+        cmd.append("-fPIC")
+        output_file = profile_output_file(config, compiler, source_file, build_type)
+    elif build_type == "static_library":
+        # Object only; build_profile_steps adds the ar step
+        output_dir = profile_output_file(config, compiler, source_file, build_type).parent
+        output_file = output_dir / f"{Path(source_file).stem}.o"
+    else:
+        output_file = profile_output_file(config, compiler, source_file, build_type)
+
+    cmd.extend(["-o", str(output_file)])
+    cmd.extend(profile_link_flags(config, compiler, library))
+    return cmd
+
+
+def build_profile_steps(config, compiler, library, sources, build_type, build_mode,
+                        output_file=None, per_object=False):
+    """Generate per-object compile steps and one link or ar step from a profile
+
+    Returns (steps, output_file). A single executable or shared library source
+    keeps the one-command build of build_profile_command unless per_object is set.
+    """
+    sources = split_sources(sources)
+    if not sources:
+        raise BuildError("No source files selected")
+    cwd = Path(sources[0]).parent
+    single_command = len(sources) == 1 and build_type != "static_library" and not per_object
+    if output_file:
+        # build_profile_command always writes to the profile's output directory
+        single_command = False
+    output_file = Path(output_file or profile_output_file(config, compiler, sources[0], build_type))
+
+    if single_command:
+        cmd = build_profile_command(config, compiler, library, sources[0], build_type, build_mode)
+        return [BuildStep(cmd, "compile", cwd=cwd)], str(output_file)
+
+    executable = config["compilers"][compiler]["executable"]
+    compile_flags = profile_compile_flags(config, compiler, library, build_mode)
+    if build_type != "executable":
+        compile_flags.append("-fPIC")
+
+    objects = object_files(sources, output_file)
+    steps = []
+    for source, obj_file in zip(sources, objects):
+        steps.append(BuildStep([executable, "-c"] + compile_flags + [source, "-o", obj_file],
+                               "compile", cwd=cwd))
+
+    if build_type == "static_library":
+        steps.append(BuildStep(["ar", "rcs", output_file] + objects, "archive", cwd=cwd))
+    else:
+        link_cmd = [executable]
+        if build_type == "shared_library":
+            link_cmd.append("-shared")
+        link_cmd.extend(objects + ["-o", output_file])
+        link_cmd.extend(profile_link_flags(config, compiler, library))
+        steps.append(BuildStep(link_cmd, "link", cwd=cwd))
+    return steps, str(output_file)
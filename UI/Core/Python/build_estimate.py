@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Build duration estimates, progress and ETA
+Predicts a job's duration from the build history (recent clean runs of the
+same target, compiler and flags), falling back to a heuristic on source size
+and #include count scaled to this machine, and turns the predictions into a
+determinate progress fraction, a total ETA and a longest-first job order
+"""
+
+import os
+import re
+import statistics
+import threading
+import time
+
+from build_history import target_name
+from toolchain_probe import path_signature
+
+# Heuristic cost of one translation unit, before calibration
+BASE_SECONDS = 0.3
+SECONDS_PER_KB = 0.01
+SECONDS_PER_INCLUDE = 0.05
+# Crypto++/OpenSSL/Boost headers pull in far more code than the rest
+HEAVY_INCLUDE_SECONDS = 0.5
+HEAVY_HEADERS = ("cryptopp/", "openssl/", "boost/")
+
+INCLUDE_RE = re.compile(r'^\s*#\s*include\s*[<"]([^>"]+)[>"]', re.MULTILINE)
+SOURCE_SUFFIXES = (".cpp", ".cxx", ".cc", ".c++", ".c", ".cs", ".java")
+
+# Calibration ratios outside this range are treated as noise
+MIN_SCALE = 0.2
+MAX_SCALE = 5.0
+CALIBRATION_RUNS = 50
+
+
+def step_sources(step):
+    """Source files compiled by a build step"""
+    return [arg for arg in step.argv[1:] if arg.lower().endswith(SOURCE_SUFFIXES)]
+
+
+class DurationModel:
+    """Predict build durations from history, else from source size and includes"""
+
+    def __init__(self, history=None):
+        self.history = history
+        self.costs = {}
+        self.scales = {}
+        self.lock = threading.Lock()
+
+    def source_cost(self, path):
+        """Uncalibrated seconds to compile one source, cached until the file changes"""
+        signature = path_signature(path)
+        if signature is None:
+            return BASE_SECONDS
+        key = (str(path), tuple(signature))
+        with self.lock:
+            if key in self.costs:
+                return self.costs[key]
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            return BASE_SECONDS
+        includes = INCLUDE_RE.findall(text)
+        heavy = sum(1 for header in includes if header.startswith(HEAVY_HEADERS))
+        cost = (BASE_SECONDS + SECONDS_PER_KB * len(text) / 1024
+                + SECONDS_PER_INCLUDE * (len(includes) - heavy) + HEAVY_INCLUDE_SECONDS * heavy)
+        with self.lock:
+            self.costs[key] = cost
+        return cost
+
+    def heuristic(self, sources, jobs=1):
+        """Uncalibrated seconds for a build of sources with jobs parallel compiles"""
+        costs = sorted((self.source_cost(source) for source in sources), reverse=True)
+        if not costs:
+            return BASE_SECONDS
+        # Units run side by side on the available CPUs, but never faster than the slowest one
+        parallel = max(1, min(jobs, len(costs), os.cpu_count() or 1))
+        return max(costs[0], sum(costs) / parallel)
+
+    def scale(self, compiler):
+        """Ratio of real to heuristic durations of past builds with this compiler"""
+        compiler = (compiler or "").lower()
+        with self.lock:
+            if compiler in self.scales:
+                return self.scales[compiler]
+        ratios = []
+        if self.history is not None:
+            for row in self.history.clean_runs(compiler=compiler, limit=CALIBRATION_RUNS):
+                sources = row["sources"] or []
+                if sources and row["duration"]:
+                    ratios.append(row["duration"] / self.heuristic(sources))
+        scale = min(MAX_SCALE, max(MIN_SCALE, statistics.median(ratios))) if ratios else 1.0
+        with self.lock:
+            self.scales[compiler] = scale
+        return scale
+
+    def predict(self, sources, output_file, compiler, options=None, jobs=1):
+        """Predicted seconds for a build and what they are based on
+
+        Returns (seconds, basis) with basis "history" (same target, compiler
+        and flags), "similar" (same target and compiler, other flags) or
+        "heuristic".
+        """
+        if self.history is not None:
+            target = target_name(sources, output_file)
+            lookups = ([("history", options)] if options is not None else []) + [("similar", None)]
+            for basis, flags in lookups:
+                durations = [row["duration"] for row in self.history.clean_runs(target, compiler, flags)]
+                if durations:
+                    return statistics.median(durations), basis
+        return self.heuristic(sources, jobs) * self.scale(compiler), "heuristic"
+
+    def predict_step(self, step):
+        """Uncalibrated relative cost of one build step, for ordering"""
+        return self.heuristic(step_sources(step))
+
+
+def longest_first(items, estimate):
+    """Items ordered by decreasing estimate, so the longest job never starts last"""
+    return sorted(items, key=estimate, reverse=True)
+
+
+class ProgressTracker:
+    """Progress fraction and ETA of jobs with predicted durations
+
+    Jobs are reported with started() and finished() from any thread; the
+    predictions of jobs still to come are corrected by how far off the
+    finished ones were.
+    """
+
+    def __init__(self, estimates, jobs=1):
+        self.estimates = dict(estimates)
+        self.jobs = max(1, int(jobs or 1))
+        self.running = {}
+        self.done = {}
+        self.lock = threading.Lock()
+
+    def started(self, job):
+        """Mark a job as running"""
+        with self.lock:
+            self.running[job] = time.perf_counter()
+
+    def finished(self, job, duration=None):
+        """Mark a job as done, with its real duration when known"""
+        now = time.perf_counter()
+        with self.lock:
+            started = self.running.pop(job, now)
+            self.done[job] = duration if duration is not None else now - started
+
+    def discard(self, job):
+        """Forget a job that will not run (cancelled or skipped)"""
+        with self.lock:
+            self.estimates.pop(job, None)
+            self.running.pop(job, None)
+            self.done.pop(job, None)
+
+    def complete(self):
+        """True once every job has finished"""
+        with self.lock:
+            return len(self.done) >= len(self.estimates)
+
+    def correction(self):
+        """Real over predicted time of the finished jobs"""
+        predicted = sum(self.estimates.get(job, 0.0) for job in self.done)
+        actual = sum(self.done.values())
+        if predicted <= 0 or actual <= 0:
+            return 1.0
+        return min(MAX_SCALE, max(MIN_SCALE, actual / predicted))
+
+    def remaining_work(self, now):
+        """Seconds of work left, summed over jobs"""
+        correction = self.correction()
+        remaining = 0.0
+        for job, estimate in self.estimates.items():
+            if job in self.done:
+                continue
+            estimate *= correction
+            if job in self.running:
+                # A job running past its estimate still needs a little more
+                elapsed = now - self.running[job]
+                remaining += max(estimate - elapsed, 0.1 * estimate)
+            else:
+                remaining += estimate
+        return remaining
+
+    def fraction(self):
+        """Share of the work done, 0.0 to 1.0"""
+        now = time.perf_counter()
+        with self.lock:
+            done = sum(self.done.values()) + sum(now - started for started in self.running.values())
+            remaining = self.remaining_work(now)
+        total = done + remaining
+        return done / total if total > 0 else 1.0
+
+    def eta(self):
+        """Predicted seconds until every job is finished"""
+        now = time.perf_counter()
+        with self.lock:
+            left = len(self.estimates) - len(self.done)
+            remaining = self.remaining_work(now)
+        return remaining / max(1, min(self.jobs, left))
+
+    def status(self):
+        """Short text such as "3/10 done, ~12s left" """
+        seconds = self.eta()
+        left = f"~{seconds:.0f}s left" if seconds >= 0.5 else "almost done"
+        if len(self.estimates) == 1:
+            return left
+        return f"{len(self.done)}/{len(self.estimates)} done, {left}"
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Build history
+Records every GUI/CLI build (command, toolchain fingerprint, duration, peak
+memory, exit code, diagnostic counts, output size) in a local SQLite database
+indexed by target and date, and reports per-day trends and regressions such as
+"AES.cpp with clang got 40% slower to build since last week". Runtime
+benchmarks are kept alongside, with the CPU pinning, governor and load they
+ran under, and so are cachegrind instruction and cache-miss counts, whose
+regressions are load independent
+"""
+
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import sqlite3
+import statistics
+import threading
+import time
+from pathlib import Path
+
+from toolchain_probe import path_signature
+
+DEFAULT_HISTORY_FILE = str(Path.home() / ".cache" / "crypto-compiler" / "build-history.db")
+DAY = 24 * 60 * 60
+
+# Fraction by which the recent median must exceed the earlier one
+REGRESSION_THRESHOLD = 0.2
+WINDOW_DAYS = 7
+# Clean runs a duration prediction is the median of
+RECENT_RUNS = 5
+# Instruction counts barely move between identical runs, so a small change is real
+COUNT_THRESHOLD = 0.02
+
+METRICS = {
+    "duration": ("slower to build", lambda value: f"{value:.2f}s"),
+    "max_rss_kb": ("more memory to build", lambda value: f"{value / 1024:.0f} MB"),
+    "output_size": ("bigger", lambda value: f"{value / 1024:.1f} KB")
+}
+
+COUNT_METRICS = {
+    "instructions": "instructions",
+    "l1_misses": "L1 cache misses",
+    "ll_misses": "last-level cache misses"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    started REAL,
+    target TEXT,
+    sources TEXT,
+    output TEXT,
+    compiler TEXT,
+    toolchain TEXT,
+    fingerprint TEXT,
+    options TEXT,
+    command TEXT,
+    origin TEXT,
+    duration REAL,
+    max_rss_kb INTEGER,
+    returncode INTEGER,
+    success INTEGER,
+    errors INTEGER,
+    warnings INTEGER,
+    output_size INTEGER,
+    up_to_date INTEGER,
+    cache_hits INTEGER,
+    cache_misses INTEGER
+);
+CREATE INDEX IF NOT EXISTS builds_target_started ON builds(target, started);
+CREATE INDEX IF NOT EXISTS builds_started ON builds(started);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id INTEGER PRIMARY KEY,
+    started REAL,
+    target TEXT,
+    command TEXT,
+    origin TEXT,
+    runs INTEGER,
+    warmup INTEGER,
+    failures INTEGER,
+    wall_median REAL,
+    wall_p95 REAL,
+    wall_stdev REAL,
+    user_median REAL,
+    sys_median REAL,
+    max_rss_kb INTEGER,
+    stable INTEGER,
+    environment TEXT
+);
+CREATE INDEX IF NOT EXISTS benchmarks_target_started ON benchmarks(target, started);
+CREATE TABLE IF NOT EXISTS instruction_counts (
+    id INTEGER PRIMARY KEY,
+    started REAL,
+    target TEXT,
+    command TEXT,
+    origin TEXT,
+    returncode INTEGER,
+    instructions INTEGER,
+    data_refs INTEGER,
+    l1_misses INTEGER,
+    ll_misses INTEGER,
+    counts TEXT
+);
+CREATE INDEX IF NOT EXISTS instruction_counts_target_started ON instruction_counts(target, started);
+"""
+
+# Columns stored as JSON text
+JSON_COLUMNS = ("sources", "options", "environment", "counts")
+
+COLUMNS = ("id", "started", "target", "sources", "output", "compiler", "toolchain", "fingerprint",
+           "options", "command", "origin", "duration", "max_rss_kb", "returncode", "success",
+           "errors", "warnings", "output_size", "up_to_date", "cache_hits", "cache_misses")
+
+BENCHMARK_COLUMNS = ("id", "started", "target", "command", "origin", "runs", "warmup", "failures",
+                     "wall_median", "wall_p95", "wall_stdev", "user_median", "sys_median",
+                     "max_rss_kb", "stable", "environment")
+COUNT_COLUMNS = ("id", "started", "target", "command", "origin", "returncode", "instructions",
+                 "data_refs", "l1_misses", "ll_misses", "counts")
+TABLES = {"builds": COLUMNS, "benchmarks": BENCHMARK_COLUMNS, "instruction_counts": COUNT_COLUMNS}
+
+
+def target_name(sources, output_file):
+    """Name a build is tracked under: its source for one-file builds, else its output"""
+    if len(sources) == 1:
+        return Path(sources[0]).name
+    return Path(output_file).name if output_file else ";".join(Path(s).name for s in sources)
+
+
+def toolchain_fingerprint(compiler_path, version):
+    """Short hash identifying the compiler binary and its version"""
+    resolved = os.path.realpath(shutil.which(compiler_path) or compiler_path)
+    data = json.dumps([resolved, path_signature(resolved), version])
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+
+def diagnostic_counts(records):
+    """(errors, warnings) in diagnostic records, repeats included"""
+    errors = warnings = 0
+    for record in records:
+        count = record.get("count", 1)
+        if record["severity"] in ("error", "fatal"):
+            errors += count
+        elif record["severity"] == "warning":
+            warnings += count
+    return errors, warnings
+
+
+def count_command(report):
+    """Command line a cachegrind report is tracked under, with its standard input"""
+    command = shlex.join(report["command"])
+    if report.get("input"):
+        command += f" < {shlex.quote(report['input'])}"
+    return command
+
+
+def median(values):
+    """Median of a list, None when empty"""
+    return statistics.median(values) if values else None
+
+
+class BuildHistory:
+    """SQLite log of builds with trend and regression queries"""
+
+    def __init__(self, history_file=DEFAULT_HISTORY_FILE):
+        self.history_file = Path(os.path.expanduser(history_file))
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.history_file), check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, config):
+        """Create history from configuration, or None when disabled"""
+        if not config.get("build_history_enabled", True):
+            return None
+        return cls(config.get("build_history_file", DEFAULT_HISTORY_FILE))
+
+    def close(self):
+        """Close the database"""
+        self.db.close()
+
+    def record(self, result, steps, sources, output_file, compiler, toolchain=None,
+               options=None, origin="cli", started=None):
+        """Store one build's BuildResult; return the row id"""
+        errors, warnings = diagnostic_counts(result.diagnostics)
+        output_size = None
+        if result.success and output_file and os.path.isfile(output_file):
+            output_size = os.path.getsize(output_file)
+        compiler_path = steps[0].argv[0] if steps else ""
+        row = {
+            "started": started if started is not None else time.time() - result.duration,
+            "target": target_name(sources, output_file),
+            "sources": json.dumps([os.path.abspath(str(source)) for source in sources]),
+            "output": os.path.abspath(output_file) if output_file else None,
+            "compiler": compiler.lower(),
+            "toolchain": toolchain,
+            "fingerprint": toolchain_fingerprint(compiler_path, toolchain) if compiler_path else None,
+            "options": json.dumps(options, sort_keys=True) if options is not None else None,
+            "command": " && ".join(step.command_line() for step in steps),
+            "origin": origin,
+            "duration": result.duration,
+            "max_rss_kb": result.max_rss_kb(),
+            "returncode": result.returncode,
+            "success": int(bool(result.success)),
+            "errors": errors,
+            "warnings": warnings,
+            "output_size": output_size,
+            "up_to_date": int(bool(result.up_to_date)),
+            "cache_hits": result.cache["hits"],
+            "cache_misses": result.cache["misses"]
+        }
+        return self.insert("builds", row)
+
+    def record_benchmark(self, report, target=None, origin="cli", started=None):
+        """Store a run_benchmark report with its environment; return the row id"""
+        stats = report["stats"]
+        wall = stats.get("wall") or {}
+        environment = report.get("environment") or {}
+        row = {
+            "started": started if started is not None else time.time(),
+            "target": target or os.path.basename(report["command"][0]),
+            "command": shlex.join(report["command"]),
+            "origin": origin,
+            "runs": report["runs"],
+            "warmup": report["warmup"],
+            "failures": report["failures"],
+            "wall_median": wall.get("median"),
+            "wall_p95": wall.get("p95"),
+            "wall_stdev": wall.get("stdev"),
+            "user_median": (stats.get("user") or {}).get("median"),
+            "sys_median": (stats.get("sys") or {}).get("median"),
+            "max_rss_kb": (stats.get("max_rss_kb") or {}).get("max"),
+            "stable": int(bool(environment.get("stable"))),
+            "environment": json.dumps(environment, sort_keys=True)
+        }
+        return self.insert("benchmarks", row)
+
+    def record_counts(self, report, target=None, origin="cli", started=None):
+        """Store a cachegrind report of runtime_profile.InstructionCounter; return the row id"""
+        row = {
+            "started": started if started is not None else time.time(),
+            "target": target or os.path.basename(report["command"][0]),
+            "command": count_command(report),
+            "origin": origin,
+            "returncode": report["returncode"],
+            "instructions": report["instructions"],
+            "data_refs": report["data_refs"],
+            "l1_misses": report["l1_misses"],
+            "ll_misses": report["ll_misses"],
+            "counts": json.dumps(report["counts"], sort_keys=True)
+        }
+        return self.insert("instruction_counts", row)
+
+    def insert(self, table, row):
+        """Insert one row into a table; return its id"""
+        names = list(row)
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                [row[name] for name in names])
+        return cursor.lastrowid
+
+    def query(self, where, params, order="started DESC", limit=None, table="builds"):
+        """Rows of builds (or another table) as dicts"""
+        columns = TABLES[table]
+        sql = f"SELECT {', '.join(columns)} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        records = [dict(zip(columns, row)) for row in rows]
+        for record in records:
+            for column in JSON_COLUMNS:
+                if record.get(column) is not None:
+                    record[column] = json.loads(record[column])
+        return records
+
+    def filters(self, target=None, compiler=None, since=None, clean=False, options=None):
+        """WHERE clauses and parameters for the common filters
+
+        clean keeps successful builds that really compiled: no up-to-date
+        skips or cache hits, whose times say nothing about the compiler.
+        """
+        where, params = [], []
+        if target:
+            where.append("target = ?")
+            params.append(target)
+        if compiler:
+            where.append("compiler = ?")
+            params.append(compiler.lower())
+        if since is not None:
+            where.append("started >= ?")
+            params.append(since)
+        if clean:
+            where.append("success = 1 AND up_to_date = 0 AND cache_hits = 0")
+        if options is not None:
+            where.append("options = ?")
+            params.append(json.dumps(options, sort_keys=True))
+        return where, params
+
+    def runs(self, target=None, compiler=None, days=None, limit=50):
+        """Most recent builds, newest first"""
+        since = time.time() - days * DAY if days else None
+        return self.query(*self.filters(target, compiler, since), limit=limit)
+
+    def clean_runs(self, target=None, compiler=None, options=None, limit=RECENT_RUNS):
+        """Most recent clean builds, optionally with exactly these options"""
+        return self.query(*self.filters(target, compiler, clean=True, options=options), limit=limit)
+
+    def benchmarks(self, target=None, stable=False, days=None, limit=50):
+        """Most recent benchmarks, newest first; stable keeps runs without isolation warnings"""
+        where, params = self.filters(target, since=time.time() - days * DAY if days else None)
+        if stable:
+            where.append("stable = 1")
+        return self.query(where, params, limit=limit, table="benchmarks")
+
+    def instruction_counts(self, target=None, days=None, limit=50):
+        """Most recent cachegrind counts, newest first"""
+        where, params = self.filters(target, since=time.time() - days * DAY if days else None)
+        return self.query(where, params, limit=limit, table="instruction_counts")
+
+    def count_regressions(self, threshold=COUNT_THRESHOLD, target=None, latest=None):
+        """Runs whose latest counts exceed the median of the earlier runs by threshold
+
+        Compares, per target and command line, the newest successful run with
+        up to RECENT_RUNS runs before it, for every metric in COUNT_METRICS.
+        With latest, a report not recorded yet is compared with the recorded
+        runs of its command instead.
+        """
+        where, params = self.filters(target)
+        where.append("returncode = 0")
+        if latest is not None:
+            where.append("command = ?")
+            params.append(count_command(latest))
+        groups = {}
+        for row in self.query(where, params, table="instruction_counts"):
+            runs = groups.setdefault((row["target"], row["command"]), [])
+            if len(runs) <= RECENT_RUNS:
+                runs.append(row)
+
+        found = []
+        for (name, command_line), rows in groups.items():
+            if latest is not None:
+                latest_row, earlier = latest, rows[:RECENT_RUNS]
+            else:
+                latest_row, earlier = rows[0], rows[1:]
+            for metric, what in COUNT_METRICS.items():
+                old = median([row[metric] for row in earlier if row[metric] is not None])
+                new = latest_row[metric]
+                if not old or new is None or new <= old * (1 + threshold):
+                    continue
+                change = new / old - 1
+                found.append({
+                    "target": name,
+                    "command": command_line,
+                    "metric": metric,
+                    "before": old,
+                    "after": new,
+                    "change": round(change, 4),
+                    "message": (f"{' '.join([name] + shlex.split(command_line)[1:])}: "
+                                f"{change * 100:.1f}% more {what} ({old:,.0f} → {new:,})")
+                })
+        return sorted(found, key=lambda item: item["change"], reverse=True)
+
+    def targets(self):
+        """(target, compiler, builds, last started) of everything built so far"""
+        with self.lock:
+            return self.db.execute(
+                "SELECT target, compiler, COUNT(*), MAX(started) FROM builds "
+                "GROUP BY target, compiler ORDER BY MAX(started) DESC").fetchall()
+
+    def trend(self, target, compiler=None, days=30, now=None):
+        """Per-day aggregates of a target's builds, oldest first"""
+        now = now if now is not None else time.time()
+        where, params = self.filters(target, compiler, now - days * DAY)
+        days_seen = {}
+        for row in self.query(where, params, order="started"):
+            day = time.strftime("%Y-%m-%d", time.localtime(row["started"]))
+            days_seen.setdefault(day, []).append(row)
+
+        trend = []
+        for day, rows in days_seen.items():
+            clean = [row for row in rows if row["success"] and not row["up_to_date"] and not row["cache_hits"]]
+            memory = [row["max_rss_kb"] for row in clean if row["max_rss_kb"]]
+            sizes = [row["output_size"] for row in clean if row["output_size"]]
+            trend.append({
+                "day": day,
+                "builds": len(rows),
+                "failed": sum(1 for row in rows if not row["success"]),
+                "median_duration": median([row["duration"] for row in clean]),
+                "max_rss_kb": max(memory, default=None),
+                "output_size": sizes[-1] if sizes else None,
+                "warnings": rows[-1]["warnings"],
+                "toolchains": sorted({row["toolchain"] for row in rows if row["toolchain"]})
+            })
+        return trend
+
+    def regressions(self, threshold=REGRESSION_THRESHOLD, window_days=WINDOW_DAYS, metric="duration",
+                    target=None, compiler=None, now=None):
+        """Targets whose recent median metric exceeds the previous window's by threshold
+
+        Compares clean builds of the last window_days with the window before it,
+        per target and compiler.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r} (choose from {', '.join(METRICS)})")
+        now = now if now is not None else time.time()
+        window = window_days * DAY
+        where, params = self.filters(target, compiler, now - 2 * window, clean=True)
+
+        groups = {}
+        for row in self.query(where, params, order="started"):
+            if row[metric] is None:
+                continue
+            groups.setdefault((row["target"], row["compiler"]), []).append(row)
+
+        what, show = METRICS[metric]
+        period = "since last week" if window_days == 7 else f"over the last {window_days} day(s)"
+        found = []
+        for (name, compiler_name), rows in groups.items():
+            before = [row for row in rows if row["started"] < now - window]
+            after = [row for row in rows if row["started"] >= now - window]
+            old, new = median([row[metric] for row in before]), median([row[metric] for row in after])
+            if not old or new is None or new <= old * (1 + threshold):
+                continue
+            change = new / old - 1
+            message = (f"{name} with {compiler_name} got {change * 100:.0f}% {what} {period} "
+                       f"({show(old)} → {show(new)})")
+            toolchains = ({row["toolchain"] for row in before}, {row["toolchain"] for row in after})
+            if toolchains[0] != toolchains[1]:
+                message += "; the toolchain changed"
+            found.append({
+                "target": name,
+                "compiler": compiler_name,
+                "metric": metric,
+                "before": old,
+                "after": new,
+                "change": round(change, 4),
+                "builds": [len(before), len(after)],
+                "message": message
+            })
+        return sorted(found, key=lambda item: item["change"], reverse=True)
+
+    def clear(self):
+        """Delete every recorded build, benchmark and instruction count"""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM builds")
+            self.db.execute("DELETE FROM benchmarks")
+            self.db.execute("DELETE FROM instruction_counts")
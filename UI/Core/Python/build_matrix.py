@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Build matrix mode for the build engine
+Expands compiler x optimization x library axes and builds every combination
+concurrently into its own output directory
+"""
+
+import os
+import itertools
+from pathlib import Path
+
+from build_engine import BuildEngine, split_sources
+from batch_build import BatchBuilder
+
+MATRIX_COMPILERS = ["GCC", "Clang"]
+MATRIX_OPT_LEVELS = ["O0", "O1", "O2", "O3", "Os"]
+MATRIX_LIBRARIES = ["None", "CryptoPP", "OpenSSL", "Both"]
+
+
+def cell_label(cell):
+    """Short unique name of a matrix cell, also used as its output directory"""
+    return f"{cell['compiler'].lower()}-{cell['opt_level']}-{cell['library'].lower()}"
+
+
+def cell_title(cell):
+    """Readable name of a matrix cell, such as "clang -O3" """
+    title = f"{cell['compiler'].lower()} -{cell['opt_level']}"
+    if cell["library"] != "None":
+        title += f" {cell['library']}"
+    return title
+
+
+def expand_matrix(compilers, opt_levels, libraries):
+    """Return every combination of the chosen axes"""
+    return [{"compiler": compiler, "opt_level": opt_level, "library": library}
+            for compiler, opt_level, library in itertools.product(compilers, opt_levels, libraries)]
+
+
+class BuildMatrix:
+    """Build one source for every cell of a compiler/optimization/library matrix"""
+
+    def __init__(self, config, jobs=None, use_cache=False):
+        # Cached or skipped cells would not report real build time
+        self.engine = BuildEngine(config, use_cache=use_cache, incremental=False)
+        self.jobs = jobs
+
+    def cell_output(self, options, input_file, cell):
+        """Output path under build/<compiler>-<opt>-<library>/"""
+        input_path = Path(split_sources(input_file)[0])
+        output_dir = input_path.parent / "build" / cell_label(cell)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        compiler = cell["compiler"].lower()
+        if options.build_type == "Shared Library":
+            ext = ".so"
+        elif options.build_type == "Static Library":
+            ext = ".a"
+        else:
+            ext = ""
+        return str(output_dir / f"{input_path.stem}_{compiler}{ext}")
+
+    def run(self, input_file, cells, base_options, on_result=None):
+        """Build all cells concurrently and return (rows, summary)"""
+        cells_by_label = {cell_label(cell): cell for cell in cells}
+
+        def build_cell(label):
+            cell = cells_by_label[label]
+            options = base_options.copy(compiler=cell["compiler"], opt_level=cell["opt_level"],
+                                        library=cell["library"], auto_run=False)
+            output_file = self.cell_output(options, input_file, cell)
+            steps = self.engine.generate_steps(options, input_file, output_file)
+            result = self.engine.execute(steps)
+            row = dict(cell)
+            row.update({
+                "success": result.success,
+                "duration": round(result.duration, 4),
+                "size": os.path.getsize(output_file) if result.success and os.path.exists(output_file) else None,
+                "output": output_file,
+                "stderr": result.stderr,
+                "error": result.error
+            })
+            return row
+
+        rows = []
+
+        def collect(job):
+            # Failed and skipped jobs carry no cell axes; take them from the cell itself
+            row = dict(cells_by_label[job["source"]])
+            row.update(job)
+            row["cell"] = row.pop("source")
+            rows.append(row)
+            if on_result:
+                on_result(row)
+
+        builder = BatchBuilder(self.jobs)
+        summary = builder.run(list(cells_by_label), build_cell, collect)
+
+        order = {label: index for index, label in enumerate(cells_by_label)}
+        rows.sort(key=lambda row: order[row["cell"]])
+        return rows, summary
+
+
+def row_status(row):
+    """Status label for a matrix row"""
+    if row.get("skipped"):
+        return "⏹️ SKIPPED"
+    return "✅ OK" if row.get("success") else "❌ FAIL"
+
+
+def format_table(rows):
+    """Render matrix rows as a plain text table"""
+    header = ["Compiler", "Opt", "Library", "Status", "Time (s)", "Size (KB)"]
+    lines = [header]
+    for row in rows:
+        size = f"{row['size'] / 1024:.1f}" if row.get("size") is not None else "-"
+        lines.append([
+            row["compiler"],
+            row["opt_level"],
+            row["library"],
+            row_status(row),
+            f"{row.get('duration', 0.0):.2f}",
+            size
+        ])
+    widths = [max(len(str(line[i])) for line in lines) for i in range(len(header))]
+    text = []
+    for index, line in enumerate(lines):
+        text.append("  ".join(str(value).ljust(widths[i]) for i, value in enumerate(line)))
+        if index == 0:
+            text.append("  ".join("-" * width for width in widths))
+    return "\n".join(text)
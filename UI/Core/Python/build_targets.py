@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Multi-source build targets for the build engine
+Targets are read from a crypto_targets.json file; every source compiles to its
+own object in parallel, followed by a single link or ar step
+"""
+
+import os
+import json
+from pathlib import Path
+
+from build_engine import BuildError, BUILD_TYPES, LIBRARIES
+from batch_build import expand_sources
+
+TARGETS_FILE = "crypto_targets.json"
+
+
+class BuildTarget:
+    """A named executable, shared library or static library built from several sources"""
+
+    def __init__(self, name, sources, build_type="Executable", library="None",
+                 output=None, root="."):
+        if build_type not in BUILD_TYPES:
+            raise BuildError(f"Target {name}: unknown type {build_type!r}")
+        if library not in LIBRARIES:
+            raise BuildError(f"Target {name}: unknown library {library!r}")
+        self.name = name
+        self.patterns = list(sources)
+        self.build_type = build_type
+        self.library = library
+        self.output = output
+        self.root = str(root)
+
+    @classmethod
+    def from_dict(cls, data, root="."):
+        """Create a target from one entry of a targets file"""
+        try:
+            return cls(data["name"], data["sources"],
+                       build_type=data.get("type", "Executable"),
+                       library=data.get("library", "None"),
+                       output=data.get("output"),
+                       root=root)
+        except KeyError as e:
+            raise BuildError(f"Target definition is missing {e}")
+
+    def sources(self):
+        """Expand the source patterns relative to the targets file"""
+        sources = expand_sources(self.patterns, self.root)
+        if not sources:
+            raise BuildError(f"Target {self.name}: no source files matched")
+        return sources
+
+    def output_file(self, compiler):
+        """Output path; defaults to <root>/<compiler>/lib<name>.so, lib<name>.a or <name>"""
+        if self.output:
+            return os.path.join(self.root, self.output)
+        if self.build_type == "Shared Library":
+            filename = f"lib{self.name}.so"
+        elif self.build_type == "Static Library":
+            filename = f"lib{self.name}.a"
+        else:
+            filename = self.name
+        output_dir = Path(self.root) / compiler.lower()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return str(output_dir / filename)
+
+    def options(self, base_options):
+        """Build options for this target on top of the command line/GUI options"""
+        changes = {"build_type": self.build_type}
+        if self.library != "None":
+            changes["library"] = self.library
+        if self.build_type != "Executable":
+            changes["auto_run"] = False
+        return base_options.copy(**changes)
+
+
+def load_targets(targets_file=TARGETS_FILE):
+    """Read target definitions from a JSON file"""
+    try:
+        with open(targets_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BuildError(f"Cannot read targets file {targets_file}: {e}")
+    root = Path(targets_file).resolve().parent
+    return [BuildTarget.from_dict(entry, root) for entry in data.get("targets", [])]
+
+
+def select_targets(targets, names):
+    """Return the targets named on the command line, or all of them"""
+    if not names:
+        return targets
+    by_name = {target.name: target for target in targets}
+    missing = [name for name in names if name not in by_name]
+    if missing:
+        raise BuildError(f"Unknown target(s): {', '.join(missing)}")
+    return [by_name[name] for name in names]
+
+
+def build_target(engine, target, base_options, jobs=1):
+    """Build one target and return its result dictionary"""
+    options = target.options(base_options)
+    output_file = target.output_file(options.compiler)
+    sources = target.sources()
+    steps = engine.generate_steps(options, sources, output_file)
+    result = engine.execute(steps, jobs)
+    data = result.to_dict()
+    data.update({"target": target.name, "type": target.build_type,
+                 "sources": sources, "output": output_file})
+    return data
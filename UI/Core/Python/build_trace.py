@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Timeline tracing in the Chrome trace event format
+Spans of config loading, toolchain probes, command generation, compiler/ar
+invocations, run steps and output rendering are collected from every thread
+into one process-wide tracer and written as JSON that opens in
+chrome://tracing or Perfetto. Spans cost next to nothing while tracing is off
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Events kept per session; later ones are counted but dropped
+MAX_EVENTS = 500000
+
+NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Collect complete ("X") and instant ("i") events from any thread"""
+
+    def __init__(self):
+        self.enabled = False
+        self.filename = None
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.events = []
+        self.threads = {}
+        self.dropped = 0
+
+    def start(self, filename=None):
+        """Start tracing; a running session keeps its events"""
+        with self.lock:
+            if not self.enabled:
+                self.origin = time.perf_counter()
+                self.events = []
+                self.threads = {}
+                self.dropped = 0
+            self.enabled = True
+            self.filename = filename or self.filename
+
+    def stop(self):
+        """Stop collecting events"""
+        self.enabled = False
+
+    def now(self):
+        """Microseconds since tracing started"""
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def add(self, event):
+        """Append an event stamped with the calling thread"""
+        thread = threading.current_thread()
+        event["pid"] = os.getpid()
+        event["tid"] = thread.ident
+        with self.lock:
+            if len(self.events) >= MAX_EVENTS:
+                self.dropped += 1
+                return
+            self.threads.setdefault(thread.ident, thread.name)
+            self.events.append(event)
+
+    @contextmanager
+    def record(self, name, category, args):
+        """Context manager adding one complete event when it exits"""
+        start = self.now()
+        try:
+            yield
+        finally:
+            event = {"name": name, "cat": category, "ph": "X", "ts": start, "dur": self.now() - start}
+            if args:
+                event["args"] = args
+            self.add(event)
+
+    def span(self, name, category="build", **args):
+        """Context manager timing a span; a shared no-op while tracing is off"""
+        if not self.enabled:
+            return NULL_SPAN
+        return self.record(name, category, args)
+
+    def instant(self, name, category="build", **args):
+        """Mark a point in time"""
+        if self.enabled:
+            self.add({"name": name, "cat": category, "ph": "i", "s": "t", "ts": self.now(), "args": args})
+
+    def to_dict(self):
+        """Trace in the Chrome JSON object format, with process and thread names"""
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+            dropped = self.dropped
+        pid = os.getpid()
+        metadata = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                     "args": {"name": "crypto-compiler"}}]
+        metadata.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                        for tid, name in threads.items())
+        trace = {"traceEvents": metadata + sorted(events, key=lambda event: event["ts"]),
+                 "displayTimeUnit": "ms"}
+        if dropped:
+            trace["otherData"] = {"dropped_events": dropped}
+        return trace
+
+    def write(self, filename=None):
+        """Write the events so far; return the file name, or None without one"""
+        filename = filename or self.filename
+        if not filename:
+            return None
+        filename = os.path.expanduser(filename)
+        temp_file = f"{filename}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temp_file, filename)
+        return filename
+
+
+TRACER = Tracer()
+
+
+def span(name, category="build", **args):
+    """Time a span on the process-wide tracer"""
+    return TRACER.span(name, category, **args)
+
+
+def traced(name, category="build"):
+    """Decorator timing every call as a span
+
+    name may be a callable that gets the call's arguments and returns the
+    span name, e.g. the step a method runs.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            label = name(*args, **kwargs) if callable(name) else name
+            with TRACER.record(label, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instant(name, category="build", **args):
+    """Mark a point in time on the process-wide tracer"""
+    TRACER.instant(name, category, **args)
+
+
+def start_tracing(filename=None):
+    """Start the process-wide tracer, to be written to filename"""
+    TRACER.start(filename)
+
+
+def trace_from_config(config):
+    """Start tracing when the configuration names a trace_file"""
+    if config.get("trace_file"):
+        TRACER.start(config["trace_file"])
+
+
+def flush_trace():
+    """Write the process-wide trace if tracing is on; return the file name or None"""
+    if not TRACER.enabled:
+        return None
+    try:
+        return TRACER.write()
+    except OSError:
+        return None
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Content-addressed compile cache for the build engine
+Works like ccache: results are keyed by the preprocessed source, the exact
+compiler argv and the compiler version, with a size cap and LRU eviction.
+Commands that also link are keyed by the libraries they resolve as well
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = str(Path.home() / ".cache" / "crypto-compiler" / "compile-cache")
+DEFAULT_MAX_SIZE_MB = 1024
+# Hit/miss counts reach stats.json after this many lookups, or on flush()
+STATS_FLUSH_EVERY = 32
+
+
+def write_atomic(path, text):
+    """Write text to path through a temp file unique to this process and thread"""
+    tmp_file = Path(f"{path}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+
+def output_path_of(argv):
+    """Return the file a compiler argv writes with -o, or None"""
+    try:
+        return argv[argv.index("-o") + 1]
+    except (ValueError, IndexError):
+        return None
+
+
+_versions = {}
+
+
+def compiler_version(compiler):
+    """Return `compiler --version`, memoized per executable and mtime"""
+    path = shutil.which(compiler) or compiler
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    key = (path, mtime)
+    if key not in _versions:
+        try:
+            result = subprocess.run([path, "--version"], capture_output=True,
+                                    text=True, timeout=10)
+            _versions[key] = result.stdout
+        except Exception:
+            _versions[key] = ""
+    return _versions[key]
+
+
+def depfile_of(argv):
+    """Return the dependency file a compiler argv writes with -MF, or None"""
+    try:
+        return argv[argv.index("-MF") + 1]
+    except (ValueError, IndexError):
+        return None
+
+
+_search_dirs = {}
+
+
+def compiler_search_dirs(compiler):
+    """Return the compiler's default library directories, memoized per executable"""
+    path = shutil.which(compiler) or compiler
+    if path not in _search_dirs:
+        dirs = []
+        try:
+            result = subprocess.run([path, "-print-search-dirs"], capture_output=True,
+                                    text=True, timeout=10)
+            for line in result.stdout.splitlines():
+                if line.startswith("libraries:"):
+                    dirs = [d for d in line.split("=", 1)[-1].split(":") if d]
+        except Exception:
+            pass
+        _search_dirs[path] = dirs
+    return _search_dirs[path]
+
+
+def option_values(argv, flag):
+    """Return the values of a flag given as `-X value` or `-Xvalue`"""
+    values = []
+    for i, arg in enumerate(argv):
+        if arg == flag and i + 1 < len(argv):
+            values.append(argv[i + 1])
+        elif arg.startswith(flag) and len(arg) > len(flag):
+            values.append(arg[len(flag):])
+    return values
+
+
+def linked_libraries(argv, cwd=None):
+    """Resolve the -l libraries a link command pulls in via -L and default dirs
+
+    Returns [] for compile-only commands (-c, -S, -E); libraries that cannot
+    be found are left out, their -l flag is still part of argv.
+    """
+    if any(flag in argv for flag in ("-c", "-S", "-E")):
+        return []
+    names = option_values(argv, "-l")
+    if not names:
+        return []
+    dirs = [os.path.join(cwd or "", d) for d in option_values(argv, "-L")]
+    dirs += compiler_search_dirs(argv[0])
+    static = "-static" in argv
+
+    libraries = []
+    for name in names:
+        if name.startswith(":"):
+            candidates = [name[1:]]
+        elif static:
+            candidates = [f"lib{name}.a"]
+        else:
+            candidates = [f"lib{name}.so", f"lib{name}.a"]
+        for folder in dirs:
+            found = next((os.path.normpath(os.path.join(folder, c)) for c in candidates
+                          if os.path.isfile(os.path.join(folder, c))), None)
+            if found:
+                libraries.append(found)
+                break
+    return libraries
+
+
+def preprocess_argv(argv):
+    """Turn a compile argv into the matching preprocessor-only argv"""
+    result = []
+    skip_next = False
+    for arg in argv:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in ("-o", "-MF", "-MT", "-MQ"):
+            skip_next = True
+            continue
+        if arg in ("-v", "-c", "-MMD", "-MD"):
+            continue
+        result.append(arg)
+    result.append("-E")
+    return result
+
+
+class CompileCache:
+    """On-disk compile cache with direct (manifest) and preprocessor lookup modes"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = Path(os.path.expanduser(cache_dir))
+        self.max_size = int(max_size_mb) * 1024 * 1024
+        self.objects_dir = self.cache_dir / "objects"
+        self.manifests_dir = self.cache_dir / "manifests"
+        self.stats_file = self.cache_dir / "stats.json"
+        self.lock = threading.Lock()
+        # Bytes in objects_dir: scanned on the first store, then kept up to date
+        # by store() and evict(). Other processes' stores show up at the next rescan
+        self.total_size = None
+        self.pending_stats = {}
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        """Create cache from engine configuration, or None when disabled"""
+        if not config.get("compile_cache_enabled", True):
+            return None
+        return cls(config.get("compile_cache_dir", DEFAULT_CACHE_DIR),
+                   config.get("compile_cache_max_mb", DEFAULT_MAX_SIZE_MB))
+
+    # ---------------------------------------------------------------- keys
+
+    def hash_libraries(self, digest, argv, cwd=None):
+        """Mix path, mtime and size of every linked library into digest"""
+        for path in linked_libraries(argv, cwd):
+            digest.update(f"{path}:{self.file_signature(path)}".encode())
+
+    def direct_key(self, argv, cwd=None):
+        """Hash of argv, compiler version, linked libraries and the source files named in argv"""
+        digest = hashlib.sha256()
+        digest.update("\0".join(argv).encode())
+        digest.update(compiler_version(argv[0]).encode())
+        self.hash_libraries(digest, argv, cwd)
+        for arg in argv[1:]:
+            path = os.path.join(cwd or "", arg)
+            if not arg.startswith("-") and os.path.isfile(path):
+                with open(path, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+
+    def preprocessed_key(self, argv, cwd=None):
+        """Hash of preprocessed source, argv, compiler version and linked libraries
+
+        Returns (key, included_files) or (None, None) when preprocessing fails.
+        """
+        digest = hashlib.sha256()
+        digest.update("\0".join(argv).encode())
+        digest.update(compiler_version(argv[0]).encode())
+        self.hash_libraries(digest, argv, cwd)
+        included = set()
+
+        process = subprocess.Popen(preprocess_argv(argv), cwd=cwd,
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        for line in process.stdout:
+            digest.update(line)
+            # Line markers look like: # 12 "/usr/include/cryptopp/aes.h" 2
+            if line.startswith(b"# ") and b'"' in line:
+                name = line.split(b'"')[1].decode(errors="replace")
+                if not name.startswith("<"):
+                    included.add(name)
+        if process.wait() != 0:
+            return None, None
+        return digest.hexdigest(), sorted(included)
+
+    # ------------------------------------------------------------ manifest
+
+    def file_signature(self, path):
+        """Cheap freshness signature for an included file"""
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+
+    def lookup_manifest(self, direct_key, cwd=None):
+        """Return the object key recorded for direct_key if no include changed"""
+        manifest_file = self.manifests_dir / f"{direct_key}.json"
+        try:
+            with open(manifest_file, "r") as f:
+                manifest = json.load(f)
+            for path, signature in manifest["files"].items():
+                full_path = os.path.join(cwd or "", path)
+                if self.file_signature(full_path) != signature:
+                    return None
+            return manifest["key"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write_manifest(self, direct_key, key, included, cwd=None):
+        """Record the include set that produced key"""
+        files = {}
+        for path in included:
+            try:
+                files[path] = self.file_signature(os.path.join(cwd or "", path))
+            except OSError:
+                return
+        self.write_json(self.manifests_dir / f"{direct_key}.json",
+                        {"key": key, "files": files})
+
+    # ------------------------------------------------------------- storage
+
+    def object_paths(self, key):
+        """Return (object file, metadata file) for a key"""
+        folder = self.objects_dir / key[:2]
+        return folder / key, folder / f"{key}.json"
+
+    def restore(self, key, output_file, depfile=None):
+        """Copy a cached object to output_file; return metadata or None"""
+        object_file, meta_file = self.object_paths(key)
+        try:
+            with open(meta_file, "r") as f:
+                meta = json.load(f)
+            if depfile and meta.get("depfile") is None:
+                return None
+            Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(object_file, output_file)
+            os.chmod(output_file, meta.get("mode", 0o644))
+            if depfile:
+                with open(depfile, "w") as f:
+                    f.write(meta["depfile"])
+            # Touch metadata so LRU eviction sees the entry as recently used
+            os.utime(meta_file)
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, output_file, stdout, stderr, depfile=None):
+        """Add a freshly compiled output to the cache"""
+        object_file, meta_file = self.object_paths(key)
+        try:
+            depfile_text = None
+            if depfile:
+                with open(depfile, "r") as f:
+                    depfile_text = f.read()
+            object_file.parent.mkdir(parents=True, exist_ok=True)
+            replaced = self.entry_size(key)
+            tmp_file = object_file.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(output_file, tmp_file)
+            os.replace(tmp_file, object_file)
+            self.write_json(meta_file, {
+                "stdout": stdout,
+                "stderr": stderr,
+                "mode": os.stat(output_file).st_mode & 0o777,
+                "size": os.path.getsize(output_file),
+                "depfile": depfile_text,
+                "created": time.time()
+            })
+            added = self.entry_size(key) - replaced
+        except OSError:
+            return
+        with self.lock:
+            if self.total_size is None:
+                self.total_size = sum(size for _, size, _ in self.entries())
+            else:
+                self.total_size += added
+            over = self.total_size > self.max_size
+        if over:
+            self.evict()
+
+    def write_json(self, path, data):
+        """Atomically write a JSON file"""
+        write_atomic(path, json.dumps(data))
+
+    def entry_size(self, key):
+        """Bytes used by a cached object and its metadata, 0 when not cached"""
+        size = 0
+        for path in self.object_paths(key):
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+        return size
+
+    def entries(self):
+        """Return [(last_used, size, key)] for every cached object"""
+        entries = []
+        for meta_file in self.objects_dir.glob("*/*.json"):
+            key = meta_file.stem
+            object_file = meta_file.with_name(key)
+            try:
+                size = object_file.stat().st_size + meta_file.stat().st_size
+                entries.append((meta_file.stat().st_mtime, size, key))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self):
+        """Drop least recently used objects until the cache fits max size"""
+        with self.lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            self.total_size = total
+            if total <= self.max_size:
+                return
+            for _, size, key in sorted(entries):
+                object_file, meta_file = self.object_paths(key)
+                for path in (object_file, meta_file):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                total -= size
+                if total <= self.max_size:
+                    break
+            self.total_size = total
+
+    def clear(self):
+        """Remove every cached object, manifest and statistic"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        with self.lock:
+            self.total_size = 0
+            self.pending_stats = {}
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---------------------------------------------------------- statistics
+
+    def record(self, outcome):
+        """Count a hit or miss; counts are written every STATS_FLUSH_EVERY lookups"""
+        with self.lock:
+            self.pending_stats[outcome] = self.pending_stats.get(outcome, 0) + 1
+            if sum(self.pending_stats.values()) >= STATS_FLUSH_EVERY:
+                self.write_stats()
+
+    def flush(self):
+        """Write counts not yet in stats.json"""
+        with self.lock:
+            self.write_stats()
+
+    def write_stats(self):
+        """Add pending counts to stats.json; caller holds the lock"""
+        if not self.pending_stats:
+            return
+        stats = self.stored_stats()
+        for outcome, count in self.pending_stats.items():
+            stats[outcome] = stats.get(outcome, 0) + count
+        try:
+            self.write_json(self.stats_file, stats)
+        except OSError:
+            return
+        self.pending_stats = {}
+
+    def stored_stats(self):
+        """Return the counts in stats.json"""
+        try:
+            with open(self.stats_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def stats(self):
+        """Return persistent cache statistics, including counts not yet written"""
+        stats = self.stored_stats()
+        with self.lock:
+            for outcome, count in self.pending_stats.items():
+                stats[outcome] = stats.get(outcome, 0) + count
+        return stats
+
+    def summary(self):
+        """Return statistics including current size"""
+        entries = self.entries()
+        stats = self.stats()
+        stats.update({
+            "entries": len(entries),
+            "size_mb": round(sum(size for _, size, _ in entries) / (1024 * 1024), 2),
+            "max_size_mb": round(self.max_size / (1024 * 1024), 2),
+            "cache_dir": str(self.cache_dir)
+        })
+        return stats
+
+    # ------------------------------------------------------------- compile
+
+    def run(self, argv, cwd, compile_func):
+        """Run a compile through the cache
+
+        compile_func() performs the real compile and returns
+        (returncode, stdout, stderr). Returns (returncode, stdout, stderr, outcome)
+        where outcome is "hit", "miss" or "skip".
+        """
+        output_file = output_path_of(argv)
+        if not output_file:
+            returncode, stdout, stderr = compile_func()
+            return returncode, stdout, stderr, "skip"
+        output_file = os.path.join(cwd or "", output_file)
+        depfile = depfile_of(argv)
+        if depfile:
+            depfile = os.path.join(cwd or "", depfile)
+
+        direct_key = self.direct_key(argv, cwd)
+        key = self.lookup_manifest(direct_key, cwd)
+        included = None
+        if key is None:
+            key, included = self.preprocessed_key(argv, cwd)
+
+        if key is not None:
+            meta = self.restore(key, output_file, depfile)
+            if meta is not None:
+                if included is not None:
+                    self.write_manifest(direct_key, key, included, cwd)
+                self.record("hits")
+                return 0, meta.get("stdout", ""), meta.get("stderr", ""), "hit"
+
+        returncode, stdout, stderr = compile_func()
+        self.record("misses")
+        if returncode == 0 and key is not None and os.path.isfile(output_file):
+            self.store(key, output_file, stdout, stderr, depfile)
+            if included is not None:
+                self.write_manifest(direct_key, key, included, cwd)
+        return returncode, stdout, stderr, "miss"
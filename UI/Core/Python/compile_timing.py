@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Per-phase compile timing
+Collects GCC -ftime-report tables and Clang -ftime-trace files, breaks each
+translation unit down into setup, preprocessing, parsing, template
+instantiation, optimization/codegen and link time, and aggregates a target's
+units with its most expensive headers and templates
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+
+import flamegraph
+
+# " phase parsing      :   0.66 ( 16%)   0.37 ( 42%)   1.07 ( 21%)    77M ( 34%)"
+TIME_REPORT_RE = re.compile(
+    r"^\s*(?P<name>[^:\n]*?\S)\s*:\s*(?P<usr>\d+\.\d+)\s*(?:\(\s*\d+%\))?\s*"
+    r"(?P<sys>\d+\.\d+)\s*(?:\(\s*\d+%\))?\s*(?P<wall>\d+\.\d+)"
+)
+
+CATEGORIES = ("setup", "preprocessing", "parsing", "template instantiation",
+              "optimization & codegen", "link")
+TOP = 10
+
+# GCC timevars of the C++ front end; everything else is middle/back end work
+FRONTEND_PREFIXES = ("parser", "name lookup", "overload resolution", "constant expression",
+                     "constraint", "template", "lexical analysis", "preprocessing",
+                     "mangling")
+
+# GCC timers that run around other timers ("callgraph functions expansion")
+UMBRELLA_PREFIXES = ("callgraph ",)
+
+# Clang trace events that are whole-compile summaries, not spans
+CLANG_SUMMARY_PREFIX = "Total "
+CLANG_TEMPLATE_EVENTS = ("InstantiateClass", "InstantiateFunction")
+
+
+def timing_flags(version, trace_file):
+    """Flags that make the compiler report its phase timings
+
+    version is the first line of `compiler --version`. GCC prints a table on
+    stderr; Clang writes a Chrome trace to trace_file.
+    """
+    if not version:
+        return []
+    if "clang" in version.lower():
+        return [f"-ftime-trace={trace_file}", "-ftime-trace-granularity=100"]
+    return ["-ftime-report"]
+
+
+def gcc_category(item):
+    """Category of one GCC timevar"""
+    if item == "preprocessing":
+        return "preprocessing"
+    if item == "template instantiation":
+        return "template instantiation"
+    if item.startswith(FRONTEND_PREFIXES):
+        return "parsing"
+    return "optimization & codegen"
+
+
+def parse_time_report(text):
+    """Parse a GCC -ftime-report table from stderr; None if there is none
+
+    Returns {"total", "categories", "stacks"} with times in seconds and
+    stacks as collapsed "category;timevar" -> microseconds.
+    """
+    if "Time variable" not in text:
+        return None
+    categories = dict.fromkeys(CATEGORIES, 0.0)
+    stacks = {}
+    phases = {}
+    total = 0.0
+    for line in text[text.index("Time variable"):].split("\n")[1:]:
+        match = TIME_REPORT_RE.match(line)
+        if not match:
+            if line.strip() and not line.startswith(" "):
+                break
+            continue
+        name = match.group("name")
+        wall = float(match.group("wall"))
+        if name == "TOTAL":
+            total = wall
+        elif name.startswith("phase "):
+            phases[name[len("phase "):]] = wall
+        elif not name.startswith("|") and not name.startswith(UMBRELLA_PREFIXES):
+            # "|name lookup" rows and umbrella timers overlap the others and are left out
+            category = gcc_category(name)
+            categories[category] += wall
+            stacks[f"{category};{name}"] = stacks.get(f"{category};{name}", 0) + int(wall * 1e6)
+    # GCC rounds each timevar to 10 ms; the phases add up to the real total
+    setup = phases.get("setup", 0.0) + phases.get("finalize", 0.0)
+    if setup:
+        categories["setup"] += setup
+        stacks["setup"] = int(setup * 1e6)
+    return {"total": total or sum(phases.values()), "categories": categories, "stacks": stacks,
+            "headers": {}, "templates": {}}
+
+
+def parse_time_trace(filename):
+    """Parse a Clang -ftime-trace file; None if it cannot be read"""
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            events = json.load(f).get("traceEvents", [])
+    except Exception:
+        return None
+
+    spans = []
+    summary = {}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        name = event.get("name", "")
+        if name.startswith(CLANG_SUMMARY_PREFIX):
+            summary[name[len(CLANG_SUMMARY_PREFIX):]] = event.get("dur", 0) / 1e6
+        else:
+            spans.append(event)
+
+    headers = {}
+    templates = {}
+    for event in spans:
+        detail = (event.get("args") or {}).get("detail", "")
+        if event["name"] == "Source" and detail:
+            headers[detail] = headers.get(detail, 0.0) + event.get("dur", 0) / 1e6
+        elif event["name"] in CLANG_TEMPLATE_EVENTS and detail:
+            templates[detail] = templates.get(detail, 0.0) + event.get("dur", 0) / 1e6
+
+    total = summary.get("ExecuteCompiler", 0.0)
+    frontend = summary.get("Frontend", 0.0)
+    backend = summary.get("Backend", 0.0)
+    instantiation = sum(summary.get(name, 0.0) for name in CLANG_TEMPLATE_EVENTS)
+    categories = dict.fromkeys(CATEGORIES, 0.0)
+    categories["template instantiation"] = min(instantiation, frontend)
+    categories["parsing"] = frontend - categories["template instantiation"]
+    categories["optimization & codegen"] = backend
+    categories["setup"] = max(0.0, total - frontend - backend)
+    return {"total": total, "categories": categories, "stacks": trace_stacks(spans),
+            "headers": headers, "templates": templates}
+
+
+def trace_stacks(spans):
+    """Collapsed stacks of self time from nested trace spans"""
+    stacks = {}
+    open_spans = []
+    for event in sorted(spans, key=lambda item: (item.get("ts", 0), -item.get("dur", 0))):
+        start = event.get("ts", 0)
+        while open_spans and start >= open_spans[-1][1]:
+            open_spans.pop()
+        detail = (event.get("args") or {}).get("detail", "")
+        label = f"{event['name']} {os.path.basename(detail) if event['name'] == 'Source' else detail}".strip()
+        label = label.replace(";", ",")
+        path = (open_spans[-1][0] + ";" if open_spans else "") + label
+        duration = event.get("dur", 0)
+        stacks[path] = stacks.get(path, 0) + duration
+        if open_spans:
+            # Charge the child's time to itself, not to its parent
+            parent = open_spans[-1][0]
+            stacks[parent] = stacks.get(parent, 0) - duration
+        open_spans.append((path, start + duration))
+    return {path: value for path, value in stacks.items() if value > 0}
+
+
+def read_step_timing(step, stderr, duration):
+    """Timing of one compile step run with timing_flags, or None"""
+    spec = step.timing or {}
+    if spec.get("format") == "trace":
+        timing = parse_time_trace(spec["file"])
+    else:
+        timing = parse_time_report(stderr)
+    if timing is None:
+        return None
+    timing["unit"] = spec.get("unit", "")
+    # A compile that also links: the rest of the step is driver and linker time
+    if spec.get("links"):
+        timing["categories"]["link"] = max(0.0, duration - timing["total"])
+        timing["total"] = max(timing["total"], duration)
+    return timing
+
+
+class TimingReport:
+    """Per-phase timing of one target, summed over its translation units"""
+
+    def __init__(self, target):
+        self.target = target
+        self.categories = dict.fromkeys(CATEGORIES, 0.0)
+        self.units = {}
+        self.headers = {}
+        self.templates = {}
+        self.stacks = {}
+
+    def add_unit(self, unit, timing):
+        """Add the timing of one translation unit"""
+        name = Path(unit).name.replace(";", ",")
+        self.units[unit] = timing["total"]
+        for category, seconds in timing["categories"].items():
+            self.categories[category] += seconds
+        for key, table in (("headers", self.headers), ("templates", self.templates)):
+            for item, seconds in timing[key].items():
+                table[item] = table.get(item, 0.0) + seconds
+        for stack, value in timing["stacks"].items():
+            path = f"{self.target};{name};{stack}"
+            self.stacks[path] = self.stacks.get(path, 0) + value
+        if timing["categories"].get("link"):
+            path = f"{self.target};{name};link"
+            self.stacks[path] = self.stacks.get(path, 0) + int(timing["categories"]["link"] * 1e6)
+
+    def add_link(self, seconds):
+        """Add the duration of the target's link or archive step"""
+        self.categories["link"] += seconds
+        path = f"{self.target};link"
+        self.stacks[path] = self.stacks.get(path, 0) + int(seconds * 1e6)
+
+    def total(self):
+        """Seconds spent in all phases"""
+        return sum(self.categories.values())
+
+    def top(self, table, count=TOP):
+        """Most expensive entries of a table as (name, seconds)"""
+        return sorted(table.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def to_dict(self, count=TOP):
+        """JSON-serialisable summary"""
+        return {
+            "target": self.target,
+            "total": round(self.total(), 4),
+            "phases": {name: round(seconds, 4) for name, seconds in self.categories.items()},
+            "units": {name: round(seconds, 4) for name, seconds in self.top(self.units, len(self.units))},
+            "headers": [[name, round(seconds, 4)] for name, seconds in self.top(self.headers, count)],
+            "templates": [[name, round(seconds, 4)] for name, seconds in self.top(self.templates, count)]
+        }
+
+    def summary_lines(self, count=TOP):
+        """Human-readable breakdown for build output"""
+        total = self.total() or 1.0
+        lines = [f"⏱️ Compile time for {self.target}: {self.total():.2f}s"]
+        for name, seconds in self.categories.items():
+            if seconds:
+                lines.append(f"   {name:<24} {seconds:8.2f}s {100 * seconds / total:5.1f}%")
+        for title, table in (("Slowest units", self.units), ("Most expensive headers", self.headers),
+                             ("Most expensive templates", self.templates)):
+            entries = self.top(table, count)
+            if entries:
+                lines.append(f"   {title}:")
+                lines.extend(f"     {seconds:8.3f}s  {name}" for name, seconds in entries)
+        if not self.headers and not self.templates:
+            lines.append("   (header and template costs need Clang -ftime-trace)")
+        return lines
+
+    def write_flamegraph(self, filename):
+        """Write the timing as an SVG flamegraph (microseconds)"""
+        return flamegraph.write_svg(filename, self.stacks, f"Compile time: {self.target}", " us")
@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+"""
+crypto-build - headless command line front end for the Crypto++ build engine
+Reads compiler_config_linux.json and prints build results as JSON
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import sys
+
+from build_engine import (BuildEngine, BuildOptions, BuildError, load_config, SOURCE_SEPARATOR,
+                          LANGUAGES, COMPILERS, BUILD_TYPES, LIBRARIES, build_profile_steps)
+from batch_build import BatchBuilder, expand_sources, default_jobs, engine_build_func
+from build_matrix import (BuildMatrix, expand_matrix, format_table, cell_title,
+                          MATRIX_COMPILERS, MATRIX_OPT_LEVELS, MATRIX_LIBRARIES)
+from build_targets import TARGETS_FILE, load_targets, select_targets, build_target
+from ninja_export import NINJA_FILE, NinjaGenerator, write_if_changed, run_ninja
+from symbol_index import SymbolIndex, apply_suggestions
+from build_history import (BuildHistory, REGRESSION_THRESHOLD, WINDOW_DAYS, METRICS, COUNT_THRESHOLD,
+                           target_name)
+from build_estimate import DurationModel, SOURCE_SUFFIXES
+from build_trace import span, start_tracing, flush_trace
+from run_benchmark import Benchmark, Comparison
+from runtime_profile import Profiler, InstructionCounter, PROFILERS
+
+
+def choice_list(values):
+    """Comma separated list of case-insensitive choices"""
+    convert = choice(values)
+    return lambda text: [convert(item.strip()) for item in text.split(",") if item.strip()]
+
+
+def choice(values):
+    """Case-insensitive argparse choice mapping to the canonical spelling"""
+    lookup = {value.lower(): value for value in values}
+
+    def convert(text):
+        try:
+            return lookup[text.lower()]
+        except KeyError:
+            raise argparse.ArgumentTypeError(
+                f"invalid choice: {text!r} (choose from {', '.join(values)})")
+    return convert
+
+
+def add_build_options(parser):
+    """Add the language/compiler/library/build-type options shared by subcommands"""
+    parser.add_argument("--language", type=choice(LANGUAGES), default="C++")
+    parser.add_argument("--compiler", type=choice(COMPILERS), default="GCC")
+    parser.add_argument("--build-type", type=choice(BUILD_TYPES), default="Executable")
+    parser.add_argument("--library", type=choice(LIBRARIES), default="None")
+    parser.add_argument("--no-debug", dest="debug", action="store_false",
+                        help="do not pass -g -ggdb")
+    parser.add_argument("--no-optimize", dest="optimize", action="store_false",
+                        help="build with -O0 -DDEBUG instead of -O3 -DNDEBUG")
+    parser.add_argument("--verbose", action="store_true", help="pass -v to the compiler")
+    parser.add_argument("--pic", action="store_true", help="pass -fPIC")
+    parser.add_argument("--run", dest="auto_run", action="store_true",
+                        help="run the executable after a successful build")
+    parser.add_argument("--time-report", action="store_true",
+                        help="collect per-phase compile timing (GCC -ftime-report, Clang -ftime-trace)")
+
+
+def options_from_args(args):
+    """Create BuildOptions from parsed arguments"""
+    return BuildOptions(
+        language=args.language,
+        compiler=args.compiler,
+        build_type=args.build_type,
+        library=args.library,
+        debug=args.debug,
+        optimize=args.optimize,
+        verbose=args.verbose,
+        pic=args.pic,
+        auto_run=args.auto_run,
+        time_report=args.time_report
+    )
+
+
+def print_json(data):
+    """Print a result as JSON on stdout"""
+    json.dump(data, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+
+
+def print_json_line(data):
+    """Print one streamed JSON Lines record and flush it"""
+    sys.stdout.write(json.dumps(data, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def cmd_build(args, engine):
+    """Build one target from one or more source files"""
+    options = options_from_args(args)
+    output_file = args.output or engine.default_output_file(options, args.inputs[0])
+    steps = engine.generate_steps(options, args.inputs, output_file)
+    inputs = SOURCE_SEPARATOR.join(args.inputs)
+
+    if args.dry_run:
+        print_json({
+            "input": inputs,
+            "output": output_file,
+            "options": options.to_dict(),
+            "command": engine.format_command(steps)
+        })
+        return 0
+
+    jobs = args.jobs or default_jobs(engine.config)
+    history = BuildHistory.from_config(engine.config)
+    estimate, basis = DurationModel(history).predict(args.inputs, output_file, options.compiler,
+                                                     options.to_dict(), jobs)
+    result = engine.execute(steps, jobs)
+    fixes = None
+    if args.fix and not result.success and not result.error:
+        # Look up the missing symbols/headers and retry once with the suggested flags
+        index = SymbolIndex.from_config(engine.config)
+        if index is not None:
+            index.refresh()
+            suggestions = index.diagnose(result.stderr)
+            added = apply_suggestions(steps, suggestions)
+            fixes = {"suggestions": suggestions, "added_flags": added}
+            if added:
+                result = engine.execute(steps, jobs)
+
+    if history is not None:
+        history.record(result, steps, args.inputs, output_file, options.compiler,
+                       engine.compiler_version(steps[0].argv[0]), options.to_dict(), origin="cli")
+
+    data = result.to_dict()
+    data.update({"input": inputs, "output": output_file, "options": options.to_dict(),
+                 "estimate": {"seconds": round(estimate, 4), "basis": basis}})
+    if fixes is not None:
+        data["fixes"] = fixes
+    if args.flamegraph and result.timing is not None:
+        data["flamegraph"] = result.timing.write_flamegraph(args.flamegraph)
+    print_json(data)
+    return 0 if result.success else 1
+
+
+def cmd_target(args, engine):
+    """Build targets from a targets file, streaming one JSON line per target"""
+    options = options_from_args(args)
+    targets = select_targets(load_targets(args.file), args.names)
+    jobs = args.jobs or default_jobs(engine.config)
+
+    failed = 0
+    for target in targets:
+        data = build_target(engine, target, options, jobs)
+        failed += 0 if data["success"] else 1
+        print_json_line(data)
+    print_json_line({"summary": {"total": len(targets), "failed": failed}})
+    return 0 if failed == 0 else 1
+
+
+def plan_target_steps(engine, options, sources, output_file):
+    """Per-object steps from the engine config or a LinuxCompilerConfig profile"""
+    sources = [os.path.abspath(source) for source in sources]
+    if isinstance(engine.config.get("compilers"), dict):
+        # ~/.config/crypto-compiler/config.json written by the Simple GUI
+        steps, _ = build_profile_steps(engine.config, options.compiler.lower(), options.library,
+                                       sources, options.build_type.lower().replace(" ", "_"),
+                                       "release" if options.optimize else "debug",
+                                       output_file=output_file, per_object=True)
+        return steps
+    return engine.generate_target_steps(options, sources, output_file)
+
+
+def cmd_ninja(args, engine):
+    """Write build.ninja for source files or a targets file, optionally running ninja"""
+    options = options_from_args(args).copy(auto_run=False)
+    ninja_file = os.path.abspath(args.output)
+    # PCH, cache and up-to-date checks are the engine's; ninja brings its own
+    planner = BuildEngine(engine.config, use_cache=False, use_pch=False, incremental=False)
+    generator = NinjaGenerator(os.path.dirname(ninja_file))
+
+    inputs = [os.path.abspath(args.config)] if os.path.exists(args.config) else []
+    if args.sources:
+        output_file = args.target_output or engine.default_output_file(options, args.sources[0])
+        generator.add_steps(plan_target_steps(planner, options, args.sources, output_file))
+    else:
+        for target in select_targets(load_targets(args.file), args.names):
+            target_options = target.options(options)
+            generator.add_steps(plan_target_steps(planner, target_options, target.sources(),
+                                                  target.output_file(target_options.compiler)))
+        inputs.append(os.path.abspath(args.file))
+
+    # Re-running this command refreshes build.ninja when the config or targets change
+    argv = [arg for arg in args.argv if arg not in ("-x", "--execute")]
+    regenerate = f"cd {shlex.quote(os.getcwd())} && " + shlex.join(
+        [sys.executable, os.path.abspath(__file__)] + argv)
+    text = generator.generate(regenerate, inputs, ninja_file)
+    report = {
+        "ninja_file": ninja_file,
+        "written": write_if_changed(ninja_file, text),
+        "targets": generator.defaults
+    }
+
+    if args.execute:
+        ninja = shutil.which(engine.config.get("ninja_path") or "ninja")
+        if not ninja:
+            raise BuildError("ninja not found; install ninja-build or set ninja_path")
+        returncode, output, command, up_to_date = run_ninja(
+            ninja, ninja_file, args.jobs or default_jobs(engine.config))
+        report.update({"command": command, "returncode": returncode,
+                       "up_to_date": up_to_date, "output": output})
+        print_json(report)
+        return 0 if returncode == 0 else 1
+
+    print_json(report)
+    return 0
+
+
+def cmd_batch(args, engine):
+    """Build many sources concurrently, streaming one JSON line per job"""
+    options = options_from_args(args)
+    sources = expand_sources(args.sources, args.root)
+    if not sources:
+        raise BuildError("No source files matched")
+
+    builder = BatchBuilder(args.jobs or default_jobs(engine.config))
+    history = BuildHistory.from_config(engine.config)
+    model = DurationModel(history)
+    estimates = {source: model.predict([source], engine.default_output_file(options, source),
+                                       options.compiler, options.to_dict())[0]
+                 for source in sources}
+    summary = builder.run(sources, engine_build_func(engine, options, history), print_json_line,
+                          estimates)
+    print_json_line({"summary": summary})
+    return 0 if summary["failed"] == 0 else 1
+
+
+def cmd_matrix(args, engine):
+    """Build one source for every compiler/optimization/library combination"""
+    options = options_from_args(args)
+    cells = expand_matrix(args.compilers, args.opt_levels, args.libraries)
+    matrix = BuildMatrix(engine.config, args.jobs or default_jobs(engine.config),
+                         use_cache=args.cache)
+    rows, summary = matrix.run(args.input, cells, options)
+
+    if args.table:
+        print(format_table(rows))
+    else:
+        print_json({"input": args.input, "cells": rows, "summary": summary})
+    return 0 if summary["failed"] == 0 else 1
+
+
+def cmd_pch(args, engine):
+    """List, clear or time precompiled headers"""
+    if engine.pch is None:
+        print_json({"enabled": False})
+        return 0
+    if args.action == "list":
+        print_json(engine.pch.list())
+        return 0
+    if args.action == "clear":
+        engine.pch.clear()
+        print_json({"cleared": str(engine.pch.pch_dir)})
+        return 0
+
+    # report: compile the same source without and with the PCH, cache disabled
+    if not args.input:
+        raise BuildError("pch report needs an input file")
+    options = options_from_args(args).copy(auto_run=False)
+    output_file = args.output or engine.default_output_file(options, args.input)
+
+    plain = BuildEngine(engine.config, use_cache=False, use_pch=False, incremental=False)
+    with_pch = BuildEngine(engine.config, use_cache=False, incremental=False)
+    without = plain.execute(plain.generate_steps(options, args.input, output_file))
+    first = with_pch.execute(with_pch.generate_steps(options, args.input, output_file))
+    warm = with_pch.execute(with_pch.generate_steps(options, args.input, output_file))
+
+    pch_status = first.steps[0].get("pch") if first.steps else None
+    report = {
+        "input": args.input,
+        "success": without.success and warm.success,
+        "pch": pch_status,
+        "without_pch": round(without.duration, 4),
+        "first_with_pch": round(first.duration, 4),
+        "with_pch": round(warm.duration, 4),
+        "speedup": round(without.duration / warm.duration, 2) if warm.duration > 0 else None
+    }
+    if pch_status is None:
+        report["note"] = "no Crypto++/OpenSSL headers found for the selected library"
+    print_json(report)
+    return 0 if report["success"] else 1
+
+
+def cmd_cache(args, engine):
+    """Show or clear the compile cache"""
+    if engine.cache is None:
+        print_json({"enabled": False})
+        return 0
+    if args.clear:
+        engine.cache.clear()
+    print_json(engine.cache.summary())
+    return 0
+
+
+def cmd_index(args, engine):
+    """Refresh the header/symbol index or look up a symbol or header"""
+    index = SymbolIndex.from_config(engine.config)
+    if index is None:
+        print_json({"enabled": False})
+        return 0
+    if args.action == "refresh":
+        report = index.refresh()
+        report.update(index.stats())
+        print_json(report)
+        return 0
+    if args.action == "stats":
+        print_json(index.stats())
+        return 0
+
+    if not args.name:
+        raise BuildError(f"index {args.action} needs a name")
+    index.refresh()
+    matches = index.find_symbol(args.name) if args.action == "symbol" else index.find_header(args.name)
+    print_json({args.action: args.name, "matches": matches})
+    return 0 if matches else 1
+
+
+def cmd_history(args, engine):
+    """List recorded builds, benchmarks, a target's per-day trend, or regressions"""
+    history = BuildHistory.from_config(engine.config)
+    if history is None:
+        print_json({"enabled": False})
+        return 0
+    if args.action == "list":
+        print_json({"builds": history.runs(args.target, args.compiler, args.days, args.limit)})
+        return 0
+    if args.action == "targets":
+        print_json({"targets": [{"target": target, "compiler": compiler, "builds": count, "last": last}
+                                for target, compiler, count, last in history.targets()]})
+        return 0
+    if args.action == "trend":
+        if not args.target:
+            raise BuildError("history trend needs --target")
+        print_json({"target": args.target, "compiler": args.compiler,
+                    "trend": history.trend(args.target, args.compiler, args.days or 30)})
+        return 0
+    if args.action == "counts":
+        print_json({"counts": history.instruction_counts(args.target, args.days, args.limit)})
+        return 0
+    if args.action == "benchmarks":
+        print_json({"benchmarks": history.benchmarks(args.target, args.stable, args.days, args.limit)})
+        return 0
+    if args.action == "clear":
+        history.clear()
+        print_json({"cleared": True})
+        return 0
+
+    regressions = history.regressions(args.threshold, args.days or WINDOW_DAYS, args.metric,
+                                      args.target, args.compiler)
+    print_json({"regressions": regressions})
+    return 1 if regressions else 0
+
+
+def cmd_bench(args, engine):
+    """Run a built executable repeatedly and report runtime statistics"""
+    if not os.path.isfile(args.executable):
+        raise BuildError(f"Executable not found: {args.executable}")
+    benchmark = Benchmark.from_config(engine.config, [os.path.abspath(args.executable)] + args.args)
+    if args.runs is not None:
+        benchmark.runs = max(1, args.runs)
+    if args.warmup is not None:
+        benchmark.warmup = max(0, args.warmup)
+    if args.timeout is not None:
+        benchmark.timeout = args.timeout or None
+    report = benchmark.run()
+    history = BuildHistory.from_config(engine.config)
+    if history is not None and report["runs"]:
+        history.record_benchmark(report, origin="cli")
+    if not args.samples:
+        del report["samples"]
+    if not args.output:
+        del report["output"]
+    print_json(report)
+    return 0 if report["runs"] and not report["failures"] else 1
+
+
+def cmd_compare(args, engine):
+    """Interleave runs of several builds of one program and compare their speed"""
+    if all(name.lower().endswith(SOURCE_SUFFIXES) for name in args.inputs):
+        # Build the source once per compiler/optimization combination first
+        cells = expand_matrix(args.compilers, args.opt_levels, [args.library])
+        matrix = BuildMatrix(engine.config, args.jobs or default_jobs(engine.config))
+        rows, _ = matrix.run(SOURCE_SEPARATOR.join(args.inputs), cells, options_from_args(args))
+        failed = [row["cell"] for row in rows if not row["success"]]
+        if failed:
+            raise BuildError(f"Build failed for {', '.join(failed)}")
+        variants = [(cell_title(row), [os.path.abspath(row["output"])] + args.arg) for row in rows]
+        name = target_name(args.inputs, None)
+    else:
+        missing = [name for name in args.inputs if not os.path.isfile(name)]
+        if missing:
+            raise BuildError(f"Executable not found: {', '.join(missing)}")
+        labels = args.labels.split(",") if args.labels else [os.path.basename(name) for name in args.inputs]
+        if len(labels) != len(args.inputs):
+            raise BuildError("--labels needs one name per executable")
+        variants = [(label.strip(), [os.path.abspath(name)] + args.arg)
+                    for label, name in zip(labels, args.inputs)]
+        name = args.name
+
+    if len(variants) < 2:
+        raise BuildError("compare needs at least two variants")
+    comparison = Comparison.from_config(engine.config, variants, name=name)
+    comparison.metric = args.metric
+    if args.runs is not None:
+        comparison.runs = max(1, args.runs)
+    if args.warmup is not None:
+        comparison.warmup = max(0, args.warmup)
+    print_json(comparison.run())
+    return 0
+
+
+def cmd_profile(args, engine):
+    """Profile one run of a built executable and write its flamegraph"""
+    if not os.path.isfile(args.executable):
+        raise BuildError(f"Executable not found: {args.executable}")
+    executable = os.path.abspath(args.executable)
+    profiler = Profiler.from_config(engine.config, [executable] + args.args, args.tool, args.output_dir,
+                                    cwd=os.path.dirname(executable))
+    if args.top is not None:
+        profiler.top = args.top
+    report = profiler.run()
+    print_json(report)
+    return 0 if report["error"] is None else 1
+
+
+def cmd_counts(args, engine):
+    """Count instructions and cache misses of one run with cachegrind and check for regressions"""
+    if args.input.lower().endswith(SOURCE_SUFFIXES):
+        # Build the source first, like 'build', so CI can point at lab sources directly
+        options = options_from_args(args)
+        executable = engine.default_output_file(options, args.input)
+        result = engine.execute(engine.generate_steps(options, [args.input], executable))
+        if not result.success:
+            raise BuildError(f"Build of {args.input} failed: {result.error or result.stderr.strip()}")
+    elif os.path.isfile(args.input):
+        executable = args.input
+    else:
+        raise BuildError(f"Executable not found: {args.input}")
+
+    executable = os.path.abspath(executable)
+    cwd = os.path.dirname(os.path.abspath(args.input)) if args.source_dir else os.path.dirname(executable)
+    counter = InstructionCounter.from_config(engine.config, [executable] + args.args, cwd,
+                                             os.path.abspath(args.stdin) if args.stdin else None)
+    report = counter.run()
+    if report["error"] is not None:
+        raise BuildError(report["error"])
+
+    history = BuildHistory.from_config(engine.config)
+    regressions = []
+    if history is not None and report["returncode"] == 0:
+        threshold = args.threshold
+        if threshold is None:
+            threshold = engine.config.get("instruction_regression_threshold", COUNT_THRESHOLD)
+        regressions = history.count_regressions(threshold, args.name or os.path.basename(executable),
+                                                latest=report)
+        if args.record:
+            history.record_counts(report, args.name, origin="cli")
+    report["regressions"] = regressions
+    print_json(report)
+    return 1 if regressions or report["returncode"] != 0 else 0
+
+
+def build_parser():
+    """Create the argument parser"""
+    parser = argparse.ArgumentParser(prog="crypto-build",
+                                     description="Headless Crypto++/OpenSSL build tool")
+    parser.add_argument("--config", default="compiler_config_linux.json",
+                        help="configuration file (default: %(default)s)")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="bypass the compile cache")
+    parser.add_argument("--force", dest="incremental", action="store_false",
+                        help="rebuild even when outputs are up to date")
+    parser.add_argument("--trace", metavar="JSON",
+                        help="write a Chrome trace (chrome://tracing, Perfetto) of every step")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="build one executable or library from source files")
+    build.add_argument("inputs", nargs="+", metavar="input",
+                       help="source files; several sources compile to objects and link once")
+    build.add_argument("-o", "--output", help="output file (default: <dir>/<compiler>/<name>_<compiler>)")
+    build.add_argument("-j", "--jobs", type=int,
+                       help="parallel object compiles (default: parallel_jobs from the config)")
+    build.add_argument("--dry-run", action="store_true", help="print the command without running it")
+    build.add_argument("--fix", action="store_true",
+                       help="on undefined references or missing headers, add the -I/-L/-l flags "
+                            "found in the symbol index and retry once")
+    build.add_argument("--flamegraph", metavar="SVG",
+                       help="with --time-report, write the compile phases as an SVG flamegraph")
+    add_build_options(build)
+    build.set_defaults(func=cmd_build)
+
+    target = subparsers.add_parser("target", help="build multi-source targets from a targets file")
+    target.add_argument("names", nargs="*", help="targets to build (default: all)")
+    target.add_argument("-f", "--file", default=TARGETS_FILE,
+                        help="targets file (default: %(default)s)")
+    target.add_argument("-j", "--jobs", type=int,
+                        help="parallel object compiles (default: parallel_jobs from the config)")
+    add_build_options(target)
+    target.set_defaults(func=cmd_target)
+
+    batch = subparsers.add_parser("batch", help="build many sources in parallel")
+    batch.add_argument("sources", nargs="+",
+                       help="source files, directories or globs such as 'zLab*/**/*.cpp'")
+    batch.add_argument("--root", default=".", help="directory globs are relative to")
+    batch.add_argument("-j", "--jobs", type=int,
+                       help="worker count (default: parallel_jobs from the config)")
+    add_build_options(batch)
+    batch.set_defaults(func=cmd_batch)
+
+    matrix = subparsers.add_parser("matrix", help="build every compiler x optimization x library combination")
+    matrix.add_argument("input", help="source file")
+    matrix.add_argument("--compilers", type=choice_list(MATRIX_COMPILERS), default=MATRIX_COMPILERS,
+                        help="comma separated (default: %(default)s)")
+    matrix.add_argument("--opt-levels", type=choice_list(MATRIX_OPT_LEVELS), default=["O0", "O2", "O3"],
+                        help="comma separated (default: %(default)s)")
+    matrix.add_argument("--libraries", type=choice_list(MATRIX_LIBRARIES), default=["None"],
+                        help="comma separated (default: %(default)s)")
+    matrix.add_argument("-j", "--jobs", type=int,
+                        help="worker count (default: parallel_jobs from the config)")
+    matrix.add_argument("--cache", action="store_true",
+                        help="allow compile cache hits (build times are then not comparable)")
+    matrix.add_argument("--table", action="store_true", help="print a text table instead of JSON")
+    add_build_options(matrix)
+    matrix.set_defaults(func=cmd_matrix)
+
+    pch = subparsers.add_parser("pch", help="manage precompiled headers and report their speedup")
+    pch.add_argument("action", choices=["report", "list", "clear"])
+    pch.add_argument("input", nargs="?", help="source file for 'report'")
+    pch.add_argument("-o", "--output", help="output file for 'report'")
+    add_build_options(pch)
+    pch.set_defaults(func=cmd_pch)
+
+    ninja = subparsers.add_parser("ninja", help="write build.ninja for sources or targets")
+    ninja.add_argument("names", nargs="*", help="targets from the targets file (default: all)")
+    ninja.add_argument("-f", "--file", default=TARGETS_FILE,
+                       help="targets file (default: %(default)s)")
+    ninja.add_argument("-s", "--sources", nargs="+",
+                       help="build one target from these sources instead of a targets file")
+    ninja.add_argument("--target-output", help="output file for --sources")
+    ninja.add_argument("-o", "--output", default=NINJA_FILE,
+                       help="ninja file to write (default: %(default)s)")
+    ninja.add_argument("-x", "--execute", action="store_true", help="run ninja after writing the file")
+    ninja.add_argument("-j", "--jobs", type=int,
+                       help="ninja -j (default: parallel_jobs from the config)")
+    add_build_options(ninja)
+    ninja.set_defaults(func=cmd_ninja)
+
+    index = subparsers.add_parser("index", help="header/symbol index for resolving library flags")
+    index.add_argument("action", choices=["refresh", "stats", "symbol", "header"])
+    index.add_argument("name", nargs="?", help="symbol or header to look up")
+    index.set_defaults(func=cmd_index)
+
+    history = subparsers.add_parser("history", help="recorded builds, trends and regressions")
+    history.add_argument("action", choices=["list", "targets", "trend", "regressions", "benchmarks",
+                                            "counts", "clear"])
+    history.add_argument("--target", help="source name of one-file builds (AES.cpp), else output name")
+    history.add_argument("--compiler", type=str.lower, help="gcc, clang, ...")
+    history.add_argument("--days", type=int,
+                         help="list/trend: look back this many days; regressions: window length "
+                              f"(default: {WINDOW_DAYS})")
+    history.add_argument("--limit", type=int, default=50, help="list: newest builds to show (default: %(default)s)")
+    history.add_argument("--metric", choices=list(METRICS), default="duration",
+                         help="regressions: value compared (default: %(default)s)")
+    history.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                         help="regressions: relative increase reported (default: %(default)s)")
+    history.add_argument("--stable", action="store_true",
+                         help="benchmarks: only runs without isolation warnings (governor, load, pinning)")
+    history.set_defaults(func=cmd_history)
+
+    bench = subparsers.add_parser("bench", help="run a built executable repeatedly and report runtime statistics")
+    bench.add_argument("executable", help="program to run")
+    bench.add_argument("args", nargs="*", help="arguments passed to the program, after --")
+    bench.add_argument("-n", "--runs", type=int, help="measured runs (default: benchmark_runs from the config)")
+    bench.add_argument("-w", "--warmup", type=int,
+                       help="unmeasured runs first (default: benchmark_warmup from the config)")
+    bench.add_argument("--timeout", type=float, help="seconds before a run is killed (0: no limit)")
+    bench.add_argument("--samples", action="store_true", help="include every run's measurements")
+    bench.add_argument("--output", action="store_true", help="include the first run's output")
+    bench.set_defaults(func=cmd_bench)
+
+    profile = subparsers.add_parser("profile", help="profile a built executable and write a flamegraph")
+    profile.add_argument("executable", help="program to profile")
+    profile.add_argument("args", nargs="*", help="arguments passed to the program, after --")
+    profile.add_argument("--tool", choices=["auto"] + list(PROFILERS),
+                         help="profiler (default: profile_tool from the config, auto tries perf then callgrind)")
+    profile.add_argument("--top", type=int, help="hot functions listed (default: profile_top from the config)")
+    profile.add_argument("-o", "--output-dir", help="where the SVG and tables go (default: next to the executable)")
+    profile.set_defaults(func=cmd_profile)
+
+    counts = subparsers.add_parser("counts", help="cachegrind instruction and cache-miss counts of one run, "
+                                                  "recorded in the history and checked for regressions")
+    counts.add_argument("input", help="executable, or a source file to build first")
+    counts.add_argument("args", nargs="*", help="arguments passed to the program, after --")
+    counts.add_argument("--stdin", metavar="FILE", help="file fed to the program's standard input")
+    counts.add_argument("--source-dir", action="store_true",
+                        help="run in the source's directory (for data files such as keydata.bin)")
+    counts.add_argument("--name", help="history target name (default: executable name)")
+    counts.add_argument("--threshold", type=float,
+                        help="relative increase reported as a regression "
+                             "(default: instruction_regression_threshold from the config)")
+    counts.add_argument("--no-record", dest="record", action="store_false",
+                        help="compare with the history without adding this run")
+    add_build_options(counts)
+    counts.set_defaults(func=cmd_counts)
+
+    compare = subparsers.add_parser("compare", help="interleaved A/B runtime comparison of builds of one program")
+    compare.add_argument("inputs", nargs="+",
+                         help="source files to build for every compiler/optimization combination, "
+                              "or two or more executables (the first is the baseline)")
+    compare.add_argument("--compilers", type=choice_list(MATRIX_COMPILERS), default=MATRIX_COMPILERS,
+                         help="comma separated (default: %(default)s)")
+    compare.add_argument("--opt-levels", type=choice_list(MATRIX_OPT_LEVELS), default=["O3"],
+                         help="comma separated (default: %(default)s)")
+    compare.add_argument("--labels", help="comma separated names of the executables")
+    compare.add_argument("--name", help="program name used in the report for executables")
+    compare.add_argument("--arg", action="append", default=[], help="argument passed to every run (repeatable)")
+    compare.add_argument("-n", "--runs", type=int,
+                         help="measured runs per variant (default: benchmark_runs from the config)")
+    compare.add_argument("-w", "--warmup", type=int,
+                         help="unmeasured rounds first (default: benchmark_warmup from the config)")
+    compare.add_argument("--metric", choices=["wall", "user", "sys"], default="wall",
+                         help="time compared (default: %(default)s)")
+    compare.add_argument("-j", "--jobs", type=int,
+                         help="parallel builds (default: parallel_jobs from the config)")
+    add_build_options(compare)
+    compare.set_defaults(func=cmd_compare)
+
+    cache = subparsers.add_parser("cache", help="show or clear compile cache statistics")
+    cache.add_argument("--clear", action="store_true", help="remove every cached object")
+    cache.set_defaults(func=cmd_cache)
+
+    return parser
+
+
+def main(argv=None):
+    """Main entry point"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    args.argv = list(sys.argv[1:] if argv is None else argv)
+    if args.trace:
+        start_tracing(args.trace)
+    engine = BuildEngine(load_config(args.config), use_cache=args.use_cache,
+                         incremental=args.incremental)
+
+    try:
+        with span(f"crypto-build {args.command}", "cli"):
+            return args.func(args, engine)
+    except BuildError as e:
+        print_json({"success": False, "error": str(e)})
+        return 2
+    finally:
+        flush_trace()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Incremental up-to-date checking for the build engine
+Compile steps emit -MMD -MF dependency files; a step is skipped when its output
+is newer than the source, every header and every linked library, and flags,
+toolchain and resolved libraries are unchanged
+"""
+
+import os
+import json
+import shutil
+import hashlib
+
+from compile_cache import compiler_version, linked_libraries, output_path_of
+from pch_manager import read_depfile
+
+
+def toolchain_fingerprint(tool):
+    """Identify a compiler or archiver by path, mtime and version banner"""
+    path = shutil.which(tool) or tool
+    try:
+        st = os.stat(path)
+        stamp = f"{path}:{st.st_mtime_ns}:{st.st_size}"
+    except OSError:
+        stamp = path
+    return hashlib.sha256(f"{stamp}\0{compiler_version(path)}".encode()).hexdigest()
+
+
+def command_hash(argv):
+    """Stable hash of the exact argv"""
+    return hashlib.sha256("\0".join(argv).encode()).hexdigest()
+
+
+class DependencyTracker:
+    """Decide whether compile, link and archive steps can be skipped"""
+
+    @classmethod
+    def from_config(cls, config):
+        """Create tracker from engine configuration, or None when disabled"""
+        if not config.get("incremental_enabled", True):
+            return None
+        return cls()
+
+    def resolve(self, path, cwd):
+        """Resolve a path relative to the step's working directory"""
+        return os.path.join(cwd or "", path)
+
+    def attach(self, step):
+        """Make a compile step write a dependency file next to its output"""
+        output_file = output_path_of(step.argv)
+        if step.kind != "compile" or not output_file or "-MF" in step.argv:
+            return None
+        depfile = f"{output_file}.d"
+        step.argv.extend(["-MMD", "-MF", depfile])
+        return depfile
+
+    def outputs_and_inputs(self, step):
+        """Return (output, inputs) for a compile, link or archive step, or (None, None)"""
+        if step.kind == "compile":
+            output_file = output_path_of(step.argv)
+            if not output_file or "-MF" not in step.argv:
+                return None, None
+            depfile = step.argv[step.argv.index("-MF") + 1]
+            try:
+                inputs = read_depfile(self.resolve(depfile, step.cwd))
+            except OSError:
+                return output_file, None
+            # Single-command builds compile and link, so their libraries count too
+            return output_file, inputs + linked_libraries(step.argv, step.cwd)
+        if step.kind == "link":
+            # Relinking is needed when any object or library is newer than the output
+            output_file = output_path_of(step.argv)
+            objects = [arg for arg in step.argv[1:]
+                       if not arg.startswith("-") and arg.endswith((".o", ".a", ".so"))]
+            libraries = linked_libraries(step.argv, step.cwd)
+            return (output_file, objects + libraries) if output_file else (None, None)
+        if step.kind == "archive" and len(step.argv) >= 4:
+            # ar rcs <archive> <objects...>
+            return step.argv[2], step.argv[3:]
+        return None, None
+
+    def info_file(self, output_file, cwd):
+        """Path of the build info stamp for an output"""
+        return self.resolve(f"{output_file}.buildinfo", cwd)
+
+    def check(self, step):
+        """Return (up_to_date, reason) for a step"""
+        output_file, inputs = self.outputs_and_inputs(step)
+        if output_file is None:
+            return False, "not tracked"
+        if inputs is None:
+            return False, "no dependency file yet"
+
+        output_path = self.resolve(output_file, step.cwd)
+        try:
+            output_mtime = os.stat(output_path).st_mtime_ns
+        except OSError:
+            return False, "output missing"
+
+        try:
+            with open(self.info_file(output_file, step.cwd), "r") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return False, "no build info"
+        if info.get("command") != command_hash(step.argv):
+            return False, "flags changed"
+        if info.get("toolchain") != toolchain_fingerprint(step.argv[0]):
+            return False, "toolchain changed"
+        if info.get("libraries", []) != linked_libraries(step.argv, step.cwd):
+            return False, "libraries changed"
+
+        for path in inputs:
+            try:
+                if os.stat(self.resolve(path, step.cwd)).st_mtime_ns > output_mtime:
+                    return False, f"{path} changed"
+            except OSError:
+                return False, f"{path} missing"
+        return True, "up to date"
+
+    def record(self, step):
+        """Remember flags, toolchain and resolved libraries after a successful step"""
+        output_file, _ = self.outputs_and_inputs(step)
+        if output_file is None:
+            return
+        try:
+            with open(self.info_file(output_file, step.cwd), "w") as f:
+                json.dump({"command": command_hash(step.argv),
+                           "toolchain": toolchain_fingerprint(step.argv[0]),
+                           "libraries": linked_libraries(step.argv, step.cwd)}, f)
+        except OSError:
+            pass
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Structured compiler diagnostics
+Reads GCC JSON and SARIF diagnostics, falling back to precompiled patterns for
+plain text, and builds file/line/column/severity records incrementally while a
+build is still streaming, in one pass over the output
+"""
+
+import json
+import re
+import threading
+
+# "file:line:col: error: message [-Wflag]" as printed by GCC and Clang
+DIAGNOSTIC_RE = re.compile(
+    r"^(?P<file>(?:[A-Za-z]:)?[^:\n]+?):(?P<line>\d+):(?:(?P<column>\d+):)?\s*"
+    r"(?P<severity>fatal error|error|warning|note)\s*:\s*(?P<message>.*?)"
+    r"(?:\s+\[(?P<option>-W[^\]]+)\])?$"
+)
+# MSVC: "file(line[,col]): error C2065: message"
+MSVC_RE = re.compile(
+    r"^(?P<file>[^(\n]+?)\((?P<line>\d+)(?:,(?P<column>\d+))?\)\s*:\s*"
+    r"(?P<severity>fatal error|error|warning)\s+(?P<option>[A-Z]+\d+)\s*:\s*(?P<message>.*)$"
+)
+# Lines that introduce the next diagnostic rather than stand alone
+CONTEXT_RE = re.compile(
+    r"^(?:In file included from .*"
+    r"|[^:\n]+: (?:In |At global scope).*:"
+    r"|.+?:\d+:\d+:\s+(?:recursively )?required (?:from|by) .*)$"
+)
+# Driver and linker messages without a line number: "g++: error: ...", "collect2: error: ..."
+TOOL_RE = re.compile(r"^(?P<file>[^:\s][^:\n]*?):\s+(?P<severity>fatal error|error|warning):\s+(?P<message>.*)$")
+LINKER_RE = re.compile(
+    r"^(?P<file>[^:\n]*):(?:\([^)\n]*\):)?\s*"
+    r"(?P<message>(?:undefined reference to |multiple definition of |cannot find -l).*)$"
+)
+
+SEVERITIES = ("fatal", "error", "warning", "note")
+ICONS = {"fatal": "💀", "error": "❌", "warning": "⚠️"}
+
+# Notes kept per diagnostic; template instantiation chains can be very long
+NOTE_LIMIT = 5
+SUMMARY_LIMIT = 10
+
+HINTS = (
+    ("cannot find -l", "Library not found - Install development package"),
+    ("no such file or directory", "Missing file/header - Check include paths or install package"),
+    ("file not found", "Missing file/header - Check include paths or install package"),
+    ("undefined reference", "Linking error - Check library paths (-L) and library names (-l)"),
+    ("permission denied", "Permission denied - Check file permissions (chmod +x)"),
+    ("syntax error", "Syntax error in source code"),
+)
+
+
+def diagnostics_flags(version, fmt="text"):
+    """Compiler flags asking for machine-readable diagnostics
+
+    version is the first line of `compiler --version`; fmt is "text", "auto",
+    "json" or "sarif". "text" adds nothing: GCC writes JSON and SARIF only when
+    it exits, so the first error would show up at the end of a long compile.
+    "auto" uses GCC JSON (9-12) or SARIF (13+) and keeps text for Clang, whose
+    SARIF output is still experimental.
+    """
+    if fmt == "text" or not version:
+        return []
+    clang = "clang" in version.lower()
+    if fmt == "sarif":
+        return ["-fdiagnostics-format=sarif"] if clang else ["-fdiagnostics-format=sarif-stderr"]
+    if clang:
+        return []
+    match = re.search(r"(\d+)\.\d+(?:\.\d+)?", version.split(")")[-1]) or re.search(r"(\d+)\.\d+", version)
+    major = int(match.group(1)) if match else 0
+    if fmt == "json":
+        return ["-fdiagnostics-format=json"] if major >= 9 else []
+    if major >= 13:
+        return ["-fdiagnostics-format=sarif-stderr"]
+    if major >= 9:
+        return ["-fdiagnostics-format=json"]
+    return []
+
+
+def normalize_severity(kind):
+    """Map GCC kinds and SARIF levels onto fatal/error/warning/note"""
+    kind = (kind or "").lower()
+    if kind.startswith("fatal"):
+        return "fatal"
+    if "error" in kind:
+        return "error"
+    if "warning" in kind:
+        return "warning"
+    return "note"
+
+
+def make_record(file, line, column, severity, message, option=None):
+    """One diagnostic as a dict"""
+    return {
+        "file": file,
+        "line": int(line) if line else None,
+        "column": int(column) if column else None,
+        "severity": severity,
+        "message": message,
+        "option": option,
+        "notes": []
+    }
+
+
+def location(record):
+    """file:line:column of a record, leaving out missing parts"""
+    parts = [record["file"] or "<unknown>"]
+    for key in ("line", "column"):
+        if record.get(key):
+            parts.append(str(record[key]))
+    return ":".join(parts)
+
+
+def format_record(record):
+    """A record rendered the way the compiler prints it in text mode"""
+    severity = "fatal error" if record["severity"] == "fatal" else record["severity"]
+    option = f" [{record['option']}]" if record.get("option") else ""
+    return f"{location(record)}: {severity}: {record['message']}{option}"
+
+
+def hint(record):
+    """Short advice for well-known failures, or None"""
+    message = record["message"].lower()
+    for needle, text in HINTS:
+        if needle in message:
+            return text
+    return None
+
+
+def json_depth(text, depth=0, in_string=False):
+    """Bracket depth after scanning text; returns (depth, in_string)"""
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+    return depth, in_string
+
+
+def gcc_records(items):
+    """Records from GCC -fdiagnostics-format=json output"""
+    records = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        caret = ((item.get("locations") or [{}])[0] or {}).get("caret", {})
+        record = make_record(caret.get("file"), caret.get("line"), caret.get("column"),
+                             normalize_severity(item.get("kind")), item.get("message", ""),
+                             item.get("option"))
+        records.append(record)
+        for child in gcc_records(item.get("children") or []):
+            records.append(child)
+    return records
+
+
+def sarif_records(document):
+    """Records from a SARIF log (GCC -fdiagnostics-format=sarif-stderr, Clang sarif)"""
+    records = []
+    for run in document.get("runs") or []:
+        for result in run.get("results") or []:
+            physical = ((result.get("locations") or [{}])[0] or {}).get("physicalLocation", {})
+            uri = physical.get("artifactLocation", {}).get("uri")
+            if uri and uri.startswith("file://"):
+                uri = uri[len("file://"):]
+            region = physical.get("region", {})
+            rule = result.get("ruleId")
+            records.append(make_record(uri, region.get("startLine"), region.get("startColumn"),
+                                       normalize_severity(result.get("level")),
+                                       result.get("message", {}).get("text", ""),
+                                       rule if rule and rule.startswith("-W") else None))
+            for related in result.get("relatedLocations") or []:
+                physical = related.get("physicalLocation", {})
+                region = physical.get("region", {})
+                records.append(make_record(physical.get("artifactLocation", {}).get("uri"),
+                                           region.get("startLine"), region.get("startColumn"),
+                                           "note", related.get("message", {}).get("text", "")))
+    return records
+
+
+class DiagnosticSet:
+    """Unique errors and warnings of a build, with repeat counts (thread-safe)
+
+    A diagnostic repeated for every template instantiation or translation unit
+    is stored once, keyed by location, severity and message; further copies
+    only raise its count. Notes of the first copy are kept as its example.
+    """
+
+    def __init__(self, note_limit=NOTE_LIMIT):
+        self.note_limit = note_limit
+        self.lock = threading.Lock()
+        self.records = []
+        self.by_key = {}
+        self.counts = dict.fromkeys(SEVERITIES, 0)
+        self.repeats = 0
+        # Bumped on every change so readers can tell when to refresh
+        self.version = 0
+
+    def add(self, record):
+        """Store a record; returns the stored record, or None for a repeat"""
+        key = (record["file"], record["line"], record["column"], record["severity"],
+               record["message"], record["option"])
+        with self.lock:
+            self.version += 1
+            existing = self.by_key.get(key)
+            if existing is not None:
+                existing["count"] += 1
+                self.repeats += 1
+                return None
+            record["count"] = 1
+            self.by_key[key] = record
+            self.records.append(record)
+            self.counts[record["severity"]] += 1
+            return record
+
+    def add_note(self, parent, note):
+        """Attach a note to the diagnostic it belongs to"""
+        with self.lock:
+            self.counts["note"] += 1
+            if len(parent["notes"]) < self.note_limit:
+                parent["notes"].append(format_record(note))
+
+    def total(self):
+        """Number of distinct errors and warnings"""
+        return len(self.records)
+
+    def errors(self):
+        """Fatal errors and errors, in output order"""
+        with self.lock:
+            return [record for record in self.records if record["severity"] != "warning"]
+
+    def summary(self, limit=SUMMARY_LIMIT):
+        """Summary entries as (text, details): counts, then errors and warnings
+
+        details are the notes of the first occurrence, for an expandable view.
+        """
+        with self.lock:
+            errors = self.counts["fatal"] + self.counts["error"]
+            warnings = self.counts["warning"]
+            repeats = self.repeats
+            # Errors first: warnings must not push them out of view
+            ordered = ([record for record in self.records if record["severity"] != "warning"]
+                       + [record for record in self.records if record["severity"] == "warning"])
+        if not ordered:
+            return []
+        header = f"{errors} error(s), {warnings} warning(s)"
+        if repeats:
+            header += f", {repeats} repeat(s) collapsed"
+        entries = [(header, [])]
+        for record in ordered[:limit]:
+            option = f" [{record['option']}]" if record.get("option") else ""
+            count = f" (×{record['count']})" if record["count"] > 1 else ""
+            entries.append((f"{ICONS[record['severity']]} {location(record)}: "
+                            f"{record['message']}{option}{count}", list(record["notes"])))
+            advice = hint(record)
+            if advice:
+                entries.append((f"   💡 {advice}", []))
+        if len(ordered) > limit:
+            entries.append((f"... and {len(ordered) - limit} more", []))
+        return entries
+
+
+class DiagnosticParser:
+    """Incremental diagnostics parser for one stream of compiler output
+
+    feed() takes chunks as they arrive and returns the text to display:
+    plain text passes through, JSON/SARIF documents are replaced by their
+    diagnostics in text form, and a repeated diagnostic is dropped together
+    with its context, source excerpt and notes. Diagnostics go to a
+    DiagnosticSet that several streams of one build may share.
+    """
+
+    def __init__(self, diagnostics=None):
+        self.diagnostics = diagnostics if diagnostics is not None else DiagnosticSet()
+        self.structured = False
+        self.partial = ""
+        self.json_lines = []
+        self.json_state = (0, False)
+        # "In file included from"/"In instantiation of" lines waiting for their diagnostic
+        self.context = []
+        # Diagnostic that following notes belong to; None after a repeat
+        self.current = None
+        self.suppressing = False
+
+    def feed(self, text):
+        """Parse a chunk; return the text to display for it"""
+        if not text:
+            return ""
+        if self.partial:
+            text = self.partial + text
+        lines = text.split("\n")
+        self.partial = lines.pop()
+        shown = [self.parse_line(line) for line in lines]
+        return "".join(line + "\n" for line in shown if line is not None)
+
+    def finish(self):
+        """Flush an unterminated last line, JSON document or context; return their display text"""
+        shown = []
+        if self.partial:
+            line, self.partial = self.partial, ""
+            shown.append(self.parse_line(line))
+        if self.json_lines:
+            # Not valid JSON after all: show and scan it as text
+            lines, self.json_lines = self.json_lines, []
+            self.json_state = (0, False)
+            shown.extend(self.parse_plain(line) for line in lines)
+        shown.extend(self.context)
+        self.context = []
+        return "".join(line + "\n" for line in shown if line is not None)
+
+    def parse_line(self, line):
+        """Parse one complete line; return the display text, or None when held back"""
+        if self.json_lines or line.startswith(("[{", '{"', "[]")) or line == "{":
+            self.json_lines.append(line)
+            self.json_state = json_depth(line, *self.json_state)
+            if self.json_state[0] > 0:
+                return None
+            return self.parse_json()
+        return self.parse_plain(line)
+
+    def parse_plain(self, line):
+        """Parse one line of text output; return the display text, or None when held back"""
+        if (":" in line and CONTEXT_RE.match(line)) or (self.context and line.lstrip().startswith("from ")):
+            self.context.append(line)
+            return None
+        record = self.parse_text(line)
+        if record is not None and record["severity"] != "note":
+            self.current = self.diagnostics.add(record)
+            self.suppressing = self.current is None
+        elif record is not None:
+            if self.current is not None:
+                self.diagnostics.add_note(self.current, record)
+        elif not line.startswith(" "):
+            # Anything but a source excerpt ends the previous diagnostic
+            self.suppressing = False
+        context, self.context = self.context, []
+        if self.suppressing:
+            return None
+        return "\n".join(context + [line])
+
+    def parse_json(self):
+        """Turn a buffered JSON document into diagnostics and display text"""
+        lines, self.json_lines = self.json_lines, []
+        self.json_state = (0, False)
+        try:
+            document = json.loads("\n".join(lines))
+        except ValueError:
+            # Scanning the lines as text again must not restart JSON buffering
+            shown = [self.parse_plain(line) for line in lines]
+            shown = [line for line in shown if line is not None]
+            return "\n".join(shown) if shown else None
+        self.structured = True
+        if isinstance(document, dict):
+            records = sarif_records(document)
+        else:
+            records = gcc_records(document)
+        shown = []
+        for record in records:
+            if record["severity"] != "note":
+                self.current = self.diagnostics.add(record)
+            elif self.current is not None:
+                self.diagnostics.add_note(self.current, record)
+            if self.current is not None:
+                shown.append(format_record(record))
+        return "\n".join(shown) if shown else None
+
+    def parse_text(self, line):
+        """Match one line of text output against the precompiled patterns; returns a record or None"""
+        if ":" not in line or line.startswith(" "):
+            # Source excerpts and carets
+            return None
+        match = DIAGNOSTIC_RE.match(line) or MSVC_RE.match(line)
+        if match:
+            return make_record(match.group("file"), match.group("line"), match.group("column"),
+                               normalize_severity(match.group("severity")),
+                               match.group("message"), match.group("option"))
+        match = LINKER_RE.match(line)
+        if match:
+            return make_record(match.group("file"), None, None, "error", match.group("message"))
+        match = TOOL_RE.match(line)
+        if match:
+            return make_record(match.group("file"), None, None,
+                               normalize_severity(match.group("severity")), match.group("message"))
+        return None
+
+
+def parse_output(text, diagnostics=None):
+    """Parse complete output in one go; returns (display text, DiagnosticSet)"""
+    parser = DiagnosticParser(diagnostics)
+    shown = parser.feed(text) + parser.finish()
+    return shown, parser.diagnostics
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Self-contained SVG flamegraphs
+Renders collapsed stacks ("root;child;leaf" -> value) as an SVG with one
+frame per stack entry, widths proportional to their value and hover titles
+"""
+
+import zlib
+from xml.sax.saxutils import escape
+
+WIDTH = 1200
+FRAME_HEIGHT = 16
+FONT_SIZE = 11
+CHAR_WIDTH = 6.5
+MIN_WIDTH = 0.5
+
+
+def build_tree(stacks):
+    """Nest collapsed stacks into {"name", "value", "children"} frames"""
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, value in stacks.items():
+        if value <= 0:
+            continue
+        root["value"] += value
+        node = root
+        for name in stack.split(";"):
+            child = node["children"].get(name)
+            if child is None:
+                child = node["children"][name] = {"name": name, "value": 0, "children": {}}
+            child["value"] += value
+            node = child
+    return root
+
+
+def tree_depth(node):
+    """Number of frame rows below and including node"""
+    return 1 + max((tree_depth(child) for child in node["children"].values()), default=0)
+
+
+def frame_color(name):
+    """Stable warm color for a frame name"""
+    seed = zlib.crc32(name.encode("utf-8"))
+    return f"rgb({205 + seed % 50},{(seed >> 8) % 180 + 40},{(seed >> 16) % 55})"
+
+
+def render_svg(stacks, title="Flame Graph", unit="", width=WIDTH):
+    """Return an SVG flamegraph for collapsed stacks; the root is at the bottom"""
+    root = build_tree(stacks)
+    depth = tree_depth(root)
+    top = 2 * FRAME_HEIGHT
+    height = top + depth * FRAME_HEIGHT + FRAME_HEIGHT
+    total = root["value"] or 1
+    scale = (width - 20) / total
+
+    frames = []
+
+    def place(node, x, level):
+        frame_width = node["value"] * scale
+        if frame_width < MIN_WIDTH:
+            return
+        y = height - FRAME_HEIGHT - (level + 1) * FRAME_HEIGHT
+        percent = 100.0 * node["value"] / total
+        label = escape(node["name"])
+        tooltip = f"{label} ({node['value']:,}{escape(unit)}, {percent:.2f}%)"
+        chars = int((frame_width - 4) / CHAR_WIDTH)
+        text = label if len(node["name"]) <= chars else (escape(node["name"][:chars - 2]) + ".." if chars > 2 else "")
+        frames.append(
+            f'<g><title>{tooltip}</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{frame_width:.2f}" height="{FRAME_HEIGHT - 1}" '
+            f'fill="{frame_color(node["name"])}" rx="2"/>'
+            f'<text x="{x + 3:.2f}" y="{y + FRAME_HEIGHT - 4}">{text}</text></g>'
+        )
+        child_x = x
+        # Siblings in name order, as flamegraph.pl draws them
+        for child in sorted(node["children"].values(), key=lambda item: item["name"]):
+            place(child, child_x, level + 1)
+            child_x += child["value"] * scale
+
+    place(root, 10.0, 0)
+    return (
+        f'<?xml version="1.0" standalone="no"?>\n'
+        f'<svg version="1.1" width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg" '
+        f'font-family="Verdana, sans-serif" font-size="{FONT_SIZE}">\n'
+        f'<rect x="0" y="0" width="{width}" height="{height}" fill="#f8f8f8"/>\n'
+        f'<text x="{width / 2}" y="{FRAME_HEIGHT + 4}" text-anchor="middle" font-size="{FONT_SIZE + 4}">'
+        f'{escape(title)}</text>\n'
+        + "\n".join(frames) +
+        "\n</svg>\n"
+    )
+
+
+def write_svg(filename, stacks, title="Flame Graph", unit=""):
+    """Render collapsed stacks to an SVG file"""
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(render_svg(stacks, title, unit))
+    return filename
+
+
+def write_collapsed(filename, stacks):
+    """Write stacks in the collapsed format read by flamegraph.pl and speedscope"""
+    with open(filename, "w", encoding="utf-8") as f:
+        for stack, value in sorted(stacks.items()):
+            f.write(f"{stack} {value}\n")
+    return filename
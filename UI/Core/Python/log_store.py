@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Append-only log backing the GUI output panes
+Recent lines stay in memory; older lines are spilled in zlib-compressed blocks
+to an anonymous temporary file, so a long session costs little RAM while the
+whole log stays available for paging, copying and saving
+"""
+
+import json
+import tempfile
+import threading
+import zlib
+from collections import deque
+from itertools import islice
+
+MEMORY_LINES = 10000
+BLOCK_LINES = 2000
+
+
+class LogStore:
+    """Line log of (text, tag) pairs with compressed spill to disk"""
+
+    def __init__(self, memory_lines=MEMORY_LINES, block_lines=BLOCK_LINES, spill_dir=None):
+        self.memory_lines = memory_lines
+        self.block_lines = block_lines
+        self.spill_dir = spill_dir
+        self.lock = threading.RLock()
+        self.spill_file = None
+        self.reset()
+
+    def reset(self):
+        """Empty the log"""
+        with self.lock:
+            if self.spill_file is not None:
+                self.spill_file.close()
+            self.spill_file = None
+            # (offset, size, first line) of every spilled block
+            self.blocks = []
+            self.spilled_lines = 0
+            self.recent = deque()
+            self.partial = ""
+            self.partial_tag = None
+            self.cached_block = (None, None)
+
+    def __len__(self):
+        """Number of complete lines"""
+        with self.lock:
+            return self.spilled_lines + len(self.recent)
+
+    def append(self, text, tag=None):
+        """Add text; an unterminated last line is held until its newline arrives"""
+        if not text:
+            return
+        with self.lock:
+            if self.partial:
+                text = self.partial + text
+                tag = self.partial_tag
+            # Split on "\n" only, the way the Text widget counts lines
+            parts = text.split("\n")
+            self.partial = parts.pop()
+            self.partial_tag = tag if self.partial else None
+            self.recent.extend((line + "\n", tag) for line in parts)
+            while len(self.recent) >= self.memory_lines + self.block_lines:
+                self.spill()
+
+    def spill(self):
+        """Compress the oldest block of in-memory lines to the spill file"""
+        block = [self.recent.popleft() for _ in range(self.block_lines)]
+        data = zlib.compress(json.dumps(block).encode("utf-8"), 6)
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile(prefix="crypto-log-", dir=self.spill_dir)
+        self.spill_file.seek(0, 2)
+        offset = self.spill_file.tell()
+        self.spill_file.write(data)
+        self.blocks.append((offset, len(data), self.spilled_lines))
+        self.spilled_lines += len(block)
+
+    def read_block(self, index):
+        """Decompress one spilled block (the last one read is kept)"""
+        if self.cached_block[0] == index:
+            return self.cached_block[1]
+        offset, size, _ = self.blocks[index]
+        self.spill_file.seek(offset)
+        block = [tuple(item) for item in json.loads(zlib.decompress(self.spill_file.read(size)))]
+        self.cached_block = (index, block)
+        return block
+
+    def lines(self, start, end):
+        """Complete lines start..end-1 as (text, tag) pairs"""
+        with self.lock:
+            start = max(0, start)
+            end = min(end, self.spilled_lines + len(self.recent))
+            result = []
+            line = start
+            while line < min(end, self.spilled_lines):
+                index = line // self.block_lines
+                block = self.read_block(index)
+                first = self.blocks[index][2]
+                chunk = block[line - first:end - first]
+                result.extend(chunk)
+                line += len(chunk)
+            if line < end:
+                base = self.spilled_lines
+                result.extend(islice(self.recent, line - base, end - base))
+            return result
+
+    def tail(self):
+        """The unterminated last line as (text, tag), or None"""
+        with self.lock:
+            return (self.partial, self.partial_tag) if self.partial else None
+
+    def iter_text(self):
+        """Yield the whole log, block by block, without loading it at once"""
+        with self.lock:
+            for index in range(len(self.blocks)):
+                yield "".join(text for text, _ in self.read_block(index))
+            yield "".join(text for text, _ in self.recent)
+            yield self.partial
+
+    def text(self):
+        """The whole log as one string"""
+        return "".join(self.iter_text())
+
+    def save(self, filename):
+        """Write the whole log to filename"""
+        with open(filename, "w", encoding="utf-8") as f:
+            for text in self.iter_text():
+                f.write(text)
+
+    def close(self):
+        """Release the spill file"""
+        self.reset()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Ninja build file generator for the build engine
+Turns planned compile/link/archive steps into build.ninja with depfile
+handling, and runs ninja on it so its scheduler and restat logic drive builds
+"""
+
+import os
+import shlex
+import shutil
+from pathlib import Path
+
+from compile_cache import linked_libraries, output_path_of, write_atomic
+from output_stream import run_streaming, DEFAULT_CAPTURE_CHARS
+from batch_build import SOURCE_EXTENSIONS
+from build_trace import span
+
+NINJA_FILE = "build.ninja"
+
+# Steps ninja can run; "run" steps stay with the engine
+NINJA_STEP_KINDS = ("compile", "link", "archive")
+
+
+def ninja_escape(path):
+    """Escape a path for a ninja build line"""
+    return str(path).replace("$", "$$").replace(" ", "$ ").replace(":", "$:")
+
+
+def shell_join(args):
+    """Quote arguments for the shell and escape them for a ninja variable"""
+    return " ".join(shlex.quote(str(arg)) for arg in args).replace("$", "$$")
+
+
+def strip_depfile_flags(args):
+    """Drop -MMD/-MD/-MF <file>; the ninja rules add their own depfile flags"""
+    result = []
+    skip_next = False
+    for arg in args:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg == "-MF":
+            skip_next = True
+            continue
+        if arg in ("-MMD", "-MD"):
+            continue
+        result.append(arg)
+    return result
+
+
+def step_output(step):
+    """Output file of a compile, link or archive step"""
+    if step.kind == "archive":
+        return step.argv[2]
+    return output_path_of(step.argv)
+
+
+def write_if_changed(path, text):
+    """Write text unless the file already holds it; return True when written"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, text)
+    return True
+
+
+class NinjaWriter:
+    """Minimal writer for the ninja file syntax"""
+
+    def __init__(self):
+        self.lines = ["# Generated by crypto-build - do not edit", "ninja_required_version = 1.3", ""]
+
+    def variable(self, name, value, indent=0):
+        """Write `name = value`"""
+        self.lines.append(f"{'  ' * indent}{name} = {value}")
+
+    def rule(self, name, command, description=None, depfile=None, deps=None,
+             restat=False, generator=False):
+        """Write a rule block"""
+        self.lines.append(f"rule {name}")
+        self.variable("command", command, 1)
+        if description:
+            self.variable("description", description, 1)
+        if depfile:
+            self.variable("depfile", depfile, 1)
+        if deps:
+            self.variable("deps", deps, 1)
+        if restat:
+            self.variable("restat", "1", 1)
+        if generator:
+            self.variable("generator", "1", 1)
+        self.lines.append("")
+
+    def build(self, outputs, rule, inputs=(), implicit=(), variables=None):
+        """Write a build statement"""
+        line = f"build {' '.join(ninja_escape(o) for o in outputs)}: {rule}"
+        if inputs:
+            line += " " + " ".join(ninja_escape(i) for i in inputs)
+        if implicit:
+            line += " | " + " ".join(ninja_escape(i) for i in implicit)
+        self.lines.append(line)
+        for name, value in (variables or {}).items():
+            if value:
+                self.variable(name, value, 1)
+
+    def default(self, targets):
+        """Write the default target list"""
+        self.lines.append("")
+        self.lines.append(f"default {' '.join(ninja_escape(t) for t in targets)}")
+
+    def text(self):
+        """Return the file contents"""
+        return "\n".join(self.lines) + "\n"
+
+
+class NinjaGenerator:
+    """Translate build engine steps into ninja build statements"""
+
+    def __init__(self, builddir):
+        self.builddir = str(builddir)
+        self.statements = []
+        self.outputs = []
+        self.defaults = []
+
+    def add_steps(self, steps):
+        """Add one target's steps; the last ninja-able output becomes a default"""
+        final = None
+        for step in steps:
+            if step.kind == "compile" and "-c" in step.argv:
+                final = self.add_compile(step, "cxx")
+            elif step.kind == "compile":
+                # Single command compile-and-link of a one-source target
+                final = self.add_compile(step, "cxx_link")
+            elif step.kind == "link":
+                final = self.add_link(step)
+            elif step.kind == "archive":
+                final = self.add_archive(step)
+        if final:
+            self.defaults.append(final)
+
+    def split_compile(self, step):
+        """Return (source, output, flags, trailing flags) of a compile argv
+
+        Trailing flags come after -o and keep -l libraries behind the source.
+        """
+        argv = strip_depfile_flags(step.argv)
+        index = argv.index("-o")
+        output_file = argv[index + 1]
+        sources = [arg for arg in argv[1:index] if not arg.startswith("-")
+                   and Path(arg).suffix.lower() in SOURCE_EXTENSIONS]
+        if len(sources) != 1:
+            raise ValueError(f"Cannot export step to ninja: {step.command_line()}")
+        source = sources[0]
+        flags = [arg for arg in argv[1:index] if arg != source and arg != "-c"]
+        return (self.resolve(source, step.cwd), self.resolve(output_file, step.cwd),
+                flags, argv[index + 2:])
+
+    def resolve(self, path, cwd):
+        """Make a path absolute so build.ninja works from any directory"""
+        return os.path.abspath(os.path.join(cwd or "", path))
+
+    def add_compile(self, step, rule):
+        """Compile one translation unit, header dependencies from the depfile"""
+        source, output_file, flags, ldflags = self.split_compile(step)
+        self.statements.append(([output_file], rule, [source], {
+            "cxx": shell_join(step.argv[:1]),
+            "flags": shell_join(flags),
+            "ldflags": shell_join(ldflags)
+        }, linked_libraries(step.argv, step.cwd)))
+        self.outputs.append(output_file)
+        return output_file
+
+    def add_link(self, step):
+        """Link objects into an executable or shared library"""
+        argv = step.argv
+        index = argv.index("-o")
+        output_file = self.resolve(argv[index + 1], step.cwd)
+        rest = argv[1:index] + argv[index + 2:]
+        objects = [self.resolve(arg, step.cwd) for arg in rest if arg.endswith(".o")]
+        flags = [arg for arg in rest if not arg.endswith(".o")]
+        # Relink when a -l library is rebuilt, not only when an object changes
+        self.statements.append(([output_file], "link", objects, {
+            "cxx": shell_join(argv[:1]),
+            "ldflags": shell_join(flags)
+        }, linked_libraries(argv, step.cwd)))
+        self.outputs.append(output_file)
+        return output_file
+
+    def add_archive(self, step):
+        """Archive objects into a static library"""
+        output_file = self.resolve(step.argv[2], step.cwd)
+        objects = [self.resolve(arg, step.cwd) for arg in step.argv[3:]]
+        self.statements.append(([output_file], "ar", objects, {
+            "ar": shell_join(step.argv[:1])
+        }, []))
+        self.outputs.append(output_file)
+        return output_file
+
+    def generate(self, regenerate=None, regenerate_inputs=(), ninja_file=NINJA_FILE):
+        """Return build.ninja text; regenerate is the shell command that rewrites it"""
+        writer = NinjaWriter()
+        writer.variable("builddir", ninja_escape(self.builddir))
+        writer.lines.append("")
+
+        writer.rule("cxx", "$cxx $flags -MMD -MF $out.d -c $in -o $out $ldflags",
+                    description="CXX $out", depfile="$out.d", deps="gcc")
+        writer.rule("cxx_link", "$cxx $flags -MMD -MF $out.d $in -o $out $ldflags",
+                    description="CXX $out", depfile="$out.d", deps="gcc")
+        writer.rule("link", "$cxx $in -o $out $ldflags", description="LINK $out")
+        # Recreate the archive so objects of removed sources do not linger
+        writer.rule("ar", "rm -f $out && $ar rcs $out $in", description="AR $out")
+        if regenerate:
+            # Only rewrites build.ninja when its text changes, hence restat
+            writer.rule("regen", regenerate.replace("$", "$$"), description="Regenerating $out",
+                        restat=True, generator=True)
+
+        for outputs, rule, inputs, variables, implicit in self.statements:
+            writer.build(outputs, rule, inputs, implicit, variables=variables)
+            writer.lines.append("")
+
+        if regenerate:
+            writer.build([ninja_file], "regen", implicit=regenerate_inputs)
+        writer.default(self.defaults)
+        return writer.text()
+
+
+class NinjaExecutor:
+    """Run compile/link/archive steps through ninja"""
+
+    def __init__(self, ninja):
+        self.ninja = ninja
+
+    @classmethod
+    def from_config(cls, config):
+        """Create executor when ninja_enabled is set and ninja is installed, else None"""
+        if not config.get("ninja_enabled", False):
+            return None
+        ninja = shutil.which(config.get("ninja_path") or "ninja")
+        return cls(ninja) if ninja else None
+
+    def supports(self, steps):
+        """True when every step that is not a run step can be exported"""
+        try:
+            NinjaGenerator(".").add_steps([step for step in steps if step.kind in NINJA_STEP_KINDS])
+        except (ValueError, IndexError):
+            return False
+        return any(step.kind in NINJA_STEP_KINDS for step in steps)
+
+    def ninja_file_for(self, steps):
+        """build.ninja next to the target's objects: <output dir>/obj/<output name>/"""
+        final = [step for step in steps if step.kind in NINJA_STEP_KINDS][-1]
+        output_path = Path(os.path.join(final.cwd or "", step_output(final)))
+        return output_path.parent / "obj" / output_path.name / NINJA_FILE
+
+    def run(self, steps, jobs=1, on_output=None, max_capture=DEFAULT_CAPTURE_CHARS, usage=None,
+            clean=False):
+        """Write build.ninja for steps and run ninja; return (returncode, output, command, up_to_date)
+
+        clean removes the outputs first so every step runs again.
+        """
+        ninja_file = self.ninja_file_for(steps)
+        generator = NinjaGenerator(ninja_file.parent)
+        generator.add_steps([step for step in steps if step.kind in NINJA_STEP_KINDS])
+        write_if_changed(ninja_file, generator.generate())
+        if clean:
+            run_streaming([self.ninja, "-f", str(ninja_file), "-t", "clean"], merge_stderr=True)
+        return run_ninja(self.ninja, ninja_file, jobs, on_output=on_output, max_capture=max_capture,
+                         usage=usage)
+
+
+def run_ninja(ninja, ninja_file, jobs=1, targets=(), on_output=None,
+              max_capture=DEFAULT_CAPTURE_CHARS, usage=None):
+    """Run ninja on a build file; return (returncode, output, command, up_to_date)
+
+    ninja already merges compiler stderr into its own stdout.
+    """
+    argv = [ninja, "-f", str(ninja_file), "-j", str(max(1, int(jobs or 1)))] + list(targets)
+    with span("ninja", "process", argv=argv):
+        returncode, output, _ = run_streaming(argv, on_output, merge_stderr=True,
+                                              max_capture=max_capture, usage=usage)
+    return returncode, output, shlex.join(argv), "ninja: no work to do." in output
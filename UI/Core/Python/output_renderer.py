@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Batched, rate-limited rendering of build and program output into Tk Text widgets
+Worker threads wake the Tk loop through ui_wakeup; queued text is then coalesced
+into one multi-segment insert per frame, with tags computed up front and a
+per-frame budget so heavy output never blocks the event loop.
+The widget only holds a window of the log; the full log lives in a LogStore and
+older or newer lines are paged in when the view is scrolled to either edge
+"""
+
+import queue
+import time
+
+from log_store import LogStore
+from ui_wakeup import Wakeup, NotifyingQueue
+from build_trace import traced
+
+MAX_FRAME_CHARS = 256 * 1024
+MAX_FRAME_SECONDS = 0.02
+WIDGET_LINES = 5000
+PAGE_LINES = 1000
+
+
+class OutputRenderer:
+    """Drain text written from any thread into a Text widget, one insert per frame
+
+    classify(line) may return a tag name for a line; write(text, tag) forces a tag.
+    source is an optional NotifyingQueue that other code put()s text into.
+    """
+
+    def __init__(self, root, widget, tags=None, classify=None, readonly=False,
+                 source=None, max_chars=MAX_FRAME_CHARS,
+                 max_lines=WIDGET_LINES, page_lines=PAGE_LINES, store=None):
+        self.root = root
+        self.widget = widget
+        self.classify = classify
+        self.readonly = readonly
+        self.max_chars = max_chars
+        self.carry = None
+        # Every put() wakes the Tk loop; nothing runs while no output arrives
+        self.wakeup = Wakeup(root, self.frame)
+        self.queue = source if source is not None else NotifyingQueue()
+        self.queue.wakeup = self.wakeup
+        for name, options in (tags or {}).items():
+            widget.tag_configure(name, **options)
+
+        # Widget shows store lines first_line.. and, while following, everything after
+        self.store = store if store is not None else LogStore()
+        self.max_lines = max_lines
+        self.page_lines = page_lines
+        self.first_line = 0
+        self.view_end = 0
+        self.following = True
+        self.paging = False
+        self.scroll_command = widget.cget("yscrollcommand")
+        widget.configure(yscrollcommand=self.on_yscroll)
+
+    def write(self, text, tag=None):
+        """Queue text; the Tk loop is woken to render it (safe from worker threads)"""
+        if text:
+            self.queue.put((text, tag) if tag else text)
+
+    def frame(self):
+        """Render one batch and come back while a backlog remains"""
+        if self.render():
+            # Let Tk handle pending events before the next batch
+            self.root.after(1, self.frame)
+
+    def clear(self):
+        """Forget the rendered log; text still queued is rendered afterwards"""
+        self.store.reset()
+        self.first_line = 0
+        self.view_end = 0
+        self.following = True
+
+    def text(self):
+        """Everything written so far, including lines no longer in the widget"""
+        return self.store.text()
+
+    def save(self, filename):
+        """Write everything written so far to filename"""
+        self.store.save(filename)
+
+    def segments(self, text, tag):
+        """Split text into (text, tag) pieces by line classification"""
+        if tag or self.classify is None:
+            return [(text, tag)]
+        return [(line, self.classify(line)) for line in text.splitlines(True)]
+
+    def insert(self, index, pieces):
+        """Insert (text, tag) pieces with a single widget call"""
+        if not pieces:
+            return
+        args = []
+        for text, tag in pieces:
+            args.extend((text, tag or ()))
+        if self.readonly:
+            self.widget.config(state='normal')
+        self.widget.insert(index, *args)
+        if self.readonly:
+            self.widget.config(state='disabled')
+
+    def delete(self, start, end):
+        """Delete a widget range"""
+        if self.readonly:
+            self.widget.config(state='normal')
+        self.widget.delete(start, end)
+        if self.readonly:
+            self.widget.config(state='disabled')
+
+    def shown_lines(self):
+        """Complete lines currently in the widget"""
+        return int(self.widget.index("end-1c").split(".")[0]) - 1
+
+    @traced("render output", "ui")
+    def render(self):
+        """Insert queued text up to the frame budget; return True if more is waiting"""
+        pieces = []
+        size = 0
+        deadline = time.perf_counter() + MAX_FRAME_SECONDS
+        while size < self.max_chars and time.perf_counter() < deadline:
+            if self.carry is not None:
+                item, self.carry = self.carry, None
+            else:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            text, tag = item if isinstance(item, tuple) else (item, None)
+            room = self.max_chars - size
+            if len(text) > room:
+                # Render the rest of an oversized chunk in the next frame
+                text, self.carry = text[:room], (text[room:], tag)
+            for piece, piece_tag in self.segments(text, tag):
+                # Merge neighbours with the same tag into one segment
+                if pieces and pieces[-1][1] == piece_tag:
+                    pieces[-1][0].append(piece)
+                else:
+                    pieces.append(([piece], piece_tag))
+            size += len(text)
+
+        pieces = [("".join(parts), tag) for parts, tag in pieces]
+        for text, tag in pieces:
+            self.store.append(text, tag)
+        # While the user reads older output the new text only goes to the store
+        if pieces and self.following:
+            self.insert("end", pieces)
+            self.trim_top()
+            self.widget.see("end")
+        return self.carry is not None or not self.queue.empty()
+
+    def trim_top(self):
+        """Drop lines above the window; they stay in the store; return how many"""
+        excess = self.shown_lines() - self.max_lines
+        if excess <= 0:
+            return 0
+        self.delete("1.0", f"{excess + 1}.0")
+        self.first_line += excess
+        return excess
+
+    # -------------------------------------------------------------- paging
+
+    def on_yscroll(self, first, last):
+        """yscrollcommand hook: page older/newer lines in at the edges"""
+        if self.scroll_command:
+            self.widget.tk.call(*self.widget.tk.splitlist(self.scroll_command) + (first, last))
+        if self.paging:
+            return
+        if float(first) <= 0.0 and self.first_line > 0:
+            self.paging = True
+            self.root.after_idle(self.page_up)
+        elif float(last) >= 1.0 and not self.following:
+            self.paging = True
+            self.root.after_idle(self.page_down)
+
+    def page_up(self):
+        """Load the page above the window from the store"""
+        self.paging = False
+        count = min(self.page_lines, self.first_line)
+        if count <= 0:
+            return
+        self.insert("1.0", self.store.lines(self.first_line - count, self.first_line))
+        self.first_line -= count
+        # Keep the line that was on top where the user is looking
+        self.widget.yview(f"{count + 1}.0")
+
+        if self.shown_lines() > self.max_lines:
+            # Drop the bottom of the window; page_down brings it back
+            self.delete(f"{self.max_lines + 1}.0", "end")
+            self.following = False
+            self.view_end = self.first_line + self.max_lines
+
+    def page_down(self):
+        """Load the page below the window, resuming live output at the end"""
+        self.paging = False
+        if self.following:
+            return
+        end = min(self.view_end + self.page_lines, len(self.store))
+        pieces = self.store.lines(self.view_end, end)
+        self.view_end = end
+        if end >= len(self.store):
+            tail = self.store.tail()
+            if tail:
+                pieces.append(tail)
+            self.following = True
+        top = int(self.widget.index("@0,0").split(".")[0])
+        self.insert("end", pieces)
+        removed = self.trim_top()
+        self.widget.yview(f"{max(1, top - removed)}.0")
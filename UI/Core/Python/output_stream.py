@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for build process output
+Forwards stdout/stderr to a callback in bounded, line-aligned chunks as they
+arrive, tagged by stream, while keeping only a capped head and tail in memory,
+and reaps the process with its resource usage where the platform reports it
+"""
+
+import codecs
+import errno
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+
+DEFAULT_CHUNK_SIZE = 8192
+DEFAULT_CAPTURE_CHARS = 1024 * 1024
+
+# Forks measured programs from a small interpreter, see rusage_exec.py
+RUSAGE_HELPER = str(Path(__file__).resolve().with_name("rusage_exec.py"))
+
+
+class BoundedCapture:
+    """Keep the head and tail of a stream, dropping the middle past max_chars
+
+    The head holds the first errors, the tail the linker/summary lines.
+    """
+
+    def __init__(self, max_chars=DEFAULT_CAPTURE_CHARS):
+        self.head_limit = max_chars // 2
+        self.tail_limit = max_chars - self.head_limit
+        self.head = []
+        self.head_size = 0
+        self.tail = deque()
+        self.tail_size = 0
+        self.dropped = 0
+
+    def append(self, text):
+        """Add text, discarding the oldest tail text once over the limit"""
+        if self.head_size < self.head_limit:
+            part = text[:self.head_limit - self.head_size]
+            self.head.append(part)
+            self.head_size += len(part)
+            text = text[len(part):]
+            if not text:
+                return
+        self.tail.append(text)
+        self.tail_size += len(text)
+        while self.tail_size > self.tail_limit:
+            excess = self.tail_size - self.tail_limit
+            first = self.tail[0]
+            if len(first) <= excess:
+                self.tail.popleft()
+                excess = len(first)
+            else:
+                self.tail[0] = first[excess:]
+            self.tail_size -= excess
+            self.dropped += excess
+
+    def text(self):
+        """Captured text with a marker where output was dropped"""
+        middle = f"\n... [{self.dropped} characters of output omitted] ...\n" if self.dropped else ""
+        return "".join(self.head) + middle + "".join(self.tail)
+
+
+class LineChunker:
+    """Turn raw decoded text into chunks that end on a line boundary
+
+    A line longer than chunk_size is split so a chunk never grows unbounded.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.pending = ""
+
+    def feed(self, text):
+        """Return the complete lines now available as one chunk, or an empty string"""
+        self.pending += text
+        end = self.pending.rfind("\n") + 1
+        if end == 0 and len(self.pending) < self.chunk_size:
+            return ""
+        if end == 0:
+            end = len(self.pending)
+        chunk, self.pending = self.pending[:end], self.pending[end:]
+        return chunk
+
+    def flush(self):
+        """Return whatever is left at end of stream"""
+        chunk, self.pending = self.pending, ""
+        return chunk
+
+
+def find_executable(program, cwd=None, env=None):
+    """Raise FileNotFoundError like Popen does when program cannot be started"""
+    if os.sep in program:
+        found = os.path.isfile(os.path.join(cwd or "", program))
+    else:
+        found = shutil.which(program, path=(env or os.environ).get("PATH")) is not None
+    if not found:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), program)
+
+
+def spawn_measured(args, **popen_kwargs):
+    """Popen args through rusage_exec.py so wait_process reports the program's own usage
+
+    A child forked directly from this process counts our resident memory (the
+    whole GUI) in its peak RSS. Without fork and wait4 (Windows) args run directly.
+    """
+    args = [str(arg) for arg in args]
+    if not (hasattr(os, "fork") and hasattr(os, "wait4")):
+        return subprocess.Popen(args, **popen_kwargs)
+    find_executable(args[0], popen_kwargs.get("cwd"), popen_kwargs.get("env"))
+    read_fd, write_fd = os.pipe()
+    try:
+        process = subprocess.Popen([sys.executable, "-I", "-S", RUSAGE_HELPER, str(write_fd)] + args,
+                                   pass_fds=(write_fd,), **popen_kwargs)
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    process.usage_fd = read_fd
+    return process
+
+
+def kill_process(process):
+    """Kill a process, or the program under a spawn_measured helper"""
+    if getattr(process, "usage_fd", None) is not None:
+        # The helper answers SIGUSR1 by killing the program, then reports and exits
+        process.send_signal(signal.SIGUSR1)
+    else:
+        process.kill()
+
+
+def wait_process(process):
+    """Wait for a Popen; return its {"max_rss_kb", "user", "sys"} usage or None
+
+    os.wait4 reports the peak resident set of the process and of the children
+    it waited for (cc1plus, ld under the g++ driver). Processes started with
+    spawn_measured report the program's usage from the helper instead, which
+    leaves out this process's memory, plus its "wall" seconds without the
+    helper's startup. Windows has no wait4.
+    """
+    usage_fd = getattr(process, "usage_fd", None)
+    if usage_fd is not None:
+        process.wait()
+        process.usage_fd = None
+        with os.fdopen(usage_fd, "rb") as pipe:
+            report = pipe.read().split()
+        if len(report) != 4:
+            return None
+        return {"max_rss_kb": int(report[0]), "user": float(report[1]), "sys": float(report[2]),
+                "wall": float(report[3])}
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # Already reaped by someone else (poll() from another thread)
+        process.wait()
+        return None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return {"max_rss_kb": usage.ru_maxrss, "user": usage.ru_utime, "sys": usage.ru_stime}
+
+
+def stream_process(process, on_output=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                   max_capture=DEFAULT_CAPTURE_CHARS, usage=None):
+    """Read a Popen's binary stdout/stderr pipes until EOF
+
+    on_output(stream, text) is called with "stdout" or "stderr" and a chunk of
+    whole lines from the reader threads. Returns the (stdout, stderr) captures;
+    the process's resource usage is stored in the usage dict when given.
+    """
+    captures = {"stdout": BoundedCapture(max_capture), "stderr": BoundedCapture(max_capture)}
+
+    def forward(stream, text):
+        if not text:
+            return
+        captures[stream].append(text)
+        if on_output is not None:
+            try:
+                on_output(stream, text)
+            except Exception:
+                # A broken consumer must not stop the pipe being drained
+                pass
+
+    def pump(stream, pipe):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        chunker = LineChunker(chunk_size)
+        read = getattr(pipe, "read1", pipe.read)
+        try:
+            while True:
+                data = read(chunk_size)
+                if not data:
+                    break
+                forward(stream, chunker.feed(decoder.decode(data)))
+            forward(stream, chunker.feed(decoder.decode(b"", final=True)))
+            forward(stream, chunker.flush())
+        finally:
+            pipe.close()
+
+    threads = []
+    for stream, pipe in (("stdout", process.stdout), ("stderr", process.stderr)):
+        if pipe is not None:
+            thread = threading.Thread(target=pump, args=(stream, pipe), daemon=True)
+            thread.start()
+            threads.append(thread)
+    for thread in threads:
+        thread.join()
+    if usage is None:
+        process.wait()
+    else:
+        usage.update(wait_process(process) or {})
+    return captures["stdout"].text(), captures["stderr"].text()
+
+
+def run_streaming(args, on_output=None, merge_stderr=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                  max_capture=DEFAULT_CAPTURE_CHARS, usage=None, **popen_kwargs):
+    """Run a command, streaming its output; return (returncode, stdout, stderr)
+
+    usage, when given, is filled with the command's peak memory and CPU times.
+    """
+    spawn = subprocess.Popen if usage is None else spawn_measured
+    process = spawn(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE,
+        **popen_kwargs
+    )
+    stdout, stderr = stream_process(process, on_output, chunk_size, max_capture, usage)
+    return process.returncode, stdout, stderr
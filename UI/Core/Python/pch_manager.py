@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Precompiled header manager for the build engine
+Keeps one Crypto++/OpenSSL precompiled header per compiler and flag set
+(.gch for GCC, .pch for Clang), rebuilt when headers or flags change
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from compile_cache import compiler_version
+
+DEFAULT_PCH_DIR = str(Path.home() / ".cache" / "crypto-compiler" / "pch")
+
+# Headers the lab sources parse over and over
+CRYPTOPP_PCH_HEADERS = ["cryptlib.h", "secblock.h", "aes.h", "modes.h", "filters.h",
+                        "osrng.h", "files.h", "hex.h"]
+OPENSSL_PCH_HEADERS = ["evp.h", "err.h", "bio.h"]
+STANDARD_PCH_HEADERS = ["iostream", "string"]
+
+PCH_HEADER_NAME = "crypto_pch.h"
+
+
+def pch_relevant_flags(argv):
+    """Flags that must match between the PCH build and its users"""
+    flags = []
+    skip_next = False
+    for arg in argv[1:]:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in ("-o", "-MF", "-MT", "-MQ", "-include"):
+            skip_next = True
+            continue
+        if arg in ("-shared", "-v", "-c", "-MMD", "-MD", "-Winvalid-pch"):
+            continue
+        if arg.startswith(("-l", "-L", "-Wl,")) or not arg.startswith("-"):
+            continue
+        flags.append(arg)
+    return flags
+
+
+def read_depfile(depfile):
+    """Return the prerequisites listed in a make-style dependency file"""
+    with open(depfile, "r") as f:
+        text = f.read().replace("\\\n", " ")
+    _, _, prerequisites = text.partition(":")
+    deps = []
+    for token in prerequisites.replace("\\ ", "\0").split():
+        deps.append(token.replace("\0", " "))
+    return deps
+
+
+class PchSpec:
+    """Identity of one precompiled header: compiler, flags and header set"""
+
+    def __init__(self, manager, compiler_path, compiler_kind, flags, headers):
+        self.compiler_path = compiler_path
+        self.compiler_kind = compiler_kind
+        self.flags = flags
+        self.headers = headers
+
+        digest = hashlib.sha256()
+        digest.update(compiler_path.encode())
+        digest.update(compiler_version(compiler_path).encode())
+        digest.update("\0".join(flags).encode())
+        digest.update("\0".join(headers).encode())
+        self.key = digest.hexdigest()[:16]
+
+        self.directory = manager.pch_dir / f"{compiler_kind}-{self.key}"
+        self.header = self.directory / PCH_HEADER_NAME
+        extension = ".pch" if compiler_kind == "clang" else ".gch"
+        self.output = self.directory / f"{PCH_HEADER_NAME}{extension}"
+        self.meta_file = self.directory / "meta.json"
+
+
+class PchManager:
+    """Build, validate and hand out precompiled headers"""
+
+    def __init__(self, config, pch_dir=None):
+        self.config = config
+        self.pch_dir = Path(os.path.expanduser(pch_dir or config.get("pch_dir", DEFAULT_PCH_DIR)))
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Create manager from engine configuration, or None when disabled"""
+        if not config.get("pch_enabled", True):
+            return None
+        return cls(config)
+
+    def library_headers(self, libraries, compiler):
+        """Absolute paths of the installed headers worth precompiling"""
+        headers = []
+        if "CryptoPP" in libraries:
+            include_dir = self.config.get("cryptopp_include", "")
+            headers.extend(os.path.join(include_dir, name) for name in CRYPTOPP_PCH_HEADERS)
+        if "OpenSSL" in libraries:
+            include_dir = self.config.get(f"openssl_include_{compiler.lower()}", "")
+            headers.extend(os.path.join(include_dir, name) for name in OPENSSL_PCH_HEADERS)
+        return [header for header in headers if os.path.isfile(header)]
+
+    def attach(self, step, compiler, libraries):
+        """Add the PCH include to a compile step and remember which PCH it needs"""
+        headers = self.library_headers(libraries, compiler)
+        if not headers:
+            return None
+        headers = STANDARD_PCH_HEADERS + headers
+        compiler_kind = "clang" if "clang" in compiler.lower() else "gcc"
+        spec = PchSpec(self, step.argv[0], compiler_kind, pch_relevant_flags(step.argv), headers)
+        step.argv[1:1] = ["-include", str(spec.header)]
+        if compiler_kind == "gcc":
+            step.argv.insert(1, "-Winvalid-pch")
+        step.pch = spec
+        return spec
+
+    def lock_for(self, spec):
+        """Per-PCH lock so parallel jobs build each header only once"""
+        with self.locks_lock:
+            return self.locks.setdefault(spec.key, threading.Lock())
+
+    def is_fresh(self, spec):
+        """True when the PCH exists and none of its dependencies changed"""
+        try:
+            with open(spec.meta_file, "r") as f:
+                meta = json.load(f)
+            if not spec.output.exists():
+                return False
+            for path, signature in meta["deps"].items():
+                st = os.stat(path)
+                if [st.st_mtime_ns, st.st_size] != signature:
+                    return False
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def write_header(self, spec):
+        """Write the umbrella header that gets precompiled"""
+        lines = ["// Generated by the crypto-build PCH manager - do not edit"]
+        for header in spec.headers:
+            if os.path.isabs(header):
+                lines.append(f'#include "{header}"')
+            else:
+                lines.append(f"#include <{header}>")
+        spec.header.write_text("\n".join(lines) + "\n")
+
+    def ensure(self, spec):
+        """Build the PCH if missing or stale; return a status dict"""
+        with self.lock_for(spec):
+            if self.is_fresh(spec):
+                return {"status": "reused", "pch": str(spec.output)}
+
+            spec.directory.mkdir(parents=True, exist_ok=True)
+            self.write_header(spec)
+            depfile = spec.directory / "deps.d"
+            argv = [spec.compiler_path] + spec.flags + [
+                "-x", "c++-header", str(spec.header), "-o", str(spec.output),
+                "-MD", "-MF", str(depfile)
+            ]
+
+            start = time.perf_counter()
+            result = subprocess.run(argv, capture_output=True, text=True,
+                                    encoding="utf-8", errors="replace")
+            duration = round(time.perf_counter() - start, 4)
+
+            if result.returncode != 0:
+                # Compiles still work from the plain header text
+                try:
+                    spec.output.unlink()
+                except OSError:
+                    pass
+                return {"status": "failed", "duration": duration, "stderr": result.stderr}
+
+            deps = {}
+            for path in read_depfile(depfile):
+                try:
+                    st = os.stat(path)
+                    deps[path] = [st.st_mtime_ns, st.st_size]
+                except OSError:
+                    continue
+            with open(spec.meta_file, "w") as f:
+                json.dump({"compiler": spec.compiler_path, "flags": spec.flags,
+                           "headers": spec.headers, "deps": deps,
+                           "build_time": duration, "created": time.time()}, f, indent=2)
+            return {"status": "built", "duration": duration, "pch": str(spec.output)}
+
+    def list(self):
+        """Return metadata for every stored PCH"""
+        entries = []
+        for meta_file in sorted(self.pch_dir.glob("*/meta.json")):
+            try:
+                with open(meta_file, "r") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            entries.append({
+                "name": meta_file.parent.name,
+                "compiler": meta.get("compiler"),
+                "flags": meta.get("flags"),
+                "build_time": meta.get("build_time"),
+                "headers": len(meta.get("deps", {}))
+            })
+        return entries
+
+    def clear(self):
+        """Remove every stored PCH"""
+        shutil.rmtree(self.pch_dir, ignore_errors=True)
@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Repeated-run benchmarks of built executables
+Runs a program a number of times after warmup runs, measuring wall time,
+user/sys CPU time and peak RSS of every run (os.wait4), and summarizes each
+metric with its median, p95, standard deviation and 95% confidence intervals.
+A/B comparisons interleave runs of several builds of the same program and
+report each one's speedup over the first with a Mann-Whitney test. Runs are
+pinned to chosen CPUs at a raised priority, and the CPU governor, turbo boost
+and load average are checked and recorded next to the results
+"""
+
+import math
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+
+from output_stream import kill_process, spawn_measured, wait_process
+from build_trace import span
+
+DEFAULT_RUNS = 10
+DEFAULT_WARMUP = 2
+METRICS = ("wall", "user", "sys", "max_rss_kb")
+
+# Two-sided 95% Student t critical values by degrees of freedom
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+        9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131,
+        16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086, 21: 2.080, 22: 2.074,
+        23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045,
+        30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+Z_95 = 1.96
+# p-value below which a comparison counts as a real difference
+SIGNIFICANCE = 0.05
+
+# Load average per CPU, besides the benchmark itself, above which results are noisy
+NOISY_LOAD_PER_CPU = 0.5
+CPU_SYSFS = "/sys/devices/system/cpu"
+
+
+def t_critical(df):
+    """95% two-sided t value for df degrees of freedom (next lower table entry)"""
+    if df <= 0:
+        return float("nan")
+    if df > 120:
+        return Z_95
+    return T_95[max(key for key in T_95 if key <= df)]
+
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of sorted values"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(math.floor(position))
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def median_interval(sorted_values):
+    """Distribution-free ~95% confidence interval of the median (order statistics)"""
+    n = len(sorted_values)
+    half_width = Z_95 * math.sqrt(n) / 2
+    # 1-based ranks of the interval ends
+    lower = int(math.floor(n / 2 - half_width))
+    upper = int(math.ceil(1 + n / 2 + half_width))
+    if lower < 1 or upper > n:
+        # Too few runs for the interval to exclude the extremes
+        return None
+    return [sorted_values[lower - 1], sorted_values[upper - 1]]
+
+
+def summarize(values):
+    """Median, p95, mean, stdev and 95% confidence intervals of samples"""
+    values = sorted(value for value in values if value is not None)
+    if not values:
+        return None
+    n = len(values)
+    mean = statistics.fmean(values)
+    stdev = statistics.stdev(values) if n > 1 else 0.0
+    summary = {
+        "n": n,
+        "min": values[0],
+        "max": values[-1],
+        "mean": mean,
+        "median": statistics.median(values),
+        "p95": percentile(values, 0.95),
+        "stdev": stdev,
+        # Relative spread; a few percent is the noise floor of most machines
+        "cv": stdev / mean if mean else None,
+        "mean_ci": None,
+        "median_ci": median_interval(values)
+    }
+    if n > 1:
+        margin = t_critical(n - 1) * stdev / math.sqrt(n)
+        # Times and memory cannot go below zero
+        summary["mean_ci"] = [max(0.0, mean - margin), mean + margin]
+    return summary
+
+
+def ranks(values):
+    """1-based ranks of values, ties sharing their average rank"""
+    order = sorted(range(len(values)), key=lambda index: values[index])
+    result = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for position in range(start, end + 1):
+            result[order[position]] = (start + end) / 2 + 1
+        start = end + 1
+    return result
+
+
+def mann_whitney(a, b):
+    """Two-sided Mann-Whitney U test of two samples; return (U of a, p-value)
+
+    Uses the normal approximation with tie and continuity corrections, which
+    is close enough from about eight runs per side.
+    """
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return None, 1.0
+    combined = ranks(list(a) + list(b))
+    u = sum(combined[:n1]) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    ties = {}
+    for value in list(a) + list(b):
+        ties[value] = ties.get(value, 0) + 1
+    tie_term = sum(count ** 3 - count for count in ties.values()) / (n * (n - 1)) if n > 1 else 0.0
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term)
+    if variance <= 0:
+        return u, 1.0
+    shift = u - n1 * n2 / 2
+    z = (abs(shift) - 0.5) / math.sqrt(variance) if shift else 0.0
+    return u, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def ratio_interval(baseline, candidate):
+    """Candidate over baseline time ratio with a ~95% confidence interval
+
+    The Hodges-Lehmann estimate of the shift in log time: the median of all
+    pairwise log ratios, bounded by the order statistics the Mann-Whitney
+    test puts at the 95% level. Returns (ratio, [low, high]) or (ratio, None)
+    with too few runs for an interval.
+    """
+    logs = sorted(math.log(c) - math.log(b) for b in baseline for c in candidate if b > 0 and c > 0)
+    if not logs:
+        return None, None
+    ratio = math.exp(statistics.median(logs))
+    n1, n2 = len(baseline), len(candidate)
+    rank = int(math.floor(n1 * n2 / 2 - Z_95 * math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)))
+    if rank < 1:
+        return ratio, None
+    return ratio, [math.exp(logs[rank - 1]), math.exp(logs[len(logs) - rank])]
+
+
+def read_sysfs(path):
+    """Stripped contents of a sysfs file, None when missing"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def parse_cpus(text, allowed):
+    """CPUs to pin to from "auto", "2,3" or "0-3"; None for no pinning
+
+    "auto" picks the last allowed CPU, away from CPU 0 which handles most
+    interrupts, and only when there is more than one.
+    """
+    text = str(text or "").strip().lower()
+    if not text:
+        return None
+    if text == "auto":
+        return {max(allowed)} if len(allowed) > 1 else None
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        if "-" in part:
+            low, high = part.split("-", 1)
+            cpus.update(range(int(low), int(high) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
+class Isolation:
+    """Pin benchmark runs to CPUs at a raised priority and check for noise
+
+    Used as a context manager around the runs. Affinity and nice value are
+    set on the calling thread, so the programs it starts inherit them while
+    the GUI and build threads keep theirs; both are restored on exit.
+    """
+
+    def __init__(self, cpus="auto", nice=None):
+        self.cpus = cpus
+        self.nice = nice
+        self.saved_affinity = None
+        self.saved_nice = None
+        self.pinned = None
+        self.priority = None
+        self.raised = False
+        self.load = []
+        self.warnings = []
+
+    @classmethod
+    def from_config(cls, config):
+        """Isolation with the configured CPUs and nice value"""
+        return cls(config.get("benchmark_cpus", "auto"), config.get("benchmark_nice"))
+
+    def __enter__(self):
+        self.pinned = self.priority = None
+        self.raised = False
+        self.warnings = []
+        self.load = [load_average()]
+        self.pin()
+        self.raise_priority()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.load.append(load_average())
+        if self.saved_affinity is not None:
+            os.sched_setaffinity(0, self.saved_affinity)
+            self.saved_affinity = None
+        if self.saved_nice is not None:
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.saved_nice)
+            except OSError:
+                pass
+            self.saved_nice = None
+        return False
+
+    def pin(self):
+        """Restrict the calling thread, and the runs it starts, to the chosen CPUs"""
+        if not hasattr(os, "sched_setaffinity"):
+            if self.cpus:
+                self.warnings.append("CPU pinning is not supported on this platform")
+            return
+        allowed = os.sched_getaffinity(0)
+        try:
+            cpus = parse_cpus(self.cpus, allowed)
+        except ValueError:
+            self.warnings.append(f"Invalid benchmark_cpus {self.cpus!r}; runs were not pinned")
+            return
+        if cpus is None:
+            return
+        if not cpus <= allowed:
+            self.warnings.append(f"CPU(s) {', '.join(map(str, sorted(cpus - allowed)))} not available; "
+                                 f"runs were not pinned")
+            return
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            self.warnings.append(f"Could not pin runs to CPU(s) {sorted(cpus)}: {e}")
+            return
+        self.saved_affinity = allowed
+        self.pinned = sorted(cpus)
+
+    def raise_priority(self):
+        """Lower the nice value of the calling thread when allowed"""
+        if not hasattr(os, "getpriority"):
+            return
+        thread_id = threading.get_native_id()
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, thread_id)
+        except OSError:
+            return
+        self.priority = current
+        if self.nice is None or int(self.nice) >= current:
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, thread_id, int(self.nice))
+        except OSError:
+            # Needs root or CAP_SYS_NICE; the runs keep the current priority
+            return
+        self.saved_nice = current
+        self.priority = int(self.nice)
+        self.raised = True
+
+    def environment(self):
+        """What the runs were isolated with and any reason to distrust them"""
+        cpus = self.pinned
+        if cpus is None:
+            cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        governors = {}
+        for cpu in cpus:
+            governor = read_sysfs(f"{CPU_SYSFS}/cpu{cpu}/cpufreq/scaling_governor")
+            if governor is not None:
+                governors[str(cpu)] = governor
+        no_turbo = read_sysfs(f"{CPU_SYSFS}/intel_pstate/no_turbo")
+        boost = read_sysfs(f"{CPU_SYSFS}/cpufreq/boost")
+        turbo = no_turbo == "0" if no_turbo is not None else (boost == "1" if boost is not None else None)
+
+        warnings = list(self.warnings)
+        slow = sorted({governor for governor in governors.values() if governor != "performance"})
+        if slow:
+            warnings.append(f"CPU governor is {', '.join(slow)}, not performance; clock changes add noise "
+                            f"(sudo cpupower frequency-set -g performance)")
+        if turbo:
+            warnings.append("Turbo boost is on; clock speed depends on temperature")
+        cpu_count = os.cpu_count() or 1
+        loads = [load for load in self.load if load is not None]
+        if loads:
+            # The benchmark itself adds about 1 to the load average while it runs
+            noise = max(loads[0], loads[-1] - 1)
+            if noise > NOISY_LOAD_PER_CPU * cpu_count:
+                warnings.append(f"Load average {noise:.2f} on {cpu_count} CPU(s): "
+                                f"other processes competed with the runs")
+        return {
+            "pinned_cpus": self.pinned,
+            "cpu_count": cpu_count,
+            "nice": self.priority,
+            "priority_raised": self.raised,
+            "governors": governors,
+            "turbo": turbo,
+            "load_average": loads,
+            "kernel": platform.release(),
+            "warnings": warnings,
+            "stable": not warnings
+        }
+
+
+def load_average():
+    """One-minute load average, None where unavailable"""
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def run_once(argv, cwd=None, timeout=None, capture=False):
+    """Run a program once; return its sample and, with capture, its output
+
+    The sample holds wall seconds, user/sys CPU seconds and peak RSS in KiB
+    (None where os.wait4 is unavailable) and the return code. The program is
+    started through the rusage helper so its RSS leaves out this process.
+    """
+    process = spawn_measured(argv, cwd=cwd, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+                             stderr=subprocess.STDOUT if capture else subprocess.DEVNULL)
+    start = time.perf_counter()
+    output = ""
+    timer = None
+    if timeout:
+        timer = threading.Timer(timeout, kill_process, args=(process,))
+        timer.start()
+    try:
+        if capture:
+            output = process.stdout.read().decode("utf-8", errors="replace")
+            process.stdout.close()
+        usage = wait_process(process) or {}
+    finally:
+        if timer is not None:
+            timer.cancel()
+    sample = {
+        # The helper's timing leaves out its own interpreter startup
+        "wall": usage.get("wall", time.perf_counter() - start),
+        "user": usage.get("user"),
+        "sys": usage.get("sys"),
+        "max_rss_kb": usage.get("max_rss_kb"),
+        "returncode": process.returncode
+    }
+    return sample, output
+
+
+class Benchmark:
+    """Run a program warmup + runs times and summarize the measured runs"""
+
+    def __init__(self, argv, runs=DEFAULT_RUNS, warmup=DEFAULT_WARMUP, cwd=None, timeout=None,
+                 isolation=None):
+        self.argv = [str(arg) for arg in argv]
+        self.runs = max(1, int(runs))
+        self.warmup = max(0, int(warmup))
+        self.cwd = cwd
+        self.timeout = timeout
+        self.isolation = isolation or Isolation(cpus=None)
+        self.cancelled = threading.Event()
+
+    @classmethod
+    def from_config(cls, config, argv, cwd=None):
+        """Benchmark with the configured run and warmup counts and isolation"""
+        return cls(argv, config.get("benchmark_runs", DEFAULT_RUNS),
+                   config.get("benchmark_warmup", DEFAULT_WARMUP), cwd,
+                   config.get("benchmark_timeout") or None, Isolation.from_config(config))
+
+    def cancel(self):
+        """Stop after the current run"""
+        self.cancelled.set()
+
+    def run(self, on_run=None):
+        """Run the benchmark and return its report
+
+        on_run(index, sample) is called after every run; warmup runs have a
+        negative index. The first run's output is kept in the report.
+        """
+        self.cancelled.clear()
+        samples = []
+        output = None
+        with self.isolation:
+            for index in range(-self.warmup, self.runs):
+                if self.cancelled.is_set():
+                    break
+                with span("benchmark run" if index >= 0 else "benchmark warmup", "run", index=index):
+                    sample, text = run_once(self.argv, self.cwd, self.timeout, capture=output is None)
+                if output is None:
+                    output = text
+                if index >= 0:
+                    samples.append(sample)
+                if on_run is not None:
+                    on_run(index, sample)
+        return self.report(samples, output)
+
+    def report(self, samples, output=None):
+        """Summary of the measured runs"""
+        ok = [sample for sample in samples if sample["returncode"] == 0]
+        return {
+            "command": self.argv,
+            "runs": len(samples),
+            "warmup": self.warmup,
+            "failures": len(samples) - len(ok),
+            "cancelled": self.cancelled.is_set(),
+            "samples": samples,
+            "stats": {metric: summarize([sample[metric] for sample in ok]) for metric in METRICS},
+            "environment": self.isolation.environment(),
+            "output": output
+        }
+
+
+class Comparison:
+    """Interleaved A/B runs of several builds of a program
+
+    Every round runs each variant once, in an order rotated by one per round,
+    so drift (thermal, background load, caches) hits all variants alike.
+    """
+
+    def __init__(self, variants, runs=DEFAULT_RUNS, warmup=DEFAULT_WARMUP, cwd=None, timeout=None,
+                 metric="wall", name=None, isolation=None):
+        # variants: (label, argv) pairs; the first one is the baseline
+        self.variants = [(label, [str(arg) for arg in argv]) for label, argv in variants]
+        if len(self.variants) < 2:
+            raise ValueError("A comparison needs at least two variants")
+        self.runs = max(1, int(runs))
+        self.warmup = max(0, int(warmup))
+        self.cwd = cwd
+        self.timeout = timeout
+        self.metric = metric
+        self.name = name
+        self.isolation = isolation or Isolation(cpus=None)
+        self.cancelled = threading.Event()
+
+    @classmethod
+    def from_config(cls, config, variants, cwd=None, name=None):
+        """Comparison with the configured run and warmup counts and isolation"""
+        return cls(variants, config.get("benchmark_runs", DEFAULT_RUNS),
+                   config.get("benchmark_warmup", DEFAULT_WARMUP), cwd,
+                   config.get("benchmark_timeout") or None, name=name,
+                   isolation=Isolation.from_config(config))
+
+    def cancel(self):
+        """Stop after the current run"""
+        self.cancelled.set()
+
+    def run(self, on_run=None):
+        """Run every variant warmup + runs times, interleaved; return the report
+
+        on_run(label, index, sample) is called after every run; warmup runs
+        have a negative index.
+        """
+        self.cancelled.clear()
+        samples = {label: [] for label, _ in self.variants}
+        with self.isolation:
+            for index in range(-self.warmup, self.runs):
+                if self.cancelled.is_set():
+                    break
+                shift = index % len(self.variants)
+                for label, argv in self.variants[shift:] + self.variants[:shift]:
+                    if self.cancelled.is_set():
+                        break
+                    with span(f"compare {label}", "run", index=index):
+                        sample, _ = run_once(argv, self.cwd, self.timeout)
+                    if index >= 0:
+                        samples[label].append(sample)
+                    if on_run is not None:
+                        on_run(label, index, sample)
+        return self.report(samples)
+
+    def report(self, samples):
+        """Per-variant statistics and each variant's speedup over the baseline"""
+        values = {}
+        variants = []
+        for label, argv in self.variants:
+            ok = [sample for sample in samples[label] if sample["returncode"] == 0]
+            values[label] = [sample[self.metric] for sample in ok if sample[self.metric] is not None]
+            variants.append({
+                "label": label,
+                "command": argv,
+                "runs": len(samples[label]),
+                "failures": len(samples[label]) - len(ok),
+                "stats": summarize(values[label])
+            })
+
+        baseline = self.variants[0][0]
+        comparisons = [self.compare(baseline, label, values[baseline], values[label])
+                       for label, _ in self.variants[1:]]
+        return {
+            "name": self.name,
+            "metric": self.metric,
+            "baseline": baseline,
+            "runs": self.runs,
+            "warmup": self.warmup,
+            "cancelled": self.cancelled.is_set(),
+            "variants": variants,
+            "comparisons": comparisons,
+            "environment": self.isolation.environment()
+        }
+
+    def compare(self, baseline, label, baseline_values, values):
+        """Speedup of one variant over the baseline, its bounds and significance"""
+        ratio, interval = ratio_interval(baseline_values, values)
+        _, p_value = mann_whitney(baseline_values, values)
+        comparison = {
+            "baseline": baseline,
+            "variant": label,
+            "ratio": ratio,
+            "ratio_ci": interval,
+            "p_value": p_value,
+            "significant": ratio is not None and p_value < SIGNIFICANCE,
+            "message": None
+        }
+        if ratio is None:
+            comparison["message"] = f"{label}: no successful runs to compare with {baseline}"
+            return comparison
+
+        # Percent change of the metric; half the interval width is the ± bound
+        change = (1 - ratio) * 100
+        bound = f" ± {abs(interval[1] - interval[0]) * 50:.0f}%" if interval else ""
+        target = f" on {self.name}" if self.name else ""
+        if comparison["significant"]:
+            direction = "faster" if ratio < 1 else "slower"
+            comparison["message"] = (f"{label} is {abs(change):.0f}%{bound} {direction} than {baseline}"
+                                     f"{target} (p={p_value:.3g})")
+        else:
+            comparison["message"] = (f"{label} vs {baseline}{target}: no significant difference "
+                                     f"({-change:+.0f}%{bound}, p={p_value:.2g})")
+        return comparison
+
+
+def format_seconds(value):
+    """Seconds with a unit that keeps three significant digits"""
+    if value is None:
+        return "-"
+    if value < 1e-3:
+        return f"{value * 1e6:.1f}µs"
+    if value < 1:
+        return f"{value * 1e3:.2f}ms"
+    return f"{value:.3f}s"
+
+
+def summary_lines(report):
+    """Human-readable benchmark results for the GUIs"""
+    lines = [f"⏱️ {report['runs']} run(s) after {report['warmup']} warmup run(s)"
+             + (f", {report['failures']} failed" if report["failures"] else "")
+             + (" (cancelled)" if report["cancelled"] else "")]
+    units = {"wall": ("Wall", format_seconds), "user": ("User CPU", format_seconds),
+             "sys": ("Sys CPU", format_seconds),
+             "max_rss_kb": ("Peak RSS", lambda kb: f"{kb / 1024:.1f} MB" if kb is not None else "-")}
+    for metric, (label, show) in units.items():
+        stats = report["stats"].get(metric)
+        if not stats:
+            continue
+        line = (f"   {label:<9} median {show(stats['median'])}  p95 {show(stats['p95'])}  "
+                f"σ {show(stats['stdev'])}")
+        if stats["median_ci"]:
+            line += f"  median 95% CI [{show(stats['median_ci'][0])}, {show(stats['median_ci'][1])}]"
+        elif stats["mean_ci"]:
+            line += f"  mean 95% CI [{show(stats['mean_ci'][0])}, {show(stats['mean_ci'][1])}]"
+        lines.append(line)
+    wall = report["stats"].get("wall")
+    if wall and wall["cv"] is not None and wall["cv"] > 0.05:
+        lines.append(f"   ⚠️ Wall time varies by {wall['cv'] * 100:.0f}% between runs; "
+                     f"use more runs or a quieter machine")
+    return lines + environment_lines(report["environment"])
+
+
+def environment_lines(environment):
+    """Isolation settings and stability warnings of a run"""
+    pinned = (f"pinned to CPU {', '.join(map(str, environment['pinned_cpus']))}"
+              if environment["pinned_cpus"] else "not pinned")
+    lines = [f"   📌 {pinned}, nice {environment['nice']}"]
+    lines.extend(f"   ⚠️ {warning}" for warning in environment["warnings"])
+    return lines
+
+
+def comparison_lines(report):
+    """Human-readable A/B results for the GUIs"""
+    lines = [f"⚖️ {report['runs']} interleaved run(s) per variant after {report['warmup']} warmup round(s)"
+             + (" (cancelled)" if report["cancelled"] else "")]
+    for variant in report["variants"]:
+        stats = variant["stats"]
+        line = f"   {variant['label']:<16} "
+        if stats:
+            line += f"median {format_seconds(stats['median'])}  p95 {format_seconds(stats['p95'])}"
+        else:
+            line += "no successful runs"
+        if variant["failures"]:
+            line += f"  ({variant['failures']} failed)"
+        lines.append(line)
+    for comparison in report["comparisons"]:
+        lines.append(("   🏆 " if comparison["significant"] else "   ≈ ") + comparison["message"])
+    return lines + environment_lines(report["environment"])
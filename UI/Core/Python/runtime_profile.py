@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+CPU profiles of built executables
+Runs a program under `perf record` (falling back to valgrind's callgrind when
+perf is missing or not permitted), collapses the call stacks and writes an SVG
+flamegraph, the collapsed stacks and a top-N hot-function table next to the
+executable. Cachegrind counts instructions and cache misses, which unlike
+times do not depend on machine load
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+import flamegraph
+from build_trace import span
+
+PROFILERS = ("perf", "callgrind")
+DEFAULT_TOP = 20
+# Sampling frequency of perf record, off the round numbers timers run at
+DEFAULT_FREQUENCY = 999
+
+# "    55d0c0a1b123 CryptoPP::Rijndael::Enc::ProcessAndXorBlock(...)+0x23 (/path/AES_gcc)"
+PERF_FRAME_RE = re.compile(r"^\s+([0-9a-fA-F]+)\s+(.+?)\s+\((.*)\)\s*$")
+OFFSET_RE = re.compile(r"\+0x[0-9a-fA-F]+$")
+# "fn=(12) name", "cfn=(12)" or "fn=name"
+CALLGRIND_NAME_RE = re.compile(r"^(fn|cfn)=(?:\((\d+)\))?\s*(.*)$")
+
+# Frames deeper than this are cut off when expanding the callgrind call graph
+MAX_DEPTH = 64
+# Callgrind paths below this share of the total cost are dropped
+MIN_SHARE = 0.0005
+
+
+def collapse_perf(text):
+    """Collapsed stacks ("comm;caller;callee" -> samples) from `perf script` output"""
+    stacks = {}
+    comm = None
+    frames = []
+
+    def flush():
+        if comm is not None and frames:
+            stack = ";".join([comm] + frames[::-1])
+            stacks[stack] = stacks.get(stack, 0) + 1
+
+    for line in text.splitlines():
+        if not line.strip():
+            flush()
+            comm, frames = None, []
+            continue
+        if not line[0].isspace():
+            # Sample header: "AES_gcc 4242 [001] 1234.5678:   250000 cycles:u:"
+            flush()
+            comm, frames = line.split()[0], []
+            continue
+        match = PERF_FRAME_RE.match(line)
+        if not match:
+            continue
+        symbol, dso = match.group(2), match.group(3)
+        if symbol == "[unknown]":
+            symbol = f"[{os.path.basename(dso)}]" if dso and dso != "unknown" else "[unknown]"
+        frames.append(OFFSET_RE.sub("", symbol).replace(";", ":"))
+    flush()
+    return stacks
+
+
+def parse_callgrind(text):
+    """Self costs, call edges and event name of a callgrind output file
+
+    Returns (self_costs, calls, event) with self_costs {function: cost} and
+    calls {(caller, callee): inclusive cost} for the first event (Ir).
+    """
+    names = {}
+    self_costs = {}
+    calls = {}
+    positions = 1
+    event = "Ir"
+    function = None
+    callee = None
+    in_call = False
+
+    def resolve(match):
+        number, name = match.group(2), match.group(3).strip()
+        if number is None:
+            return name
+        if name:
+            names[number] = name
+        return names.get(number, f"fn{number}")
+
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("positions:"):
+            positions = len(line.split()[1:]) or 1
+            continue
+        if line.startswith("events:"):
+            event = (line.split()[1:] or [event])[0]
+            continue
+        match = CALLGRIND_NAME_RE.match(line)
+        if match:
+            if match.group(1) == "fn":
+                function = resolve(match)
+                self_costs.setdefault(function, 0)
+            else:
+                callee = resolve(match)
+            continue
+        if line.startswith("calls="):
+            in_call = True
+            continue
+        if not (line[0].isdigit() or line[0] in "+-*") or function is None:
+            continue
+        fields = line.split()
+        cost = int(fields[positions]) if len(fields) > positions and fields[positions].isdigit() else 0
+        if in_call:
+            # The cost line after calls= is the inclusive cost of that call
+            if callee is not None:
+                key = (function, callee)
+                calls[key] = calls.get(key, 0) + cost
+            in_call = False
+        else:
+            self_costs[function] = self_costs.get(function, 0) + cost
+    return self_costs, calls, event
+
+
+def collapse_callgrind(text, name=None):
+    """Approximate collapsed stacks from a callgrind call graph
+
+    Callgrind keeps caller/callee edges, not whole stacks, so each function's
+    cost is split over its callers in proportion to what each call cost.
+    """
+    self_costs, calls, event = parse_callgrind(text)
+    callees = {}
+    callers = set()
+    for (caller, callee), cost in calls.items():
+        if caller != callee and cost > 0:
+            callees.setdefault(caller, []).append((callee, cost))
+            callers.add(callee)
+    inclusive = {function: cost + sum(cost for _, cost in callees.get(function, []))
+                 for function, cost in self_costs.items()}
+    total = sum(self_costs.values())
+    if not total:
+        return {}, event
+    floor = total * MIN_SHARE
+    stacks = {}
+
+    def expand(path, function, budget):
+        own = inclusive.get(function) or 0
+        if own <= 0 or budget < floor:
+            return
+        share = budget / own
+        stack = ";".join(path)
+        leftover = self_costs.get(function, 0) * share
+        for callee, cost in callees.get(function, []):
+            if callee in path or len(path) >= MAX_DEPTH:
+                # Recursion and very deep chains are charged to the caller
+                leftover += cost * share
+            else:
+                expand(path + [callee], callee, cost * share)
+        value = int(round(leftover))
+        if value > 0:
+            stacks[stack] = stacks.get(stack, 0) + value
+
+    roots = [function for function in self_costs if function not in callers]
+    root = [name] if name else []
+    for function in roots:
+        expand(root + [function], function, inclusive.get(function, 0))
+    return stacks, event
+
+
+def hot_functions(stacks, top=DEFAULT_TOP):
+    """Top functions by self cost, with their inclusive cost and shares"""
+    total = sum(stacks.values())
+    self_costs = {}
+    inclusive = {}
+    for stack, value in stacks.items():
+        frames = stack.split(";")
+        self_costs[frames[-1]] = self_costs.get(frames[-1], 0) + value
+        for function in set(frames[1:]) or set(frames):
+            inclusive[function] = inclusive.get(function, 0) + value
+    ranked = sorted(self_costs.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{
+        "function": function,
+        "self": value,
+        "self_percent": round(100.0 * value / total, 2) if total else 0.0,
+        "total": inclusive.get(function, value),
+        "total_percent": round(100.0 * inclusive.get(function, value) / total, 2) if total else 0.0
+    } for function, value in ranked]
+
+
+def format_hot_functions(rows, unit="samples"):
+    """Plain text table of hot functions"""
+    lines = [f"{'Self %':>7}  {'Total %':>7}  {'Self ' + unit:>14}  Function",
+             f"{'-' * 7}  {'-' * 7}  {'-' * 14}  {'-' * 8}"]
+    for row in rows:
+        lines.append(f"{row['self_percent']:>7.2f}  {row['total_percent']:>7.2f}  {row['self']:>14,}  "
+                     f"{row['function']}")
+    return "\n".join(lines)
+
+
+class Profiler:
+    """Profile one run of an executable and write its flamegraph and hot functions"""
+
+    def __init__(self, argv, tool="auto", output_dir=None, cwd=None, frequency=DEFAULT_FREQUENCY,
+                 top=DEFAULT_TOP, call_graph="dwarf", perf_path="perf", valgrind_path="valgrind"):
+        self.argv = [str(arg) for arg in argv]
+        self.tool = tool
+        self.output_dir = Path(output_dir or os.path.dirname(os.path.abspath(self.argv[0])))
+        self.cwd = cwd
+        self.frequency = frequency
+        self.top = top
+        self.call_graph = call_graph
+        self.perf_path = perf_path
+        self.valgrind_path = valgrind_path
+
+    @classmethod
+    def from_config(cls, config, argv, tool=None, output_dir=None, cwd=None):
+        """Profiler with the configured tools, sampling frequency and table size"""
+        return cls(argv, tool or config.get("profile_tool", "auto"), output_dir, cwd,
+                   config.get("profile_frequency", DEFAULT_FREQUENCY), config.get("profile_top", DEFAULT_TOP),
+                   config.get("profile_call_graph", "dwarf"), config.get("perf_path", "perf"),
+                   config.get("valgrind_path", "valgrind"))
+
+    def tools(self):
+        """Profilers to try, in order"""
+        if self.tool != "auto":
+            return [self.tool]
+        return [tool for tool, path in (("perf", self.perf_path), ("callgrind", self.valgrind_path))
+                if shutil.which(path)]
+
+    def run(self):
+        """Profile the program; return a report with the written files and hot functions"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        name = os.path.basename(self.argv[0])
+        report = {"command": self.argv, "tool": None, "returncode": None, "attempts": [],
+                  "unit": None, "total": 0, "hot_functions": [], "files": {}, "error": None}
+        tools = self.tools()
+        if not tools:
+            report["error"] = "Neither perf nor valgrind is installed (e.g. sudo apt install linux-perf valgrind)"
+            return report
+
+        for tool in tools:
+            with span(f"profile {name}", "run", tool=tool):
+                if tool == "perf":
+                    stacks, unit, returncode, error = self.run_perf(name)
+                else:
+                    stacks, unit, returncode, error = self.run_callgrind(name)
+            report["attempts"].append({"tool": tool, "error": error})
+            if stacks:
+                report.update({"tool": tool, "returncode": returncode, "unit": unit, "error": None})
+                break
+            report["error"] = error or f"{tool} recorded no samples"
+        else:
+            return report
+
+        prefix = self.output_dir / f"{name}.{report['tool']}"
+        title = f"{report['tool']} profile: {' '.join([name] + self.argv[1:])}"
+        rows = hot_functions(stacks, self.top)
+        table = Path(f"{prefix}-top.txt")
+        table.write_text(format_hot_functions(rows, unit) + "\n", encoding="utf-8")
+        report.update({
+            "total": sum(stacks.values()),
+            "hot_functions": rows,
+            "files": {
+                "flamegraph": flamegraph.write_svg(f"{prefix}.svg", stacks, title, f" {unit}"),
+                "collapsed": flamegraph.write_collapsed(f"{prefix}.folded", stacks),
+                "top": str(table)
+            }
+        })
+        return report
+
+    def run_perf(self, name):
+        """Sample the program with perf record; return (stacks, unit, returncode, error)"""
+        data_file = self.output_dir / f"{name}.perf.data"
+        command = [self.perf_path, "record", "-F", str(self.frequency), "--call-graph", self.call_graph,
+                   "-o", str(data_file), "--"] + self.argv
+        record = subprocess.run(command, cwd=self.cwd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, text=True, errors="replace")
+        if not data_file.exists() or data_file.stat().st_size == 0:
+            # Usually kernel.perf_event_paranoid forbidding unprivileged sampling
+            lines = [line for line in record.stderr.splitlines() if line.strip()]
+            return {}, "samples", record.returncode, lines[0] if lines else "perf record failed"
+        script = subprocess.run([self.perf_path, "script", "-i", str(data_file)], stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors="replace")
+        return collapse_perf(script.stdout), "samples", record.returncode, None
+
+    def run_callgrind(self, name):
+        """Count instructions with callgrind; return (stacks, unit, returncode, error)"""
+        out_file = self.output_dir / f"{name}.callgrind.out"
+        command = [self.valgrind_path, "--tool=callgrind", f"--callgrind-out-file={out_file}"] + self.argv
+        with tempfile.TemporaryFile() as log:
+            process = subprocess.run(command, cwd=self.cwd, stdin=subprocess.DEVNULL,
+                                     stdout=subprocess.DEVNULL, stderr=log)
+            if not out_file.exists():
+                log.seek(0)
+                lines = [line for line in log.read().decode("utf-8", "replace").splitlines() if line.strip()]
+                return {}, "Ir", process.returncode, lines[-1] if lines else "valgrind failed"
+        stacks, event = collapse_callgrind(out_file.read_text(encoding="utf-8", errors="replace"), name)
+        return stacks, event, process.returncode, None
+
+
+def cachegrind_summary(text):
+    """{event: count} from the events: and summary: lines of a cachegrind output file"""
+    events = []
+    totals = []
+    for line in text.splitlines():
+        if line.startswith("events:"):
+            events = line.split()[1:]
+        elif line.startswith("summary:"):
+            totals = [int(value) for value in line.split()[1:]]
+    return dict(zip(events, totals))
+
+
+class InstructionCounter:
+    """Count instructions and simulated cache misses of one run with cachegrind"""
+
+    def __init__(self, argv, cwd=None, valgrind_path="valgrind", input_file=None, timeout=None):
+        self.argv = [str(arg) for arg in argv]
+        self.cwd = cwd
+        self.valgrind_path = valgrind_path
+        self.input_file = input_file
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config, argv, cwd=None, input_file=None):
+        """Counter with the configured valgrind and per-run time limit"""
+        return cls(argv, cwd, config.get("valgrind_path", "valgrind"), input_file,
+                   config.get("benchmark_timeout") or None)
+
+    def run(self):
+        """Run the program under cachegrind; return its counts"""
+        report = {"command": self.argv, "input": self.input_file, "tool": "cachegrind", "returncode": None,
+                  "counts": {}, "instructions": None, "data_refs": None, "l1_misses": None,
+                  "ll_misses": None, "error": None}
+        if not shutil.which(self.valgrind_path):
+            report["error"] = "valgrind is not installed (e.g. sudo apt install valgrind)"
+            return report
+
+        name = os.path.basename(self.argv[0])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            out_file = os.path.join(temp_dir, "cachegrind.out")
+            command = [self.valgrind_path, "--tool=cachegrind", "--cache-sim=yes",
+                       f"--cachegrind-out-file={out_file}"] + self.argv
+            stdin = open(self.input_file, "rb") if self.input_file else subprocess.DEVNULL
+            try:
+                with span(f"cachegrind {name}", "run"):
+                    process = subprocess.run(command, cwd=self.cwd, stdin=stdin, stdout=subprocess.DEVNULL,
+                                             stderr=subprocess.PIPE, timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                report["error"] = f"{name} did not finish within {self.timeout}s"
+                return report
+            finally:
+                if self.input_file:
+                    stdin.close()
+            report["returncode"] = process.returncode
+            if not os.path.exists(out_file):
+                lines = [line for line in process.stderr.decode("utf-8", "replace").splitlines() if line.strip()]
+                report["error"] = lines[-1] if lines else "cachegrind failed"
+                return report
+            with open(out_file, "r", encoding="utf-8", errors="replace") as f:
+                counts = cachegrind_summary(f.read())
+
+        def total(*events):
+            values = [counts[event] for event in events if event in counts]
+            return sum(values) if values else None
+
+        report.update({
+            "counts": counts,
+            "instructions": counts.get("Ir"),
+            "data_refs": total("Dr", "Dw"),
+            "l1_misses": total("I1mr", "D1mr", "D1mw"),
+            "ll_misses": total("ILmr", "DLmr", "DLmw")
+        })
+        return report
+
+
+def profile_lines(report):
+    """Human-readable profile results for the GUIs"""
+    if report["error"]:
+        return [f"❌ Profiling failed: {report['error']}"]
+    lines = [f"🔥 {report['tool']}: {report['total']:,} {report['unit']}"]
+    for attempt in report["attempts"]:
+        if attempt["error"]:
+            lines.append(f"   ⚠️ {attempt['tool']} unavailable: {attempt['error']}")
+    lines.append(format_hot_functions(report["hot_functions"], report["unit"]))
+    lines.append(f"📊 Flamegraph: {report['files']['flamegraph']}")
+    lines.append(f"📄 Hot functions: {report['files']['top']}")
+    return lines
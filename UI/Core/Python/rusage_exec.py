@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Fork/exec helper that reports a program's own resource usage
+Started by output_stream.spawn_measured as `python3 -I -S rusage_exec.py <fd> program args...`.
+A child forked straight from the GUI or CLI keeps the parent's resident memory
+until exec, and the kernel folds that into its peak RSS; forking from this
+small interpreter keeps the floor at a few MB. Writes "max_rss_kb user sys
+wall" to fd, wall timed from fork to exit without the helper's own startup,
+and exits with the program's status. SIGTERM and SIGHUP are passed on,
+SIGUSR1 kills the program, SIGINT reaches it from the terminal directly.
+"""
+
+import os
+import signal
+import sys
+import time
+
+FORWARDED = (signal.SIGTERM, signal.SIGHUP)
+
+
+def main():
+    fd = int(sys.argv[1])
+    argv = sys.argv[2:]
+    # The program must not inherit the report pipe
+    os.set_inheritable(fd, False)
+
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.execvp(argv[0], argv)
+        except OSError as e:
+            os.write(2, f"{argv[0]}: {e.strerror}\n".encode())
+        os._exit(127)
+
+    def forward(signum, frame):
+        os.kill(pid, signal.SIGKILL if signum == signal.SIGUSR1 else signum)
+
+    for signum in FORWARDED + (signal.SIGUSR1,):
+        signal.signal(signum, forward)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    _, status, usage = os.wait4(pid, 0)
+    wall = time.perf_counter() - start
+    os.write(fd, f"{usage.ru_maxrss} {usage.ru_utime} {usage.ru_stime} {wall}".encode())
+    os.close(fd)
+
+    if os.WIFSIGNALED(status):
+        # Die the same way so Popen.returncode is -signal as for a direct child
+        signum = os.WTERMSIG(status)
+        if signum != signal.SIGKILL:
+            signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+        os._exit(128 + signum)
+    os._exit(os.waitstatus_to_exitcode(status))
+
+
+if __name__ == "__main__":
+    main()
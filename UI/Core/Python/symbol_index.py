@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Header and symbol index for library flag resolution
+Indexes the headers under the configured include directories and the exported
+symbols (nm -D) of the libraries under the library directories in SQLite, so an
+unresolved symbol or missing header maps to the exact -l/-L/-I flag
+"""
+
+import os
+import re
+import json
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from toolchain_probe import path_signature
+
+DEFAULT_INDEX_FILE = str(Path.home() / ".cache" / "crypto-compiler" / "symbol-index.db")
+
+HEADER_EXTENSIONS = ("", ".h", ".hh", ".hpp", ".hxx", ".inl")
+LIBRARY_PATTERN = re.compile(r"^lib(.+?)\.(so(\.[0-9.]+)?|a)$")
+
+UNDEFINED_REFERENCE = re.compile(r"undefined reference to [`'‘](.+?)['’]\s*$")
+MISSING_HEADER = re.compile(r"fatal error: ([^:\s]+): No such file or directory")
+MISSING_LIBRARY = re.compile(r"cannot find -l(\S+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS libraries (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE,
+    name TEXT,
+    dir TEXT,
+    signature TEXT
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    name TEXT,
+    base TEXT,
+    library_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols(name);
+CREATE INDEX IF NOT EXISTS symbols_base ON symbols(base);
+CREATE INDEX IF NOT EXISTS symbols_library ON symbols(library_id);
+CREATE TABLE IF NOT EXISTS header_dirs (
+    dir TEXT PRIMARY KEY,
+    root TEXT,
+    signature TEXT,
+    subdirs TEXT
+);
+CREATE TABLE IF NOT EXISTS headers (
+    name TEXT,
+    path TEXT,
+    dir TEXT
+);
+CREATE INDEX IF NOT EXISTS headers_name ON headers(name);
+CREATE INDEX IF NOT EXISTS headers_dir ON headers(dir);
+"""
+
+
+def library_name(filename):
+    """Return "ssl" for libssl.so.3 / libssl.a, or None"""
+    match = LIBRARY_PATTERN.match(filename)
+    return match.group(1) if match else None
+
+
+def symbol_base(name):
+    """Symbol without its parameter list, for lenient matching"""
+    return name.split("(", 1)[0]
+
+
+def read_symbols(library_path):
+    """Exported, demangled symbol names of a shared or static library"""
+    argv = ["nm", "-C", "--defined-only"]
+    if not library_path.endswith(".a"):
+        argv.insert(1, "-D")
+    try:
+        result = subprocess.run(argv + [library_path], capture_output=True, text=True,
+                                encoding="utf-8", errors="replace", timeout=60)
+    except Exception:
+        return []
+    symbols = set()
+    for line in result.stdout.splitlines():
+        parts = line.split(None, 2)
+        # "<address> <type> <name>"; lowercase types are local symbols
+        if len(parts) == 3 and len(parts[1]) == 1 and parts[1].isupper():
+            # Drop the version suffix of versioned symbols: SHA256@@OPENSSL_3.0.0
+            symbols.add(parts[2].split("@", 1)[0])
+    return sorted(symbols)
+
+
+def index_dirs_from_config(config):
+    """Return (include_dirs, lib_dirs) from a flat engine config or a LinuxCompilerConfig profile"""
+    include_dirs = []
+    lib_dirs = []
+    if isinstance(config.get("libraries"), dict):
+        for lib_config in config["libraries"].values():
+            include_dirs.extend(lib_config.get("include_dirs", []))
+            lib_dirs.extend(lib_config.get("lib_dirs", []))
+    for key, value in config.items():
+        if not isinstance(value, str) or not value:
+            continue
+        if key == "cryptopp_include" or key.startswith("openssl_include_"):
+            include_dirs.append(value)
+        elif key.startswith(("cryptopp_lib_", "openssl_lib_")):
+            lib_dirs.append(value)
+    existing = lambda dirs: [d for d in dict.fromkeys(dirs) if os.path.isdir(d)]
+    return existing(include_dirs), existing(lib_dirs)
+
+
+class SymbolIndex:
+    """SQLite index of headers and exported library symbols"""
+
+    def __init__(self, include_dirs=(), lib_dirs=(), index_file=DEFAULT_INDEX_FILE, max_workers=None):
+        self.include_dirs = list(include_dirs)
+        self.lib_dirs = list(lib_dirs)
+        self.index_file = Path(os.path.expanduser(index_file))
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.index_file), check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, config):
+        """Create index over the configured include/lib directories, or None when disabled"""
+        if not config.get("symbol_index_enabled", True):
+            return None
+        include_dirs, lib_dirs = index_dirs_from_config(config)
+        return cls(include_dirs, lib_dirs, config.get("symbol_index_file", DEFAULT_INDEX_FILE))
+
+    def close(self):
+        """Close the database"""
+        self.db.close()
+
+    # ------------------------------------------------------------- refresh
+
+    def refresh(self):
+        """Bring the index up to date; only changed libraries and directories are rescanned"""
+        libraries = self.refresh_libraries(self.lib_dirs)
+        headers = self.refresh_headers(self.include_dirs)
+        return {"libraries_scanned": libraries, "header_dirs_scanned": headers}
+
+    def stats(self):
+        """Number of indexed libraries, symbols and headers"""
+        with self.lock:
+            counts = {table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ("libraries", "symbols", "headers")}
+        counts.update({"index_file": str(self.index_file),
+                       "include_dirs": self.include_dirs, "lib_dirs": self.lib_dirs})
+        return counts
+
+    def library_files(self, lib_dirs):
+        """Library files under lib_dirs, one per real file"""
+        files = {}
+        for lib_dir in lib_dirs:
+            try:
+                names = sorted(os.listdir(lib_dir))
+            except OSError:
+                continue
+            for filename in names:
+                if library_name(filename) is None:
+                    continue
+                path = os.path.join(lib_dir, filename)
+                real_path = os.path.realpath(path)
+                # Prefer the unversioned libfoo.so symlink that -lfoo resolves
+                if os.path.isfile(real_path) and (real_path not in files or len(path) < len(files[real_path])):
+                    files[real_path] = path
+        # The linker picks libfoo.so over libfoo.a, so index the archive only when it is alone
+        shared = {(os.path.dirname(path), library_name(os.path.basename(path)))
+                  for path in files.values() if not path.endswith(".a")}
+        return sorted(path for path in files.values()
+                      if not (path.endswith(".a") and
+                              (os.path.dirname(path), library_name(os.path.basename(path))) in shared))
+
+    def refresh_libraries(self, lib_dirs):
+        """Re-run nm for new or changed libraries; return how many were scanned"""
+        paths = self.library_files(lib_dirs)
+        with self.lock:
+            known = dict(self.db.execute("SELECT path, signature FROM libraries"))
+
+        changed = []
+        for path in paths:
+            signature = json.dumps(path_signature(os.path.realpath(path)))
+            if known.get(path) != signature:
+                changed.append((path, signature))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            scanned = list(executor.map(lambda item: (item, read_symbols(item[0])), changed))
+
+        with self.lock, self.db:
+            # Libraries that disappeared from the configured directories
+            wanted = set(paths)
+            for path in set(known) - wanted:
+                self.forget_library(path)
+            for (path, signature), symbols in scanned:
+                self.forget_library(path)
+                cursor = self.db.execute(
+                    "INSERT INTO libraries (path, name, dir, signature) VALUES (?, ?, ?, ?)",
+                    (path, library_name(os.path.basename(path)), os.path.dirname(path), signature))
+                self.db.executemany(
+                    "INSERT INTO symbols (name, base, library_id) VALUES (?, ?, ?)",
+                    [(name, symbol_base(name), cursor.lastrowid) for name in symbols])
+        return len(changed)
+
+    def forget_library(self, path):
+        """Drop a library and its symbols (caller holds the lock and transaction)"""
+        row = self.db.execute("SELECT id FROM libraries WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.db.execute("DELETE FROM symbols WHERE library_id = ?", row)
+            self.db.execute("DELETE FROM libraries WHERE id = ?", row)
+
+    def refresh_headers(self, include_dirs):
+        """Re-list include directories whose mtime changed; return how many were scanned"""
+        scanned = 0
+        with self.lock:
+            known = {row[0]: (row[1], row[2], json.loads(row[3]))
+                     for row in self.db.execute("SELECT dir, root, signature, subdirs FROM header_dirs")}
+        with self.lock, self.db:
+            roots = set(include_dirs)
+            for directory, (root, _, _) in known.items():
+                if root not in roots:
+                    self.db.execute("DELETE FROM headers WHERE dir = ?", (directory,))
+                    self.db.execute("DELETE FROM header_dirs WHERE dir = ?", (directory,))
+
+            pending = [(root, root) for root in include_dirs]
+            seen = set()
+            while pending:
+                directory, root = pending.pop()
+                if directory in seen:
+                    continue
+                seen.add(directory)
+                signature = json.dumps(path_signature(directory))
+                cached = known.get(directory)
+                if cached and cached[1] == signature:
+                    pending.extend((subdir, root) for subdir in cached[2])
+                    continue
+
+                scanned += 1
+                headers = []
+                subdirs = []
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_dir():
+                                subdirs.append(entry.path)
+                            elif os.path.splitext(entry.name)[1] in HEADER_EXTENSIONS:
+                                headers.append((entry.name, entry.path, directory))
+                except OSError:
+                    continue
+                self.db.execute("DELETE FROM headers WHERE dir = ?", (directory,))
+                self.db.executemany("INSERT INTO headers (name, path, dir) VALUES (?, ?, ?)", headers)
+                self.db.execute("INSERT OR REPLACE INTO header_dirs VALUES (?, ?, ?, ?)",
+                                (directory, root, signature, json.dumps(subdirs)))
+                pending.extend((subdir, root) for subdir in subdirs)
+        return scanned
+
+    # -------------------------------------------------------------- lookup
+
+    def find_symbol(self, symbol):
+        """Libraries exporting symbol: [{"library", "flags"}], exact match first"""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT DISTINCT l.path, l.name, l.dir FROM symbols s JOIN libraries l "
+                "ON s.library_id = l.id WHERE s.name = ?", (symbol,)).fetchall()
+            if not rows:
+                rows = self.db.execute(
+                    "SELECT DISTINCT l.path, l.name, l.dir FROM symbols s JOIN libraries l "
+                    "ON s.library_id = l.id WHERE s.base = ?", (symbol_base(symbol),)).fetchall()
+        return [{"library": path, "flags": [f"-L{directory}", f"-l{name}"]}
+                for path, name, directory in rows]
+
+    def find_header(self, header):
+        """Include directories providing header: [{"header", "flags"}]"""
+        header = header.strip("<>\"")
+        with self.lock:
+            rows = self.db.execute("SELECT path FROM headers WHERE name = ?",
+                                   (os.path.basename(header),)).fetchall()
+        results = []
+        for (path,) in rows:
+            if path.endswith(os.sep + header):
+                include_dir = path[:-len(header) - 1]
+                results.append({"header": path, "flags": [f"-I{include_dir}"]})
+        return results
+
+    def library_symbol_count(self, name):
+        """Number of indexed symbols exported by lib<name>"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT COUNT(*) FROM symbols s JOIN libraries l ON s.library_id = l.id "
+                "WHERE l.name = ?", (name,)).fetchone()
+        return row[0]
+
+    def diagnose(self, error_text):
+        """Map undefined references and missing headers in compiler output to flags"""
+        suggestions = []
+        seen = set()
+        for line in error_text.splitlines():
+            match = UNDEFINED_REFERENCE.search(line)
+            if match:
+                kind, name = "symbol", match.group(1)
+                matches = self.find_symbol(name)
+            else:
+                match = MISSING_HEADER.search(line)
+                if not match:
+                    continue
+                kind, name = "header", match.group(1)
+                matches = self.find_header(name)
+            if (kind, name) in seen:
+                continue
+            seen.add((kind, name))
+            flags = matches[0]["flags"] if matches else []
+            suggestions.append({"kind": kind, "name": name, "flags": flags,
+                                "candidates": [m.get("library") or m.get("header") for m in matches]})
+        return suggestions
+
+
+def suggestion_message(suggestion):
+    """One-line human readable form of a diagnose() entry"""
+    name = suggestion["name"]
+    if not suggestion["flags"]:
+        where = "no indexed library" if suggestion["kind"] == "symbol" else "no indexed include directory"
+        return f"❌ {name}: {where} provides it - install the development package"
+    source = suggestion["candidates"][0]
+    return f"💡 {name}: found in {source} - add {' '.join(suggestion['flags'])}"
+
+
+def apply_suggestions(steps, suggestions):
+    """Add suggested -I flags to compile steps and -L/-l flags to linking steps
+
+    Returns the flags that were added.
+    """
+    include_flags = []
+    link_flags = []
+    for suggestion in suggestions:
+        for flag in suggestion["flags"]:
+            target = include_flags if flag.startswith("-I") else link_flags
+            if flag not in target:
+                target.append(flag)
+
+    added = []
+    for step in steps:
+        if step.kind not in ("compile", "link"):
+            continue
+        new_flags = []
+        if step.kind == "compile" and include_flags:
+            new_flags.extend(flag for flag in include_flags if flag not in step.argv)
+            step.argv[1:1] = new_flags
+        # Compile steps without -c also link
+        if link_flags and (step.kind == "link" or "-c" not in step.argv):
+            extra = [flag for flag in link_flags if flag not in step.argv]
+            step.argv.extend(extra)
+            new_flags.extend(extra)
+        added.extend(flag for flag in new_flags if flag not in added)
+    return added
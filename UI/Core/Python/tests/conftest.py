@@ -0,0 +1,8 @@
+"""
+Shared pytest setup: the Core modules are flat scripts, so put them on sys.path
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,167 @@
+"""
+Known-answer tests for build history trends and regressions
+"""
+
+import time
+
+import pytest
+
+from build_history import DAY, BuildHistory
+
+# Fixed "now" so windows and days do not depend on the clock
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = BuildHistory(tmp_path / "history.db")
+    yield history
+    history.close()
+
+
+def add_build(history, days_ago, duration, target="AES.cpp", compiler="gcc", toolchain="gcc 12",
+              max_rss_kb=None, success=True, up_to_date=False, cache_hits=0, output_size=None):
+    history.insert("builds", {
+        "started": NOW - days_ago * DAY,
+        "target": target,
+        "compiler": compiler,
+        "toolchain": toolchain,
+        "duration": duration,
+        "max_rss_kb": max_rss_kb,
+        "returncode": 0 if success else 1,
+        "success": int(success),
+        "warnings": 0,
+        "output_size": output_size,
+        "up_to_date": int(up_to_date),
+        "cache_hits": cache_hits
+    })
+
+
+def add_counts(history, days_ago, instructions, l1_misses=1000, ll_misses=100, args=("encrypt",),
+               returncode=0):
+    history.record_counts({
+        "command": ["./aes"] + list(args),
+        "returncode": returncode,
+        "instructions": instructions,
+        "data_refs": instructions // 3,
+        "l1_misses": l1_misses,
+        "ll_misses": ll_misses,
+        "counts": {}
+    }, target="aes", started=NOW - days_ago * DAY)
+
+
+def test_regression_compares_window_medians(history):
+    # Previous week: median 10s; this week: median 13s
+    for days_ago, duration in ((13, 9.0), (11, 10.0), (8, 11.0), (6, 12.0), (3, 13.0), (1, 20.0)):
+        add_build(history, days_ago, duration)
+    (found,) = history.regressions(now=NOW)
+    assert (found["before"], found["after"]) == (10.0, 13.0)
+    assert found["change"] == 0.3
+    assert found["builds"] == [3, 3]
+    assert found["message"] == "AES.cpp with gcc got 30% slower to build since last week (10.00s → 13.00s)"
+
+
+def test_builds_older_than_two_windows_are_ignored(history):
+    add_build(history, 20, 1.0)
+    for days_ago, duration in ((10, 10.0), (2, 11.0)):
+        add_build(history, days_ago, duration)
+    # 10% is under the 20% threshold; the 1s build three weeks ago must not count
+    assert history.regressions(now=NOW) == []
+    assert history.regressions(threshold=0.05, now=NOW)[0]["before"] == 10.0
+
+
+def test_window_split_at_now_minus_window(history):
+    add_build(history, 7 + 1e-6, 10.0)
+    add_build(history, 7, 20.0)
+    (found,) = history.regressions(now=NOW)
+    assert found["builds"] == [1, 1]
+
+
+def test_only_clean_builds_count(history):
+    add_build(history, 10, 10.0)
+    add_build(history, 2, 10.5)
+    # Failed builds, up-to-date skips and cache hits say nothing about the compiler
+    add_build(history, 2, 60.0, success=False)
+    add_build(history, 2, 60.0, up_to_date=True)
+    add_build(history, 2, 60.0, cache_hits=1)
+    assert history.regressions(now=NOW) == []
+
+
+def test_toolchain_change_is_noted(history):
+    add_build(history, 10, 10.0, toolchain="gcc 12")
+    add_build(history, 2, 15.0, toolchain="gcc 13")
+    (found,) = history.regressions(now=NOW)
+    assert found["message"].endswith("; the toolchain changed")
+
+
+def test_regressions_are_per_compiler_and_metric(history):
+    add_build(history, 10, 10.0, compiler="gcc", max_rss_kb=100 * 1024)
+    add_build(history, 2, 10.0, compiler="gcc", max_rss_kb=200 * 1024)
+    add_build(history, 10, 10.0, compiler="clang")
+    add_build(history, 2, 14.0, compiler="clang")
+    (slower,) = history.regressions(now=NOW)
+    assert slower["compiler"] == "clang" and slower["change"] == 0.4
+    (memory,) = history.regressions(metric="max_rss_kb", now=NOW)
+    assert memory["compiler"] == "gcc"
+    assert memory["message"] == "AES.cpp with gcc got 100% more memory to build since last week (100 MB → 200 MB)"
+    with pytest.raises(ValueError):
+        history.regressions(metric="nonsense", now=NOW)
+
+
+def test_trend_aggregates_per_day(history):
+    add_build(history, 1, 4.0, max_rss_kb=1000, output_size=10)
+    add_build(history, 1, 2.0, max_rss_kb=3000, output_size=20)
+    add_build(history, 1, 50.0, max_rss_kb=9000, up_to_date=True)
+    add_build(history, 1, 1.0, success=False)
+    add_build(history, 40, 1.0)
+    (day,) = history.trend("AES.cpp", now=NOW)
+    assert day["day"] == time.strftime("%Y-%m-%d", time.localtime(NOW - DAY))
+    assert day["builds"] == 4
+    assert day["failed"] == 1
+    assert day["median_duration"] == 3.0
+    assert day["max_rss_kb"] == 3000
+    assert day["output_size"] == 20
+    assert day["toolchains"] == ["gcc 12"]
+
+
+def test_count_regression_against_median_of_earlier_runs(history):
+    for days_ago, instructions in ((5, 1_000_000), (4, 1_010_000), (3, 990_000), (2, 1_050_000)):
+        add_counts(history, days_ago, instructions)
+    (found,) = history.count_regressions()
+    assert (found["before"], found["after"]) == (1_000_000, 1_050_000)
+    assert found["metric"] == "instructions"
+    assert found["change"] == 0.05
+    assert found["message"] == "aes encrypt: 5.0% more instructions (1,000,000 → 1,050,000)"
+
+
+def test_count_regression_threshold_and_failed_runs(history):
+    add_counts(history, 3, 1_000_000)
+    add_counts(history, 2, 1_010_000)
+    # A failed run is left out even though it executed far more instructions
+    add_counts(history, 1, 9_000_000, returncode=1)
+    assert history.count_regressions() == []
+    assert history.count_regressions(threshold=0.005)[0]["after"] == 1_010_000
+
+
+def test_count_regression_uses_only_recent_runs_per_command(history):
+    # Seven old runs at 2M would hide the regression if all runs were used
+    for days_ago in range(20, 13, -1):
+        add_counts(history, days_ago, 2_000_000)
+    for days_ago in range(10, 5, -1):
+        add_counts(history, days_ago, 1_000_000)
+    add_counts(history, 1, 1_100_000)
+    add_counts(history, 1, 5_000_000, args=("decrypt",))
+    (found,) = history.count_regressions()
+    assert found["command"] == "./aes encrypt"
+    assert found["before"] == 1_000_000
+
+
+def test_unrecorded_report_is_compared_with_its_command(history):
+    for days_ago in (3, 2, 1):
+        add_counts(history, days_ago, 1_000_000, ll_misses=100)
+    latest = {"command": ["./aes", "encrypt"], "instructions": 1_000_000,
+              "l1_misses": 1000, "ll_misses": 150}
+    (found,) = history.count_regressions(latest=latest)
+    assert found["metric"] == "ll_misses"
+    assert found["message"].startswith("aes encrypt: 50.0% more last-level cache misses")
+    assert history.count_regressions(latest=dict(latest, command=["./aes", "other"])) == []
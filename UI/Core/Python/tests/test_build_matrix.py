@@ -0,0 +1,40 @@
+"""
+Tests for matrix rows of failed and skipped cells
+"""
+
+from build_engine import DEFAULT_CONFIG
+from build_matrix import BuildMatrix, cell_label, expand_matrix, format_table
+
+
+class FailingEngine:
+    """Engine whose step generation raises, like a missing compiler"""
+
+    def generate_steps(self, options, input_file, output_file):
+        raise RuntimeError("compiler not found")
+
+
+class Options:
+    build_type = "Executable"
+
+    def copy(self, **changes):
+        return self
+
+
+def test_failed_cells_keep_their_axes(tmp_path):
+    config = dict(DEFAULT_CONFIG, compile_cache_enabled=False, pch_enabled=False)
+    matrix = BuildMatrix(config, jobs=2)
+    matrix.engine = FailingEngine()
+    cells = expand_matrix(["gcc", "clang"], ["-O2"], ["cryptopp"])
+    rows, summary = matrix.run(str(tmp_path / "main.cpp"), cells, Options())
+
+    assert [row["cell"] for row in rows] == [cell_label(cell) for cell in cells]
+    assert all(row["error"] == "compiler not found" for row in rows)
+    assert {row["compiler"] for row in rows} == {"gcc", "clang"}
+    table = format_table(rows)
+    assert "❌ FAIL" in table and "clang" in table
+
+
+def test_skipped_rows_render():
+    row = {"compiler": "gcc", "opt_level": "-O0", "library": "none",
+           "success": False, "skipped": True, "duration": 0.0, "cell": "gcc -O0 none"}
+    assert "⏹️ SKIPPED" in format_table([row])
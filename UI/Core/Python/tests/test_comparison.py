@@ -0,0 +1,117 @@
+"""
+Tests for interleaved A/B comparisons, driven by injected samples
+"""
+
+import pytest
+
+import run_benchmark
+from run_benchmark import Comparison, comparison_lines
+
+# Relative run-to-run noise, the same for every variant
+JITTER = [0.0, 0.01, -0.01, 0.02, -0.02, 0.005, -0.005, 0.015, -0.015, 0.0]
+
+
+class FakeRunner:
+    """Stands in for run_once: wall time per program, with noise and failures"""
+
+    def __init__(self, times, failing=()):
+        self.times = times
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, argv, cwd=None, timeout=None, capture=False):
+        program = argv[0]
+        runs = sum(1 for call in self.calls if call == program)
+        self.calls.append(program)
+        wall = self.times[program] * (1 + JITTER[runs % len(JITTER)])
+        sample = {"wall": wall, "user": wall, "sys": 0.0, "max_rss_kb": 1024,
+                  "returncode": 1 if program in self.failing else 0}
+        return sample, ""
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    def install(times, failing=()):
+        fake = FakeRunner(times, failing)
+        monkeypatch.setattr(run_benchmark, "run_once", fake)
+        return fake
+    return install
+
+
+def comparison(runs=10, warmup=1):
+    return Comparison([("gcc", ["gcc-build"]), ("clang", ["clang-build"]), ("O0", ["o0-build"])],
+                      runs=runs, warmup=warmup, name="AES.cpp")
+
+
+def test_rounds_rotate_the_variant_order(runner):
+    fake = runner({"gcc-build": 1.0, "clang-build": 0.8, "o0-build": 1.5})
+    report = comparison(runs=3, warmup=1).run()
+    rounds = [fake.calls[i:i + 3] for i in range(0, len(fake.calls), 3)]
+    assert rounds == [
+        ["o0-build", "gcc-build", "clang-build"],   # warmup, index -1
+        ["gcc-build", "clang-build", "o0-build"],
+        ["clang-build", "o0-build", "gcc-build"],
+        ["o0-build", "gcc-build", "clang-build"],
+    ]
+    # Warmup runs are not part of the statistics
+    assert [variant["runs"] for variant in report["variants"]] == [3, 3, 3]
+
+
+def test_verdicts_against_the_baseline(runner):
+    runner({"gcc-build": 1.0, "clang-build": 0.8, "o0-build": 1.5})
+    report = comparison().run()
+    assert report["baseline"] == "gcc"
+    faster, slower = report["comparisons"]
+
+    assert faster["variant"] == "clang" and faster["significant"]
+    assert faster["ratio"] == pytest.approx(0.8)
+    assert faster["ratio_ci"][0] < 0.8 < faster["ratio_ci"][1]
+    # Ten clean wins each way: U = 0, normal approximation p = 1.8e-4
+    assert faster["p_value"] == pytest.approx(1.81e-4, rel=0.01)
+    assert faster["message"].startswith("clang is 20% ± ")
+    assert faster["message"].endswith("% faster than gcc on AES.cpp (p=0.000181)")
+
+    assert slower["variant"] == "O0" and slower["significant"]
+    assert slower["ratio"] == pytest.approx(1.5)
+    assert slower["message"].startswith("O0 is 50% ± ")
+    assert "slower than gcc on AES.cpp" in slower["message"]
+
+    lines = comparison_lines(report)
+    assert any("clang is 20%" in line for line in lines)
+
+
+def test_equal_builds_are_not_significant(runner):
+    runner({"gcc-build": 1.0, "clang-build": 1.0, "o0-build": 1.0})
+    same, _ = comparison().run()["comparisons"]
+    assert not same["significant"]
+    assert same["ratio"] == pytest.approx(1.0)
+    assert same["message"].startswith("clang vs gcc on AES.cpp: no significant difference (")
+    assert same["message"].endswith("p=1)")
+
+
+def test_failed_runs_are_left_out(runner):
+    runner({"gcc-build": 1.0, "clang-build": 0.8, "o0-build": 1.5}, failing={"o0-build"})
+    report = comparison().run()
+    assert report["variants"][2]["failures"] == 10
+    assert report["variants"][2]["stats"] is None
+    broken = report["comparisons"][1]
+    assert not broken["significant"]
+    assert broken["message"] == "O0: no successful runs to compare with gcc"
+
+
+def test_cancel_stops_between_runs(runner):
+    fake = runner({"gcc-build": 1.0, "clang-build": 0.8, "o0-build": 1.5})
+    job = comparison(runs=10, warmup=0)
+
+    def on_run(label, index, sample):
+        if len(fake.calls) == 4:
+            job.cancel()
+
+    report = job.run(on_run)
+    assert len(fake.calls) == 4
+    assert report["cancelled"]
+
+
+def test_needs_two_variants():
+    with pytest.raises(ValueError):
+        Comparison([("gcc", ["a.out"])])
@@ -0,0 +1,150 @@
+"""
+Tests for compile cache keys and library resolution
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from compile_cache import STATS_FLUSH_EVERY, CompileCache, linked_libraries, option_values, preprocess_argv
+
+needs_gcc = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not installed")
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def make_library(folder, value):
+    """Build libv.a whose v() returns value"""
+    write(folder / "v.cpp", f"int v() {{ return {value}; }}\n")
+    subprocess.run(["g++", "-c", "v.cpp", "-o", "v.o"], cwd=folder, check=True)
+    if (folder / "libv.a").exists():
+        (folder / "libv.a").unlink()
+    subprocess.run(["ar", "rcs", "libv.a", "v.o"], cwd=folder, check=True)
+
+
+def compile_in(folder, argv):
+    def compile_func():
+        result = subprocess.run(argv, cwd=folder, capture_output=True, text=True)
+        return result.returncode, result.stdout, result.stderr
+    return compile_func
+
+
+def test_option_values_accepts_joined_and_separate_forms():
+    argv = ["g++", "-L", "lib", "-Lother", "-lcryptopp", "-l", "m"]
+    assert option_values(argv, "-L") == ["lib", "other"]
+    assert option_values(argv, "-l") == ["cryptopp", "m"]
+
+
+def test_preprocess_argv_drops_outputs_and_depfiles():
+    argv = ["g++", "-c", "a.cpp", "-o", "a.o", "-MMD", "-MF", "a.o.d", "-O2"]
+    assert preprocess_argv(argv) == ["g++", "a.cpp", "-O2", "-E"]
+
+
+def test_compile_only_commands_link_nothing(tmp_path):
+    write(tmp_path / "libv.a", "")
+    argv = ["g++", "-c", "a.cpp", "-o", "a.o", "-L.", "-lv"]
+    assert linked_libraries(argv, str(tmp_path)) == []
+
+
+def test_libraries_resolve_from_search_path(tmp_path):
+    (tmp_path / "lib").mkdir()
+    write(tmp_path / "lib" / "libv.a", "")
+    write(tmp_path / "lib" / "libv.so", "")
+    argv = ["g++", "a.cpp", "-o", "a", "-Llib", "-lv"]
+    assert linked_libraries(argv, str(tmp_path)) == [str(tmp_path / "lib" / "libv.so")]
+    assert linked_libraries(argv + ["-static"], str(tmp_path)) == [str(tmp_path / "lib" / "libv.a")]
+
+
+def test_direct_key_changes_with_linked_library(tmp_path):
+    cache = CompileCache(tmp_path / "cache")
+    write(tmp_path / "a.cpp", "int main() { return 0; }\n")
+    write(tmp_path / "libv.a", "one")
+    argv = ["g++", "a.cpp", "-o", "a", "-L.", "-lv"]
+    before = cache.direct_key(argv, str(tmp_path))
+    assert cache.direct_key(argv, str(tmp_path)) == before
+
+    write(tmp_path / "libv.a", "two, longer")
+    assert cache.direct_key(argv, str(tmp_path)) != before
+
+
+@needs_gcc
+def test_object_compile_hits_after_first_miss(tmp_path):
+    cache = CompileCache(tmp_path / "cache")
+    write(tmp_path / "a.cpp", "int f() { return 1; }\n")
+    argv = ["g++", "-c", "a.cpp", "-o", "a.o"]
+    assert cache.run(argv, str(tmp_path), compile_in(tmp_path, argv))[3] == "miss"
+    os.remove(tmp_path / "a.o")
+    assert cache.run(argv, str(tmp_path), compile_in(tmp_path, argv))[3] == "hit"
+    assert (tmp_path / "a.o").is_file()
+
+
+@needs_gcc
+def test_rebuilt_library_is_not_served_from_cache(tmp_path):
+    cache = CompileCache(tmp_path / "cache")
+    write(tmp_path / "m.cpp", "int v();\nint main() { return v(); }\n")
+    argv = ["g++", "m.cpp", "-o", "m", "-L.", "-lv"]
+
+    make_library(tmp_path, 1)
+    assert cache.run(argv, str(tmp_path), compile_in(tmp_path, argv))[3] == "miss"
+    assert cache.run(argv, str(tmp_path), compile_in(tmp_path, argv))[3] == "hit"
+
+    make_library(tmp_path, 2)
+    assert cache.run(argv, str(tmp_path), compile_in(tmp_path, argv))[3] == "miss"
+    assert subprocess.run(["./m"], cwd=tmp_path).returncode == 2
+
+
+def store_object(cache, tmp_path, key, size):
+    output_file = tmp_path / f"{key}.o"
+    write(output_file, "x" * size)
+    cache.store(key, str(output_file), "", "")
+
+
+def test_store_scans_the_cache_once(tmp_path, monkeypatch):
+    cache = CompileCache(tmp_path / "cache")
+    scans = []
+    entries = cache.entries
+    monkeypatch.setattr(cache, "entries", lambda: scans.append(1) or entries())
+
+    for i in range(5):
+        store_object(cache, tmp_path, f"{i:02d}" * 20, 1000)
+    # Storing the same key again replaces its size instead of adding to it
+    store_object(cache, tmp_path, "00" * 20, 3000)
+
+    assert len(scans) == 1
+    assert cache.total_size == sum(size for _, size, _ in entries())
+
+
+def test_evicts_least_recently_used_only_when_over_the_cap(tmp_path):
+    cache = CompileCache(tmp_path / "cache")
+    cache.max_size = 5000
+    keys = [f"{i:02d}" * 20 for i in range(6)]
+    for i, key in enumerate(keys):
+        store_object(cache, tmp_path, key, 1000)
+        # Distinct last-used times, oldest first
+        meta_file = cache.object_paths(key)[1]
+        os.utime(meta_file, (1000 + i, 1000 + i))
+
+    remaining = sorted(key for _, _, key in cache.entries())
+    assert keys[0] not in remaining and keys[-1] in remaining
+    assert cache.total_size == sum(size for _, size, _ in cache.entries())
+    assert cache.total_size <= cache.max_size
+
+
+def test_hit_and_miss_counts_are_written_in_batches(tmp_path):
+    cache = CompileCache(tmp_path / "cache")
+    cache.record("hits")
+    cache.record("misses")
+    assert not cache.stats_file.exists()
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+    cache.flush()
+    assert CompileCache(tmp_path / "cache").stats() == {"hits": 1, "misses": 1}
+
+    for _ in range(STATS_FLUSH_EVERY):
+        cache.record("hits")
+    assert CompileCache(tmp_path / "cache").stats() == {"hits": 1 + STATS_FLUSH_EVERY, "misses": 1}
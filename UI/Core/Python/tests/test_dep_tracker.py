@@ -0,0 +1,91 @@
+"""
+Tests for incremental up-to-date checks
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from build_engine import BuildStep
+from dep_tracker import DependencyTracker
+
+pytestmark = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not installed")
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def run(step):
+    subprocess.run(step.argv, cwd=step.cwd, check=True)
+
+
+def bump(path):
+    """Move a file's mtime well past everything built so far"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 10))
+
+
+@pytest.fixture
+def project(tmp_path):
+    write(tmp_path / "v.cpp", "int v() { return 1; }\n")
+    write(tmp_path / "m.cpp", "int v();\nint main() { return v(); }\n")
+    subprocess.run(["g++", "-c", "v.cpp", "-o", "v.o"], cwd=tmp_path, check=True)
+    subprocess.run(["ar", "rcs", "libv.a", "v.o"], cwd=tmp_path, check=True)
+    return tmp_path
+
+
+def built(tracker, step):
+    tracker.attach(step)
+    run(step)
+    tracker.record(step)
+    return step
+
+
+def test_compile_step_is_fresh_until_source_changes(project):
+    tracker = DependencyTracker()
+    step = built(tracker, BuildStep(["g++", "-c", "m.cpp", "-o", "m.o"], cwd=project))
+    assert tracker.check(step) == (True, "up to date")
+
+    bump(project / "m.cpp")
+    assert tracker.check(step) == (False, "m.cpp changed")
+
+
+def test_flag_change_forces_rebuild(project):
+    tracker = DependencyTracker()
+    built(tracker, BuildStep(["g++", "-c", "m.cpp", "-o", "m.o"], cwd=project))
+    step = BuildStep(["g++", "-c", "m.cpp", "-o", "m.o", "-O2", "-MMD", "-MF", "m.o.d"], cwd=project)
+    assert tracker.check(step) == (False, "flags changed")
+
+
+def test_single_command_build_tracks_linked_library(project):
+    tracker = DependencyTracker()
+    step = built(tracker, BuildStep(["g++", "m.cpp", "-o", "m", "-L.", "-lv"], cwd=project))
+    assert tracker.check(step) == (True, "up to date")
+
+    bump(project / "libv.a")
+    fresh, reason = tracker.check(step)
+    assert not fresh and reason.endswith("libv.a changed")
+
+
+def test_link_step_tracks_objects_and_libraries(project):
+    tracker = DependencyTracker()
+    built(tracker, BuildStep(["g++", "-c", "m.cpp", "-o", "m.o"], cwd=project))
+    link = built(tracker, BuildStep(["g++", "m.o", "-o", "m", "-L.", "-lv"], "link", cwd=project))
+    assert tracker.check(link) == (True, "up to date")
+
+    bump(project / "libv.a")
+    fresh, reason = tracker.check(link)
+    assert not fresh and reason.endswith("libv.a changed")
+
+
+def test_library_resolving_elsewhere_forces_relink(project):
+    tracker = DependencyTracker()
+    link = built(tracker, BuildStep(["g++", "m.cpp", "-o", "m", "-Lnew", "-L.", "-lv"], cwd=project))
+    (project / "new").mkdir()
+    shutil.copy(project / "libv.a", project / "new" / "libv.a")
+    os.utime(project / "new" / "libv.a", ns=(0, 0))
+    assert tracker.check(link) == (False, "libraries changed")
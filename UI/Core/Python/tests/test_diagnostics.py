@@ -0,0 +1,170 @@
+"""
+Tests for diagnostics parsing on captured GCC 12 output
+"""
+
+from diagnostics import DiagnosticParser, diagnostics_flags, hint, parse_output
+
+# g++ -Wall -c a.cpp b.cpp, both sources including util.h
+TEXT_REPEATED = """\
+In file included from a.cpp:1:
+util.h: In function 'int twice(int)':
+util.h:1:31: warning: unused variable 'unused' [-Wunused-variable]
+    1 | inline int twice(int x) { int unused; return x * 2; }
+      |                               ^~~~~~
+In file included from b.cpp:1:
+util.h: In function 'int twice(int)':
+util.h:1:31: warning: unused variable 'unused' [-Wunused-variable]
+    1 | inline int twice(int x) { int unused; return x * 2; }
+      |                               ^~~~~~
+b.cpp: In function 'int b()':
+b.cpp:2:18: error: 'undefined_name' was not declared in this scope
+    2 | int b() { return undefined_name; }
+      |                  ^~~~~~~~~~~~~~
+"""
+
+# Same build with -fdiagnostics-format=json: one document per translation unit
+JSON_REPEATED = (
+    '[{"kind": "warning", "locations": [{"finish": {"byte-column": 36, "display-column": 36, '
+    '"line": 1, "file": "util.h", "column": 36}, "caret": {"byte-column": 31, "display-column": 31, '
+    '"line": 1, "file": "util.h", "column": 31}}], "column-origin": 1, "option": "-Wunused-variable", '
+    '"escape-source": false, "children": [], "message": "unused variable \'unused\'"}]\n'
+    '[{"kind": "warning", "locations": [{"finish": {"byte-column": 36, "display-column": 36, '
+    '"line": 1, "file": "util.h", "column": 36}, "caret": {"byte-column": 31, "display-column": 31, '
+    '"line": 1, "file": "util.h", "column": 31}}], "column-origin": 1, "option": "-Wunused-variable", '
+    '"escape-source": false, "children": [], "message": "unused variable \'unused\'"}, '
+    '{"kind": "error", "column-origin": 1, "children": [], "escape-source": false, '
+    '"locations": [{"finish": {"byte-column": 31, "display-column": 31, "line": 2, "file": "b.cpp", '
+    '"column": 31}, "caret": {"byte-column": 18, "display-column": 18, "line": 2, "file": "b.cpp", '
+    '"column": 18}}], "message": "\'undefined_name\' was not declared in this scope"}]\n'
+)
+
+TEXT_NOTE = """\
+n.cpp: In function 'void g()':
+n.cpp:2:13: error: too many arguments to function 'void f(int)'
+    2 | void g() { f(1, 2); }
+      |            ~^~~~~~
+n.cpp:1:6: note: declared here
+    1 | void f(int);
+      |      ^
+"""
+
+JSON_NOTE = (
+    '[{"kind": "error", "column-origin": 1, "children": [], "escape-source": false, '
+    '"locations": [{"caret": {"byte-column": 13, "display-column": 13, "line": 2, "file": "n.cpp", '
+    '"column": 13}}], "message": "too many arguments to function \'void f(int)\'"}, '
+    '{"kind": "note", "column-origin": 1, "children": [], "escape-source": false, '
+    '"locations": [{"caret": {"byte-column": 6, "display-column": 6, "line": 1, "file": "n.cpp", '
+    '"column": 6}}], "message": "declared here"}]\n'
+)
+
+LINKER = """\
+/usr/bin/ld: /tmp/ccR7VSE7.o: in function `main':
+m.cpp:(.text+0x5): undefined reference to `v()'
+/usr/bin/ld: cannot find -lnosuchlib: No such file or directory
+collect2: error: ld returned 1 exit status
+"""
+
+WARNING = "util.h:1:31: warning: unused variable 'unused' [-Wunused-variable]"
+ERROR = "b.cpp:2:18: error: 'undefined_name' was not declared in this scope"
+
+
+def in_chunks(text, size):
+    """Feed text the way a pipe delivers it, split mid-line"""
+    parser = DiagnosticParser()
+    shown = "".join(parser.feed(text[i:i + size]) for i in range(0, len(text), size))
+    return shown + parser.finish(), parser.diagnostics
+
+
+def check_repeated(diagnostics):
+    warning, error = diagnostics.records
+    assert (warning["file"], warning["line"], warning["column"]) == ("util.h", 1, 31)
+    assert warning["severity"] == "warning" and warning["option"] == "-Wunused-variable"
+    assert warning["count"] == 2
+    assert (error["file"], error["line"], error["severity"]) == ("b.cpp", 2, "error")
+    assert diagnostics.repeats == 1
+    assert diagnostics.counts["warning"] == 1 and diagnostics.counts["error"] == 1
+
+
+def test_text_repeats_are_collapsed():
+    shown, diagnostics = parse_output(TEXT_REPEATED)
+    check_repeated(diagnostics)
+    # The second copy goes with its include context and source excerpt
+    assert shown.count(WARNING) == 1
+    assert "In file included from a.cpp:1:" in shown
+    assert "In file included from b.cpp:1:" not in shown
+    assert shown.count("inline int twice") == 1
+    assert "b.cpp: In function 'int b()':\n" + ERROR in shown
+
+
+def test_text_chunking_does_not_change_result():
+    shown, diagnostics = parse_output(TEXT_REPEATED)
+    for size in (1, 7, 64):
+        chunked_shown, chunked = in_chunks(TEXT_REPEATED, size)
+        assert chunked_shown == shown
+        check_repeated(chunked)
+
+
+def test_json_repeats_are_collapsed():
+    parser = DiagnosticParser()
+    shown = parser.feed(JSON_REPEATED) + parser.finish()
+    assert parser.structured
+    check_repeated(parser.diagnostics)
+    assert shown == f"{WARNING}\n{ERROR}\n"
+
+
+def test_json_split_across_chunks():
+    shown, diagnostics = in_chunks(JSON_REPEATED, 50)
+    check_repeated(diagnostics)
+    assert shown == f"{WARNING}\n{ERROR}\n"
+
+
+def test_notes_attach_to_their_diagnostic():
+    for output in (TEXT_NOTE, JSON_NOTE):
+        _, diagnostics = parse_output(output)
+        (error,) = diagnostics.records
+        assert error["message"] == "too many arguments to function 'void f(int)'"
+        assert error["notes"] == ["n.cpp:1:6: note: declared here"]
+        assert diagnostics.counts["note"] == 1
+
+
+def test_linker_and_driver_errors():
+    shown, diagnostics = parse_output(LINKER)
+    assert shown == LINKER
+    undefined, missing, collect = diagnostics.records
+    assert (undefined["file"], undefined["line"]) == ("m.cpp", None)
+    assert undefined["message"] == "undefined reference to `v()'"
+    assert missing["message"].startswith("cannot find -lnosuchlib")
+    assert hint(missing).startswith("Library not found")
+    assert (collect["file"], collect["severity"]) == ("collect2", "error")
+
+
+def test_summary_reports_repeats():
+    _, diagnostics = parse_output(TEXT_REPEATED)
+    entries = [text for text, _ in diagnostics.summary()]
+    assert entries[0] == "1 error(s), 1 warning(s), 1 repeat(s) collapsed"
+    # Errors are listed before warnings
+    assert entries[1].startswith("❌ b.cpp:2:18:")
+    assert entries[2].endswith("[-Wunused-variable] (×2)")
+
+
+def test_non_json_brackets_fall_back_to_text():
+    shown, diagnostics = parse_output("[{ not json\n" + ERROR + "\n")
+    assert shown == "[{ not json\n" + ERROR + "\n"
+    assert diagnostics.records[0]["severity"] == "error"
+
+
+def test_balanced_non_json_is_shown_as_text():
+    shown, _ = parse_output("[{x}]\n" + ERROR + "\n")
+    assert shown == "[{x}]\n" + ERROR + "\n"
+
+
+def test_diagnostics_flags_default_to_streaming_text():
+    assert diagnostics_flags("g++ (Debian 12.2.0-14) 12.2.0") == []
+    assert diagnostics_flags("g++ (GCC) 12.2.0", "text") == []
+
+
+def test_diagnostics_flags_opt_in_by_version():
+    assert diagnostics_flags("g++ (Debian 12.2.0-14) 12.2.0", "auto") == ["-fdiagnostics-format=json"]
+    assert diagnostics_flags("g++ (GCC) 13.1.0", "auto") == ["-fdiagnostics-format=sarif-stderr"]
+    assert diagnostics_flags("clang version 16.0.0", "auto") == []
+    assert diagnostics_flags("g++ (GCC) 8.5.0", "json") == []
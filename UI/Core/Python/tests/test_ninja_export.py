@@ -0,0 +1,101 @@
+"""
+Tests for build.ninja generation and the engine's ninja executor
+"""
+
+import os
+import threading
+
+from build_engine import BuildEngine, BuildStep, DEFAULT_CONFIG
+from ninja_export import NinjaGenerator, ninja_escape, strip_depfile_flags, write_if_changed
+
+
+def engine_config(**changes):
+    config = dict(DEFAULT_CONFIG, compile_cache_enabled=False, pch_enabled=False,
+                  build_history_enabled=False, symbol_index_enabled=False)
+    config.update(changes)
+    return config
+
+
+def fake_ninja(tmp_path):
+    """A `ninja` that logs its arguments and does no work"""
+    log = tmp_path / "ninja.log"
+    script = tmp_path / "ninja"
+    script.write_text(f"#!/bin/sh\necho \"$@\" >> {log}\necho 'ninja: no work to do.'\n")
+    script.chmod(0o755)
+    return str(script), log
+
+
+def test_escape_and_depfile_flags():
+    assert ninja_escape("/a b/c:d$") == "/a$ b/c$:d$$"
+    assert strip_depfile_flags(["g++", "-MMD", "-MF", "a.o.d", "-c", "a.cpp"]) == ["g++", "-c", "a.cpp"]
+
+
+def test_target_steps_become_build_statements(tmp_path):
+    steps = [
+        BuildStep(["g++", "-c", "-O2", "a.cpp", "-o", "obj/a.o", "-MMD", "-MF", "obj/a.o.d"], cwd=tmp_path),
+        BuildStep(["g++", "-c", "-O2", "b.cpp", "-o", "obj/b.o"], cwd=tmp_path),
+        BuildStep(["g++", "obj/a.o", "obj/b.o", "-o", "app", "-lcryptopp"], "link", cwd=tmp_path),
+    ]
+    generator = NinjaGenerator(tmp_path)
+    generator.add_steps(steps)
+    text = generator.generate()
+
+    assert f"build {tmp_path}/obj/a.o: cxx {tmp_path}/a.cpp" in text
+    assert f"build {tmp_path}/app: link {tmp_path}/obj/a.o {tmp_path}/obj/b.o" in text
+    assert "  ldflags = -lcryptopp" in text
+    assert "  flags = -O2" in text
+    assert f"default {tmp_path}/app" in text
+    # The rule adds its own depfile flags; the step's are dropped
+    assert "a.o.d" not in text
+
+
+def test_single_command_build_uses_compile_and_link_rule(tmp_path):
+    generator = NinjaGenerator(tmp_path)
+    generator.add_steps([BuildStep(["g++", "main.cpp", "-o", "main", "-lcryptopp"], cwd=tmp_path)])
+    text = generator.generate()
+    assert f"build {tmp_path}/main: cxx_link {tmp_path}/main.cpp" in text
+    assert "  ldflags = -lcryptopp" in text
+
+
+def test_linked_libraries_are_implicit_inputs(tmp_path):
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "libv.a").write_text("")
+    generator = NinjaGenerator(tmp_path)
+    generator.add_steps([BuildStep(["g++", "main.o", "-o", "main", "-Llib", "-lv"], "link", cwd=tmp_path)])
+    assert f"build {tmp_path}/main: link {tmp_path}/main.o | {tmp_path}/lib/libv.a" in generator.generate()
+
+
+def test_ninja_follows_config_not_incremental_flag(tmp_path):
+    ninja, _ = fake_ninja(tmp_path)
+    config = engine_config(ninja_enabled=True, ninja_path=ninja)
+    assert BuildEngine(config, incremental=False).ninja is not None
+    assert BuildEngine(config, incremental=False, use_ninja=False).ninja is None
+    assert BuildEngine(engine_config(), incremental=False).ninja is None
+
+
+def test_non_incremental_engine_cleans_before_ninja_build(tmp_path):
+    ninja, log = fake_ninja(tmp_path)
+    config = engine_config(ninja_enabled=True, ninja_path=ninja)
+    step = BuildStep(["g++", "main.cpp", "-o", "main"], cwd=tmp_path)
+
+    BuildEngine(config, incremental=False).execute([step])
+    calls = log.read_text().splitlines()
+    assert len(calls) == 2 and calls[0].endswith("-t clean")
+
+    os.remove(log)
+    BuildEngine(config).execute([step])
+    assert "-t clean" not in log.read_text()
+
+
+def test_write_if_changed_from_several_threads(tmp_path):
+    ninja_file = tmp_path / "build.ninja"
+    texts = [f"# build {i}\n" * 200 for i in range(8)]
+    threads = [threading.Thread(target=write_if_changed, args=(ninja_file, text)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert os.listdir(tmp_path) == ["build.ninja"]
+    assert ninja_file.read_text() in texts
+    assert not write_if_changed(ninja_file, ninja_file.read_text())
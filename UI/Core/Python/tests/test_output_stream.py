@@ -0,0 +1,89 @@
+"""
+Tests for streaming process output and measured resource usage
+"""
+
+import resource
+import shutil
+import signal
+import sys
+import threading
+import time
+
+import pytest
+
+from output_stream import (BoundedCapture, LineChunker, kill_process, run_streaming,
+                           spawn_measured, wait_process)
+
+# Resident memory held by the test process while children are measured
+BALLAST_MB = 200
+
+
+@pytest.fixture
+def ballast():
+    """Make this process large, as a GUI holding a big output log would be"""
+    blob = bytearray(BALLAST_MB * 1024 * 1024)
+    for index in range(0, len(blob), 4096):
+        blob[index] = 1
+    yield blob
+
+
+def test_bounded_capture_keeps_head_and_tail():
+    capture = BoundedCapture(10)
+    capture.append("abcdefghij")
+    capture.append("KLMNO")
+    assert capture.text() == "abcde\n... [5 characters of output omitted] ...\nKLMNO"
+
+
+def test_line_chunker_waits_for_line_end():
+    chunker = LineChunker(chunk_size=100)
+    assert chunker.feed("partial") == ""
+    assert chunker.feed(" line\nnext") == "partial line\n"
+    assert chunker.flush() == "next"
+
+
+def test_streamed_command_reports_its_own_memory(ballast):
+    parent_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage = {}
+    returncode, stdout, _ = run_streaming(["true"], usage=usage)
+    assert returncode == 0
+    assert parent_kb > BALLAST_MB * 1024
+    # Without the helper the child's peak would include the whole ballast
+    assert usage["max_rss_kb"] < 50 * 1024
+    assert usage["user"] >= 0 and usage["sys"] >= 0
+
+
+def test_measured_memory_follows_the_program():
+    usage = {}
+    code = "x = bytearray(80 * 1024 * 1024); x[::4096] = b'1' * len(x[::4096])"
+    run_streaming([sys.executable, "-c", code], usage=usage)
+    assert usage["max_rss_kb"] > 80 * 1024
+
+
+def test_exit_status_and_output_pass_through():
+    usage = {}
+    returncode, stdout, stderr = run_streaming(
+        ["sh", "-c", "echo out; echo err >&2; exit 3"], usage=usage)
+    assert (returncode, stdout, stderr) == (3, "out\n", "err\n")
+
+    process = spawn_measured([sys.executable, "-c", "import os; os.kill(os.getpid(), 9)"])
+    assert wait_process(process) is not None
+    assert process.returncode == -signal.SIGKILL
+
+
+def test_missing_program_raises_like_popen():
+    with pytest.raises(FileNotFoundError):
+        spawn_measured(["no-such-compiler-anywhere"])
+    with pytest.raises(FileNotFoundError):
+        run_streaming(["./missing"], usage={})
+
+
+@pytest.mark.skipif(shutil.which("sleep") is None, reason="sleep not installed")
+def test_kill_and_terminate_reach_the_program():
+    for stop in (kill_process, lambda process: process.terminate()):
+        process = spawn_measured(["sleep", "30"])
+        start = time.perf_counter()
+        threading.Timer(0.2, stop, args=(process,)).start()
+        usage = wait_process(process)
+        assert time.perf_counter() - start < 10
+        assert usage is not None
+        assert process.returncode in (-signal.SIGKILL, -signal.SIGTERM)
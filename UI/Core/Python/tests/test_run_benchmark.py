@@ -0,0 +1,135 @@
+"""
+Known-answer tests for the benchmark statistics
+"""
+
+import math
+import resource
+import shutil
+import time
+
+import pytest
+
+from run_benchmark import (mann_whitney, median_interval, parse_cpus, percentile, ranks,
+                           ratio_interval, run_once, summarize, t_critical)
+
+
+def test_t_critical_uses_next_lower_table_entry():
+    assert t_critical(1) == 12.706
+    assert t_critical(7) == 2.365
+    assert t_critical(35) == 2.042
+    assert t_critical(500) == 1.96
+    assert math.isnan(t_critical(0))
+
+
+def test_percentile_interpolates_linearly():
+    assert percentile([1, 2, 3, 4], 0.5) == 2.5
+    assert percentile([10, 20, 30, 40, 50], 0.95) == pytest.approx(48.0)
+    assert percentile([7], 0.95) == 7
+    assert percentile([], 0.5) is None
+
+
+def test_median_interval_order_statistics():
+    assert median_interval(list(range(1, 21))) == [5, 16]
+    assert median_interval(list(range(1, 9))) == [1, 8]
+    # Five runs cannot give a 95% interval without the extremes
+    assert median_interval(list(range(1, 6))) is None
+
+
+def test_summarize_known_sample():
+    summary = summarize([9, 2, 4, 4, 4, 5, 5, 7, None])
+    assert summary["n"] == 8
+    assert (summary["min"], summary["max"]) == (2, 9)
+    assert summary["mean"] == 5.0
+    assert summary["median"] == 4.5
+    assert summary["stdev"] == pytest.approx(math.sqrt(32 / 7))
+    assert summary["cv"] == pytest.approx(math.sqrt(32 / 7) / 5)
+    margin = 2.365 * math.sqrt(32 / 7) / math.sqrt(8)
+    assert summary["mean_ci"] == pytest.approx([5 - margin, 5 + margin])
+    assert summary["median_ci"] == [2, 9]
+
+
+def test_summarize_edge_cases():
+    assert summarize([]) is None
+    single = summarize([3.0])
+    assert single["stdev"] == 0.0 and single["mean_ci"] is None
+    # A wide interval around a small mean is clamped at zero
+    assert summarize([0.01, 0.01, 1.0])["mean_ci"][0] == 0.0
+
+
+def test_ranks_average_ties():
+    assert ranks([3, 1, 3, 2]) == [3.5, 1.0, 3.5, 2.0]
+    assert ranks([5, 5, 5]) == [2.0, 2.0, 2.0]
+
+
+def test_mann_whitney_textbook_example():
+    u, p = mann_whitney([19, 22, 16, 29, 24], [20, 11, 17, 12])
+    assert u == 17
+    assert p == pytest.approx(0.11135, abs=1e-4)
+
+
+def test_mann_whitney_separated_samples():
+    u, p = mann_whitney([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert u == 0
+    assert p == pytest.approx(0.01219, abs=1e-4)
+
+
+def test_mann_whitney_tie_correction():
+    u, p = mann_whitney([1, 2, 2, 3], [2, 3, 3, 4])
+    assert u == 3
+    assert p == pytest.approx(0.17203, abs=1e-4)
+
+
+def test_mann_whitney_degenerate_samples():
+    assert mann_whitney([], [1, 2]) == (None, 1.0)
+    assert mann_whitney([1, 1, 1], [1, 1, 1])[1] == 1.0
+
+
+def test_ratio_interval_of_exact_doubling():
+    baseline = [1.0 + 0.01 * i for i in range(10)]
+    ratio, interval = ratio_interval(baseline, [2 * value for value in baseline])
+    assert ratio == pytest.approx(2.0)
+    assert interval[0] < 2.0 < interval[1]
+    assert interval[0] > 1.9 and interval[1] < 2.1
+
+
+def test_ratio_interval_needs_enough_runs():
+    ratio, interval = ratio_interval([1.0, 1.1, 1.2], [0.5, 0.55, 0.6])
+    assert ratio == pytest.approx(0.5)
+    assert interval is None
+    assert ratio_interval([0.0], [1.0]) == (None, None)
+
+
+def test_parse_cpus():
+    assert parse_cpus("auto", {0, 1, 2, 3}) == {3}
+    assert parse_cpus("auto", {0}) is None
+    assert parse_cpus("0-2,5", {0}) == {0, 1, 2, 5}
+    assert parse_cpus("", {0, 1}) is None
+
+
+def test_trivial_program_reports_its_own_rss_not_the_parents():
+    blob = bytearray(200 * 1024 * 1024)
+    for index in range(0, len(blob), 4096):
+        blob[index] = 1
+    parent_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    sample, _ = run_once(["true"])
+    elapsed = time.perf_counter() - start
+    assert sample["returncode"] == 0
+    assert sample["max_rss_kb"] < parent_kb / 8
+    # Wall time is the program's, not the helper interpreter's startup
+    assert sample["wall"] < elapsed / 2
+    del blob
+
+
+def test_run_once_captures_output_and_status():
+    sample, output = run_once(["sh", "-c", "echo hello; exit 4"], capture=True)
+    assert output == "hello\n"
+    assert sample["returncode"] == 4
+
+
+@pytest.mark.skipif(shutil.which("sleep") is None, reason="sleep not installed")
+def test_run_once_timeout_kills_the_program():
+    start = time.perf_counter()
+    sample, _ = run_once(["sleep", "30"], timeout=0.2)
+    assert time.perf_counter() - start < 10
+    assert sample["returncode"] == -9
@@ -0,0 +1,45 @@
+"""
+Tests for the shared probe cache
+"""
+
+import json
+import threading
+
+from toolchain_probe import ProbeCache
+
+
+def test_concurrent_saves_leave_a_valid_cache(tmp_path):
+    cache_file = tmp_path / "probes.json"
+    # Engines on other threads each hold their own cache on the same file
+    caches = [ProbeCache(cache_file) for _ in range(8)]
+    errors = []
+
+    def save_many(index, cache):
+        try:
+            for i in range(50):
+                cache.store(f"path:{index}:{i}", [i], True)
+                cache.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save_many, args=(index, cache))
+               for index, cache in enumerate(caches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["probes.json"]
+    with open(cache_file) as f:
+        entries = json.load(f)
+    assert len(entries) == 50
+
+
+def test_saved_entries_are_reloaded(tmp_path):
+    cache_file = tmp_path / "probes.json"
+    cache = ProbeCache(cache_file)
+    cache.store("tool:g++", ["/usr/bin/g++"], {"version": "g++ 12.2.0"})
+    cache.save()
+    assert ProbeCache(cache_file).cached("tool:g++", ["/usr/bin/g++"]) == {"version": "g++ 12.2.0"}
+    assert ProbeCache(cache_file).cached("tool:g++", ["/usr/local/bin/g++"]) is None
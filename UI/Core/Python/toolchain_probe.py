@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Persistent toolchain and library probe cache
+Compiler --version calls and library path checks run concurrently and are
+cached on disk, keyed by path, inode and mtime, until something changes
+"""
+
+import os
+import json
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from build_trace import span
+
+DEFAULT_PROBE_CACHE = str(Path.home() / ".cache" / "crypto-compiler" / "probes.json")
+PROBE_TIMEOUT = 5
+
+
+def path_signature(path):
+    """[inode, mtime, size] of a path, or None when it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+class ProbeCache:
+    """Cache of tool versions and path checks shared by the GUIs"""
+
+    def __init__(self, cache_file=DEFAULT_PROBE_CACHE, max_workers=8):
+        self.cache_file = Path(os.path.expanduser(cache_file))
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.entries = self.load()
+        self.dirty = False
+
+    def load(self):
+        """Read cached probe results"""
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Write probe results back if anything changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_file, "w") as f:
+                    json.dump(self.entries, f)
+                os.replace(tmp_file, self.cache_file)
+                self.dirty = False
+            except OSError:
+                pass
+
+    def cached(self, key, signature):
+        """Return the stored value for key if its signature still matches"""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry.get("signature") == signature:
+            return entry["value"]
+        return None
+
+    def store(self, key, signature, value):
+        """Remember a probe result"""
+        with self.lock:
+            self.entries[key] = {"signature": signature, "value": value}
+            self.dirty = True
+        return value
+
+    # --------------------------------------------------------------- tools
+
+    def tool(self, name):
+        """Return {"name", "path", "version", "ok"} for an executable on PATH"""
+        path = shutil.which(name)
+        if not path:
+            return {"name": name, "path": None, "version": None, "ok": False}
+
+        real_path = os.path.realpath(path)
+        signature = [path] + (path_signature(real_path) or [])
+        key = f"tool:{name}"
+        value = self.cached(key, signature)
+        if value is not None:
+            return value
+
+        try:
+            with span("probe", "probe", tool=name):
+                result = subprocess.run([path, "--version"], capture_output=True,
+                                        text=True, timeout=PROBE_TIMEOUT)
+            version = result.stdout.split('\n')[0] if result.stdout else "Unknown"
+            value = {"name": name, "path": path, "version": version, "ok": True}
+        except Exception:
+            # Not cached, so a slow mount gets another chance next time
+            return {"name": name, "path": path, "version": None, "ok": False}
+        return self.store(key, signature, value)
+
+    def tools(self, names):
+        """Probe several executables concurrently; returns results in order"""
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(names)))) as executor:
+            results = list(executor.map(self.tool, names))
+        self.save()
+        return results
+
+    # --------------------------------------------------------------- paths
+
+    def exists(self, path):
+        """Cached os.path.exists keyed by the parent directory's inode and mtime"""
+        parent = os.path.dirname(os.path.abspath(path)) or "/"
+        signature = path_signature(parent)
+        if signature is None:
+            return False
+        key = f"path:{os.path.abspath(path)}"
+        value = self.cached(key, signature)
+        if value is not None:
+            return value
+        return self.store(key, signature, os.path.exists(path))
+
+    def paths(self, paths):
+        """Check several paths concurrently; returns {path: exists}"""
+        paths = list(dict.fromkeys(paths))
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(paths)))) as executor:
+            results = dict(zip(paths, executor.map(self.exists, paths)))
+        self.save()
+        return results
+
+    def library(self, lib_config):
+        """Return (found_include, found_lib) for a LinuxCompilerConfig library section"""
+        include_dirs = lib_config.get("include_dirs", [])
+        lib_files = [os.path.join(lib_dir, f"lib{lib_name}.so")
+                     for lib_dir in lib_config.get("lib_dirs", [])
+                     for lib_name in lib_config.get("libs", [])]
+        found = self.paths(include_dirs + lib_files)
+        return (any(found[path] for path in include_dirs),
+                any(found[path] for path in lib_files))
+
+    def clear(self):
+        """Forget every cached probe"""
+        with self.lock:
+            self.entries = {}
+            self.dirty = True
+        self.save()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Event-driven wakeups of the Tk main loop from worker threads
+A self-pipe registered with createfilehandler wakes Tk as soon as output is
+queued, so nothing polls while idle; a timer is only used where neither the
+pipe nor thread-safe after() calls are available
+"""
+
+import os
+import queue
+import threading
+import tkinter
+
+FALLBACK_MS = 100
+
+
+class Wakeup:
+    """Run callback on the Tk thread soon after notify() is called from any thread
+
+    Notifications are coalesced: one callback runs for any number of notify()
+    calls made before it starts.
+    """
+
+    def __init__(self, root, callback, fallback_ms=FALLBACK_MS):
+        self.root = root
+        self.callback = callback
+        self.fallback_ms = fallback_ms
+        self.pending = False
+        self.lock = threading.Lock()
+        self.read_fd = None
+        self.write_fd = None
+
+        if self.open_pipe():
+            self.mode = "pipe"
+        elif self.tcl_threaded():
+            # Windows Tk has no file handlers, but a threaded Tcl accepts after() from workers
+            self.mode = "after"
+        else:
+            self.mode = "poll"
+            self.root.after(self.fallback_ms, self.poll)
+
+    def open_pipe(self):
+        """Register the read end of a non-blocking pipe with Tk; False if unsupported"""
+        try:
+            read_fd, write_fd = os.pipe()
+        except OSError:
+            return False
+        try:
+            os.set_blocking(read_fd, False)
+            os.set_blocking(write_fd, False)
+            self.root.tk.createfilehandler(read_fd, tkinter.READABLE, self.on_readable)
+        except Exception:
+            os.close(read_fd)
+            os.close(write_fd)
+            return False
+        self.read_fd, self.write_fd = read_fd, write_fd
+        return True
+
+    def tcl_threaded(self):
+        """True when Tcl was built with thread support"""
+        try:
+            return self.root.tk.eval("info exists tcl_platform(threaded)") == "1"
+        except Exception:
+            return False
+
+    def notify(self):
+        """Ask for one callback on the Tk thread"""
+        with self.lock:
+            if self.pending:
+                return
+            self.pending = True
+        if self.mode == "pipe":
+            try:
+                os.write(self.write_fd, b"\0")
+            except (BlockingIOError, OSError):
+                # A full pipe already guarantees a wakeup
+                pass
+        elif self.mode == "after":
+            self.root.after(0, self.fire)
+
+    def on_readable(self, fd, mask):
+        """Tk file handler: drain the pipe and run the callback"""
+        try:
+            while os.read(fd, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        self.fire()
+
+    def fire(self):
+        """Run the callback; notify() calls from now on schedule another one"""
+        with self.lock:
+            self.pending = False
+        self.callback()
+
+    def poll(self):
+        """Fallback timer for Tcl builds without threads or file handlers"""
+        if self.pending:
+            self.fire()
+        self.root.after(self.fallback_ms, self.poll)
+
+    def close(self):
+        """Unregister and close the pipe"""
+        if self.read_fd is not None:
+            try:
+                self.root.tk.deletefilehandler(self.read_fd)
+            except Exception:
+                pass
+            os.close(self.read_fd)
+            os.close(self.write_fd)
+            self.read_fd = self.write_fd = None
+
+
+class NotifyingQueue(queue.Queue):
+    """queue.Queue that wakes the Tk loop whenever something is put"""
+
+    def __init__(self, maxsize=0, wakeup=None):
+        super().__init__(maxsize)
+        self.wakeup = wakeup
+
+    def put(self, item, block=True, timeout=None):
+        """Queue item and notify the attached Wakeup"""
+        super().put(item, block, timeout)
+        if self.wakeup is not None:
+            self.wakeup.notify()
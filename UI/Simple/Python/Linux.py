@@ -6,18 +6,37 @@ Optimized for Linux distributions with native package manager integration
 """
 
 import tkinter as tk
-from tkinter import ttk, filedialog, scrolledtext, messagebox
+from tkinter import ttk, filedialog, scrolledtext, messagebox, simpledialog
 import subprocess
 import threading
 import os
 import json
 import shutil
 from pathlib import Path
-import queue
 import time
 import platform
 import sys
 
+# Shared headless build engine lives in UI/Core/Python
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Core" / "Python"))
+from build_engine import (BuildEngine, BuildStep, BuildResult, DEFAULT_CONFIG, SOURCE_SEPARATOR,
+                          split_sources, build_profile_command, build_profile_steps, profile_output_file)
+from batch_build import BatchBuilder, expand_sources
+from compile_cache import output_path_of
+from toolchain_probe import ProbeCache
+from symbol_index import SymbolIndex
+from output_renderer import OutputRenderer
+from ui_wakeup import NotifyingQueue
+from output_stream import spawn_measured, wait_process
+from build_history import BuildHistory
+from build_estimate import DurationModel, ProgressTracker
+from build_trace import span, flush_trace
+from run_benchmark import Benchmark, Comparison, summary_lines, comparison_lines, format_seconds
+from runtime_profile import Profiler, profile_lines
+
+# How often a determinate progress bar and its ETA are refreshed while building
+PROGRESS_MS = 250
+
 class LinuxCompilerConfig:
     """Configuration manager optimized for Linux systems"""
     
@@ -70,6 +89,9 @@ class LinuxCompilerConfig:
                 "parallel_jobs": os.cpu_count() or 4
             }
         }
+        # Build engine settings (cache, incremental, history, benchmarks) share this file
+        for key, value in DEFAULT_CONFIG.items():
+            self.default_config.setdefault(key, value)
         
         self.config = self.load_config()
     
@@ -161,7 +183,17 @@ class LinuxCompilerGUI:
         self.root = tk.Tk()
         self.config = LinuxCompilerConfig()
         self.build_process = None
-        self.output_queue = queue.Queue()
+        # Workers put() output here; the renderer is woken on every put
+        self.output_queue = NotifyingQueue()
+        self.engine = BuildEngine(self.config.config)
+        self.history = BuildHistory.from_config(self.engine.config)
+        self.estimates = DurationModel(self.history)
+        self.progress_source = None
+        self.progress_job = None
+        self.batch = None
+        self.benchmark = None
+        # Compiler versions and library paths, cached on disk until they change
+        self.probes = ProbeCache()
         
         # Variables
         self.compiler_var = tk.StringVar(value="gcc")
@@ -173,10 +205,7 @@ class LinuxCompilerGUI:
         self.parallel_build_var = tk.BooleanVar(value=True)
         
         self.setup_ui()
-        self.check_system_dependencies()
-        
-        # Start output queue processor
-        self.process_queue()
+        threading.Thread(target=self.check_system_dependencies, daemon=True).start()
     
     def setup_ui(self):
         """Setup the main UI with Linux-style theming"""
@@ -307,6 +336,22 @@ class LinuxCompilerGUI:
                               command=self.clean_build)
         clean_btn.pack(side='left', padx=(0, 5))
         
+        self.batch_btn = ttk.Button(controls_frame, text="📚 Batch Build", 
+                                   command=self.batch_build_async)
+        self.batch_btn.pack(side='left', padx=(0, 5))
+        
+        self.bench_btn = ttk.Button(controls_frame, text="⏱️ Benchmark", 
+                                   command=self.benchmark_async)
+        self.bench_btn.pack(side='left', padx=(0, 5))
+        
+        self.compare_btn = ttk.Button(controls_frame, text="⚖️ GCC vs Clang", 
+                                     command=self.compare_async)
+        self.compare_btn.pack(side='left', padx=(0, 5))
+        
+        self.profile_btn = ttk.Button(controls_frame, text="🔥 Profile", 
+                                     command=self.profile_async)
+        self.profile_btn.pack(side='left', padx=(0, 5))
+        
         # Progress bar
         self.progress = ttk.Progressbar(controls_frame, mode='indeterminate')
         self.progress.pack(side='right', fill='x', expand=True, padx=(10, 0))
@@ -322,6 +367,13 @@ class LinuxCompilerGUI:
                                                bg='#000000', fg='#00ff00',
                                                insertbackground='#00ff00')
         self.output.pack(fill='both', expand=True)
+        # Queued output is rendered in one insert per frame, tagged by line
+        self.renderer = OutputRenderer(self.root, self.output, tags={
+            "error": {"foreground": "#ff4444"},
+            "warning": {"foreground": "#ffaa00"},
+            "success": {"foreground": "#44ff44"},
+            "info": {"foreground": "#44aaff"}
+        }, classify=self.output_tag, readonly=True, source=self.output_queue)
         
         # Output controls
         output_controls = ttk.Frame(output_frame)
@@ -483,7 +535,7 @@ A powerful GUI tool for compiling C++ projects with cryptographic libraries on L
 • Use package manager to install libraries
 • Check System tab for compiler detection
 • Debug mode adds -g -O0 flags
-• Parallel build uses all CPU cores
+• Parallel build runs batch jobs on all CPU cores
 
 🏠 CONFIG LOCATION:
 {self.config.config_file}
@@ -519,16 +571,12 @@ Made with ❤️ for Linux developers!
         
         # Compiler versions
         info.append("\n🔧 COMPILERS:")
-        for compiler in ["gcc", "g++", "clang", "clang++"]:
-            path = shutil.which(compiler)
-            if path:
-                try:
-                    result = subprocess.run([compiler, "--version"], 
-                                          capture_output=True, text=True, timeout=5)
-                    version = result.stdout.split('\n')[0] if result.stdout else "Unknown"
-                    info.append(f"  ✅ {compiler}: {version}")
-                except:
-                    info.append(f"  ⚠️ {compiler}: Found but version unknown")
+        for tool in self.probes.tools(["gcc", "g++", "clang", "clang++"]):
+            compiler = tool["name"]
+            if tool["ok"]:
+                info.append(f"  ✅ {compiler}: {tool['version']}")
+            elif tool["path"]:
+                info.append(f"  ⚠️ {compiler}: Found but version unknown")
             else:
                 info.append(f"  ❌ {compiler}: Not found")
         
@@ -563,19 +611,18 @@ Made with ❤️ for Linux developers!
         try:
             if library == "cryptopp":
                 # Check for headers and library
-                for path in ["/usr/include/cryptopp", "/usr/local/include/cryptopp"]:
-                    if os.path.exists(path):
-                        return True
+                paths = ["/usr/include/cryptopp", "/usr/local/include/cryptopp"]
             elif library == "openssl":
-                for path in ["/usr/include/openssl", "/usr/local/include/openssl"]:
-                    if os.path.exists(path):
-                        return True
+                paths = ["/usr/include/openssl", "/usr/local/include/openssl"]
+            else:
+                return False
+            return any(self.probes.paths(paths).values())
         except:
             pass
         return False
     
     def check_system_dependencies(self):
-        """Check system dependencies and show warnings"""
+        """Check system dependencies in the background and show warnings"""
         missing = []
         
         # Check compilers
@@ -593,7 +640,7 @@ Made with ❤️ for Linux developers!
         if missing:
             msg = "Missing dependencies detected:\n\n" + "\n".join(f"• {item}" for item in missing)
             msg += "\n\nGo to System tab to install them."
-            messagebox.showwarning("Missing Dependencies", msg)
+            self.root.after(0, lambda: messagebox.showwarning("Missing Dependencies", msg))
     
     def install_cryptopp(self):
         """Install Crypto++ using system package manager"""
@@ -650,16 +697,13 @@ Made with ❤️ for Linux developers!
         compilers = ["gcc", "g++", "clang", "clang++"]
         found = []
         
-        for compiler in compilers:
-            path = shutil.which(compiler)
-            if path:
-                try:
-                    result = subprocess.run([compiler, "--version"], 
-                                          capture_output=True, text=True, timeout=5)
-                    version = result.stdout.split('\n')[0] if result.stdout else "Unknown"
-                    found.append(f"✅ {compiler}: {path}\n    Version: {version}\n")
-                except:
-                    found.append(f"⚠️ {compiler}: {path} (version check failed)\n")
+        # All probes run concurrently; unchanged executables come from the cache
+        for tool in self.probes.tools(compilers):
+            compiler, path = tool["name"], tool["path"]
+            if tool["ok"]:
+                found.append(f"✅ {compiler}: {path}\n    Version: {tool['version']}\n")
+            elif path:
+                found.append(f"⚠️ {compiler}: {path} (version check failed)\n")
             else:
                 found.append(f"❌ {compiler}: Not found\n")
         
@@ -676,35 +720,47 @@ Made with ❤️ for Linux developers!
         
         for lib in libraries:
             lib_config = self.config.config["libraries"][lib]
-            found_include = False
-            found_lib = False
-            
-            # Check include directories
-            for inc_dir in lib_config["include_dirs"]:
-                if os.path.exists(inc_dir):
-                    found_include = True
-                    break
             
-            # Check library directories
-            for lib_dir in lib_config["lib_dirs"]:
-                for lib_name in lib_config["libs"]:
-                    lib_file = os.path.join(lib_dir, f"lib{lib_name}.so")
-                    if os.path.exists(lib_file):
-                        found_lib = True
-                        break
-                if found_lib:
-                    break
+            # Include directories and lib<name>.so files, checked concurrently and cached
+            found_include, found_lib = self.probes.library(lib_config)
             
             status = "✅" if (found_include and found_lib) else "⚠️" if found_include else "❌"
             results.append(f"{status} {lib}: Include={found_include}, Library={found_lib}")
         
         self.detect_output.insert('1.0', '\n'.join(results))
         self.detect_output.config(state='disabled')
+        
+        # Exported symbol counts need nm over the library directories; index in the background
+        threading.Thread(target=self.check_library_symbols, args=(libraries,), daemon=True).start()
+    
+    def check_library_symbols(self, libraries):
+        """Append the number of indexed symbols per library to the detection output"""
+        try:
+            index = SymbolIndex.from_config(self.config.config)
+            if index is None:
+                return
+            index.refresh()
+            lines = []
+            for lib in libraries:
+                for lib_name in self.config.config["libraries"][lib].get("libs", []):
+                    count = index.library_symbol_count(lib_name)
+                    status = "✅" if count else "❌"
+                    lines.append(f"{status} lib{lib_name}: {count} exported symbols indexed")
+            index.close()
+        except Exception as e:
+            lines = [f"⚠️ Symbol index unavailable: {e}"]
+        self.root.after(0, self.append_detect_output, "\n" + "\n".join(lines))
+    
+    def append_detect_output(self, text):
+        """Append text to the read-only detection output"""
+        self.detect_output.config(state='normal')
+        self.detect_output.insert(tk.END, text)
+        self.detect_output.config(state='disabled')
     
     def browse_file(self):
-        """Browse for source file"""
-        filename = filedialog.askopenfilename(
-            title="Select C++ Source File",
+        """Browse for source files (several sources build one target)"""
+        filenames = filedialog.askopenfilenames(
+            title="Select C++ Source Files",
             filetypes=[
                 ("C++ files", "*.cpp *.cxx *.cc *.c++"),
                 ("C files", "*.c"),
@@ -713,9 +769,9 @@ Made with ❤️ for Linux developers!
             ],
             initialdir=self.config.config["paths"]["source_dir"]
         )
-        if filename:
-            self.source_var.set(filename)
-            self.config.config["paths"]["source_dir"] = str(Path(filename).parent)
+        if filenames:
+            self.source_var.set(SOURCE_SEPARATOR.join(filenames))
+            self.config.config["paths"]["source_dir"] = str(Path(filenames[0]).parent)
     
     def browse_path(self, path_key):
         """Browse for directory path"""
@@ -739,8 +795,6 @@ Made with ❤️ for Linux developers!
         try:
             # Update UI
             self.root.after(0, lambda: self.build_btn.config(state='disabled'))
-            self.root.after(0, lambda: self.progress.pack(side='right', fill='x', expand=True, padx=(10, 0)))
-            self.root.after(0, lambda: self.progress.start())
             self.root.after(0, lambda: self.status_var.set("Building..."))
             
             # Clear output
@@ -749,43 +803,50 @@ Made with ❤️ for Linux developers!
             # Get build parameters
             compiler = self.compiler_var.get()
             library = self.library_var.get()
-            source_file = self.source_var.get()
+            sources = split_sources(self.source_var.get())
             build_type = self.build_type_var.get()
             build_mode = self.build_mode_var.get()
             
-            # Validate source file
-            if not os.path.isfile(source_file):
-                raise Exception(f"Source file not found: {source_file}")
+            # Validate source files
+            if not sources:
+                raise Exception("No source file selected")
+            for source in sources:
+                if not os.path.isfile(source):
+                    raise Exception(f"Source file not found: {source}")
+            source_file = sources[0]
             
-            # Build command
-            cmd = self.build_command(compiler, library, source_file, build_type, build_mode)
+            # Build steps: one command, or per-object compiles plus a link/ar step
+            steps, output_file = build_profile_steps(self.config.config, compiler, library,
+                                                     sources, build_type, build_mode)
+            if self.engine.deps is not None:
+                for step in steps:
+                    self.engine.deps.attach(step)
             
             self.output_queue.put(f"🔨 Building with {compiler.upper()} + {library.upper()} ({build_mode})\n")
             self.output_queue.put(f"📁 Working directory: {Path(source_file).parent}\n")
-            self.output_queue.put(f"⚡ Command: {' '.join(cmd)}\n\n")
-            
-            # Execute build
-            env = os.environ.copy()
-            if self.parallel_build_var.get():
-                env['MAKEFLAGS'] = f'-j{self.config.config["build"]["parallel_jobs"]}'
-            
-            self.build_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                cwd=str(Path(source_file).parent),
-                env=env
-            )
+            for step in steps:
+                self.output_queue.put(f"⚡ Command: {' '.join(step.argv)}\n")
             
-            # Read output with color coding
-            for line in self.build_process.stdout:
-                self.output_queue.put(line)
+            # Predicted from earlier builds of the same target, else from the sources
+            options = {"library": library, "build_type": build_type, "build_mode": build_mode}
+            jobs = self.config.config["build"]["parallel_jobs"] if self.parallel_build_var.get() else 1
+            estimate, basis = self.estimates.predict(sources, str(output_file), compiler, options, jobs)
+            self.output_queue.put(f"⏳ Estimated build time: ~{estimate:.1f}s ({basis})\n\n")
+            tracker = ProgressTracker({"build": estimate})
+            tracker.started("build")
+            self.root.after(0, self.show_progress, lambda: tracker, "Building")
             
-            self.build_process.wait()
+            # Multi-step targets (and every build when ninja_enabled) go through the engine
+            if len(steps) > 1 or self.engine.ninja is not None:
+                result = self.build_target(steps, output_file)
+            else:
+                result = self.build_single(steps[0], source_file)
+            tracker.finished("build", result.duration)
+            returncode = result.returncode
+            self.record_history(result, steps, sources, output_file, compiler, options)
             
             # Check result
-            if self.build_process.returncode == 0:
+            if returncode == 0:
                 self.output_queue.put("\n✅ Build successful!\n")
                 
                 # Auto-run if enabled
@@ -794,102 +855,260 @@ Made with ❤️ for Linux developers!
                     
                 self.root.after(0, lambda: self.status_var.set("Build successful"))
             else:
-                self.output_queue.put(f"\n❌ Build failed with exit code {self.build_process.returncode}\n")
+                self.output_queue.put(f"\n❌ Build failed with exit code {returncode}\n")
                 self.root.after(0, lambda: self.status_var.set("Build failed"))
                 
         except Exception as e:
-            self.output_queue.put(f"\n💥 Error: {str(e)}\n")
-            self.root.after(0, lambda: self.status_var.set(f"Error: {str(e)}"))
+            # e is unbound once the except block ends, so format it now
+            message = f"Error: {e}"
+            self.output_queue.put(f"\n💥 {message}\n")
+            self.root.after(0, lambda: self.status_var.set(message))
         
         finally:
             # Restore UI
             self.root.after(0, lambda: self.build_btn.config(state='normal'))
-            self.root.after(0, lambda: self.progress.stop())
-            self.root.after(0, lambda: self.progress.pack_forget())
+            self.root.after(0, self.hide_progress)
+            flush_trace()
     
-    def build_command(self, compiler, library, source_file, build_type, build_mode):
-        """Generate Linux-optimized build command"""
-        config = self.config.config
-        
-        compiler_config = config["compilers"][compiler]
-        lib_config = config["libraries"][library]
-        
-        cmd = [compiler_config["executable"]]
-        
-        # Add flags based on build mode
-        if build_mode == "debug":
-            cmd.extend(compiler_config["debug_flags"])
-        else:
-            cmd.extend(compiler_config["flags"])
-        
-        # Include directories
-        for inc_dir in lib_config["include_dirs"]:
-            if os.path.exists(inc_dir):
-                cmd.append(f"-I{inc_dir}")
-        
-        # Source file
-        cmd.append(source_file)
-        
-        # Output file
-        base_name = Path(source_file).stem
-        output_dir = Path(source_file).parent / config["build"]["output_dir"] / compiler
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        if build_type == "shared_library":
-            cmd.append("-shared")
-            cmd.append("-fPIC")
-            output_file = output_dir / f"lib{base_name}.so"
-        elif build_type == "static_library":
-            # For static libraries, we'll use ar after compilation
-            output_file = output_dir / f"{base_name}.o"
+    def show_progress(self, source=None, label="Building"):
+        """Show the progress bar, determinate while source() returns a ProgressTracker"""
+        self.hide_progress()
+        self.progress_source = source
+        self.progress_label = label
+        self.progress.pack(side='right', fill='x', expand=True, padx=(10, 0))
+        if source is None:
+            self.progress.config(mode='indeterminate')
+            self.progress.start()
         else:
-            output_file = output_dir / f"{base_name}_{compiler}"
+            self.progress.config(mode='determinate', maximum=100, value=0)
+            self.update_progress()
+    
+    def update_progress(self):
+        """Move the determinate bar and show the ETA until hide_progress is called"""
+        tracker = self.progress_source()
+        # A finished tracker leaves the status to the build's own result message
+        if tracker is not None and not tracker.complete():
+            self.progress.config(value=100 * tracker.fraction())
+            self.status_var.set(f"{self.progress_label}... {tracker.status()}")
+        self.progress_job = self.root.after(PROGRESS_MS, self.update_progress)
+    
+    def hide_progress(self):
+        """Stop and hide the progress bar"""
+        if self.progress_job is not None:
+            self.root.after_cancel(self.progress_job)
+            self.progress_job = None
+        self.progress_source = None
+        self.progress.stop()
+        self.progress.pack_forget()
+    
+    def build_target(self, steps, output_file):
+        """Compile every object (in parallel when enabled), then link or archive once
+
+        With ninja_enabled the engine writes build.ninja and lets ninja run it.
+        """
+        jobs = self.config.config["build"]["parallel_jobs"] if self.parallel_build_var.get() else 1
+        # Compiler output reaches the queue as it arrives
+        result = self.engine.execute(steps, jobs, on_output=lambda stream, text: self.output_queue.put(text))
+        if result.error:
+            raise Exception(result.error)
+        
+        if result.up_to_date:
+            self.output_queue.put(f"{result.up_to_date_message(output_file)}\n")
+        elif result.cache["hits"] or result.cache["misses"]:
+            self.output_queue.put(f"{result.cache_summary()}\n")
+        return result
+    
+    def build_single(self, step, source_file):
+        """Build a single-source target, streaming compiler output; return a BuildResult"""
+        result = BuildResult()
+        start = time.perf_counter()
+        usage = {}
+        
+        def compile():
+            # Through the rusage helper so peak memory is the compiler's, not the GUI's
+            self.build_process = spawn_measured(
+                step.argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                cwd=str(Path(source_file).parent)
+            )
+            
+            # Read output with color coding
+            lines = []
+            for line in self.build_process.stdout:
+                self.output_queue.put(line)
+                lines.append(line)
+            
+            usage.update(wait_process(self.build_process) or {})
+            return self.build_process.returncode, "".join(lines), ""
         
-        cmd.extend(["-o", str(output_file)])
+        # Nothing to do when the output is newer than the source and its headers
+        up_to_date = False
+        if self.engine.deps is not None:
+            up_to_date, _ = self.engine.deps.check(step)
         
-        # Library directories
-        for lib_dir in lib_config["lib_dirs"]:
-            if os.path.exists(lib_dir):
-                cmd.append(f"-L{lib_dir}")
+        if up_to_date:
+            returncode, outcome = 0, "skip"
+            self.output_queue.put(f"✅ {output_path_of(step.argv)} is up to date - nothing to rebuild\n")
+        else:
+            # Reuse a cached result when source, flags and compiler are unchanged
+            returncode, stdout, _, outcome = self.engine.run_compile_step(step, compile)
+            if outcome == "hit" and stdout:
+                self.output_queue.put(stdout)
+            if returncode == 0 and self.engine.deps is not None:
+                self.engine.deps.record(step)
+        if outcome != "skip":
+            stats = self.engine.cache.stats()
+            self.output_queue.put(f"📦 Compile cache {outcome} "
+                                  f"(total: {stats.get('hits', 0)} hits, {stats.get('misses', 0)} misses)\n")
+            result.cache["hits" if outcome == "hit" else "misses"] += 1
+        
+        record = {
+            "kind": "compile",
+            "command": step.command_line(),
+            "returncode": returncode,
+            "duration": round(time.perf_counter() - start, 4),
+            "cache": outcome
+        }
+        if usage:
+            record["max_rss_kb"] = usage["max_rss_kb"]
+        result.steps.append(record)
+        result.returncode = returncode
+        result.success = returncode == 0
+        result.up_to_date = up_to_date
+        result.duration = time.perf_counter() - start
+        return result
+    
+    def record_history(self, result, steps, sources, output_file, compiler, options):
+        """Add a finished build to the build history (runs in the build thread)"""
+        if self.history is None:
+            return
+        try:
+            self.history.record(result, steps, sources, str(output_file), compiler,
+                                self.engine.compiler_version(steps[0].argv[0]), options, origin="simple-gui")
+        except Exception as e:
+            self.output_queue.put(f"⚠️ Build history not updated: {e}\n")
+    
+    def batch_build_async(self):
+        """Ask for a list or glob of sources and build them in parallel"""
+        if self.batch is not None:
+            messagebox.showwarning("Build in Progress", "A batch build is already running!")
+            return
         
-        # Libraries
-        for lib in lib_config["libs"]:
-            cmd.append(f"-l{lib}")
+        pattern = simpledialog.askstring(
+            "Batch Build",
+            "Source files or glob patterns (space separated), e.g. zLab*/**/*.cpp:",
+            initialvalue="**/*.cpp"
+        )
+        if not pattern:
+            return
         
-        # Additional compiler libraries
-        cmd.extend(compiler_config["libs"])
+        threading.Thread(target=self.batch_build, args=(pattern.split(),), daemon=True).start()
+    
+    def batch_build(self, patterns):
+        """Build every matching source concurrently, bounded by parallel_jobs"""
+        try:
+            self.root.after(0, lambda: self.batch_btn.config(state='disabled'))
+            self.root.after(0, lambda: self.status_var.set("Batch building..."))
+            self.root.after(0, self.clear_output)
+            
+            compiler = self.compiler_var.get()
+            library = self.library_var.get()
+            build_type = self.build_type_var.get()
+            build_mode = self.build_mode_var.get()
+            
+            source_dir = self.config.config["paths"]["source_dir"]
+            sources = expand_sources(patterns, source_dir)
+            if not sources:
+                raise Exception(f"No source files matched {' '.join(patterns)} in {source_dir}")
+            
+            jobs = self.config.config["build"]["parallel_jobs"] if self.parallel_build_var.get() else 1
+            self.batch = BatchBuilder(jobs)
+            self.output_queue.put(f"🔨 Batch building {len(sources)} file(s) with {compiler.upper()} "
+                                  f"+ {library.upper()} ({build_mode}), {self.batch.jobs} job(s)\n\n")
+            
+            options = {"library": library, "build_type": build_type, "build_mode": build_mode}
+            estimates = {}
+            for source in sources:
+                output_file = profile_output_file(self.config.config, compiler, source, build_type)
+                estimates[source] = self.estimates.predict([source], str(output_file), compiler, options)[0]
+            self.root.after(0, self.show_progress, lambda: self.batch.progress if self.batch else None,
+                            "Batch building")
+            
+            def build_one(source):
+                cmd = self.build_command(compiler, library, source, build_type, build_mode)
+                step = BuildStep(cmd, "compile", cwd=Path(source).parent)
+                result = self.engine.execute([step])
+                self.record_history(result, [step], [source], output_path_of(step.argv), compiler, options)
+                return result.to_dict()
+            
+            def on_result(job):
+                if job.get("skipped"):
+                    self.output_queue.put(f"⏹️ {job['source']}: skipped\n")
+                    return
+                mark = "✅" if job["success"] else "❌"
+                cached = " (cached)" if job.get("cache", {}).get("hits") else ""
+                self.output_queue.put(f"{mark} {job['source']} [{job['duration']:.2f}s]{cached}\n")
+                if not job["success"]:
+                    self.output_queue.put(job.get("stderr") or job.get("error") or "")
+            
+            # Longest predicted jobs start first for better packing
+            summary = self.batch.run(sources, build_one, on_result, estimates)
+            
+            self.output_queue.put(f"\n📊 {summary['succeeded']}/{summary['total']} succeeded, "
+                                  f"{summary['failed']} failed in {summary['wall_time']:.2f}s "
+                                  f"(job time {summary['job_time']:.2f}s, {summary['speedup']}x)\n")
+            status = "Batch build successful" if summary["failed"] == 0 else "Batch build failed"
+            self.root.after(0, lambda: self.status_var.set(status))
         
-        # Linux-specific optimizations
-        if compiler == "gcc":
-            cmd.extend(["-march=native", "-mtune=native"])
+        except Exception as e:
+            # e is unbound once the except block ends, so format it now
+            message = f"Error: {e}"
+            self.output_queue.put(f"\n💥 {message}\n")
+            self.root.after(0, lambda: self.status_var.set(message))
         
-        return cmd
+        finally:
+            self.batch = None
+            self.root.after(0, lambda: self.batch_btn.config(state='normal'))
+            self.root.after(0, self.hide_progress)
+            flush_trace()
+    
+    def build_command(self, compiler, library, source_file, build_type, build_mode):
+        """Generate Linux-optimized build command"""
+        return build_profile_command(self.config.config, compiler, library,
+                                     source_file, build_type, build_mode)
+    
+    def executable_path(self, compiler, source_file):
+        """Output directory and executable built from a source with a compiler"""
+        output_dir = Path(source_file).parent / self.config.config["build"]["output_dir"] / compiler
+        return output_dir, output_dir / f"{Path(source_file).stem}_{compiler}"
     
     def run_executable(self, compiler, source_file):
         """Run the built executable"""
-        base_name = Path(source_file).stem
-        output_dir = Path(source_file).parent / self.config.config["build"]["output_dir"] / compiler
-        exe_file = output_dir / f"{base_name}_{compiler}"
+        output_dir, exe_file = self.executable_path(compiler, source_file)
         
         if exe_file.exists():
             self.output_queue.put(f"\n🚀 Running {exe_file.name}...\n")
             self.output_queue.put("=" * 60 + "\n")
             
             try:
-                run_process = subprocess.Popen(
-                    [str(exe_file)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    cwd=str(output_dir),
-                    encoding='utf-8',
-                    errors='replace'
-                )
-                
-                for line in run_process.stdout:
-                    self.output_queue.put(line)
-                
-                run_process.wait()
+                with span(f"run {exe_file.name}", "run"):
+                    run_process = subprocess.Popen(
+                        [str(exe_file)],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        universal_newlines=True,
+                        cwd=str(output_dir),
+                        encoding='utf-8',
+                        errors='replace'
+                    )
+                    
+                    for line in run_process.stdout:
+                        self.output_queue.put(line)
+                    
+                    run_process.wait()
+                flush_trace()
                 self.output_queue.put("=" * 60 + "\n")
                 self.output_queue.put(f"Program finished with exit code {run_process.returncode}\n")
                 
@@ -898,8 +1117,152 @@ Made with ❤️ for Linux developers!
         else:
             self.output_queue.put(f"❌ Executable not found: {exe_file}\n")
     
+    def benchmark_async(self):
+        """Ask for a run count and benchmark the executable of the current source"""
+        if self.benchmark is not None:
+            if messagebox.askyesno("Benchmark", "A benchmark is running. Stop it after the current run?"):
+                self.benchmark.cancel()
+            return
+        
+        sources = split_sources(self.source_var.get())
+        if not sources:
+            messagebox.showerror("Benchmark", "No source file selected")
+            return
+        output_dir, exe_file = self.executable_path(self.compiler_var.get(), sources[0])
+        if not exe_file.exists():
+            messagebox.showerror("Benchmark", f"Executable not found: {exe_file}\nBuild it first.")
+            return
+        
+        runs = simpledialog.askinteger("Benchmark", "Measured runs:", parent=self.root,
+                                       initialvalue=self.config.config.get("benchmark_runs", 10),
+                                       minvalue=1, maxvalue=10000)
+        if runs is None:
+            return
+        
+        self.benchmark = Benchmark.from_config(self.config.config, [str(exe_file)], cwd=str(output_dir))
+        self.benchmark.runs = runs
+        threading.Thread(target=self.run_benchmark, args=(self.benchmark,), daemon=True).start()
+    
+    def run_benchmark(self, benchmark):
+        """Run a benchmark, streaming per-run times and then the summary"""
+        def on_run(index, sample):
+            label = f"run {index + 1}/{benchmark.runs}" if index >= 0 else "warmup"
+            status = "" if sample["returncode"] == 0 else f" (exit code {sample['returncode']})"
+            self.output_queue.put(f"   {label}: {format_seconds(sample['wall'])}{status}\n")
+            if index >= 0:
+                self.root.after(0, lambda: self.status_var.set(f"Benchmarking... {index + 1}/{benchmark.runs}"))
+        
+        exe_name = Path(benchmark.argv[0]).name
+        try:
+            self.root.after(0, lambda: self.status_var.set("Benchmarking..."))
+            self.output_queue.put(f"\n⏱️ Benchmarking {exe_name} "
+                                  f"({benchmark.warmup} warmup + {benchmark.runs} runs)\n")
+            self.output_queue.put("=" * 60 + "\n")
+            with span(f"benchmark {exe_name}", "run"):
+                report = benchmark.run(on_run)
+            if report["output"]:
+                self.output_queue.put(f"--- Output of the first run ---\n{report['output']}\n")
+            self.output_queue.put("\n".join(summary_lines(report)) + "\n")
+            if self.history is not None and report["runs"]:
+                self.history.record_benchmark(report, origin="simple-gui")
+            self.root.after(0, lambda: self.status_var.set("Benchmark finished"))
+        except Exception as e:
+            self.output_queue.put(f"❌ Benchmark error: {e}\n")
+            self.root.after(0, lambda: self.status_var.set("Benchmark failed"))
+        finally:
+            self.benchmark = None
+            flush_trace()
+    
+    def compare_async(self):
+        """Interleave runs of the gcc and clang executables of the current source"""
+        if self.benchmark is not None:
+            if messagebox.askyesno("Compare", "A benchmark is running. Stop it after the current run?"):
+                self.benchmark.cancel()
+            return
+        
+        sources = split_sources(self.source_var.get())
+        if not sources:
+            messagebox.showerror("Compare", "No source file selected")
+            return
+        variants = []
+        for compiler in ("gcc", "clang"):
+            _, exe_file = self.executable_path(compiler, sources[0])
+            if exe_file.exists():
+                variants.append((compiler, [str(exe_file)]))
+        if len(variants) < 2:
+            messagebox.showerror("Compare", "Build the source with both gcc and clang first.")
+            return
+        
+        runs = simpledialog.askinteger("Compare", "Measured runs per compiler:", parent=self.root,
+                                       initialvalue=self.config.config.get("benchmark_runs", 10),
+                                       minvalue=2, maxvalue=10000)
+        if runs is None:
+            return
+        
+        self.benchmark = Comparison.from_config(self.config.config, variants, cwd=str(Path(sources[0]).parent),
+                                                name=Path(sources[0]).name)
+        self.benchmark.runs = runs
+        threading.Thread(target=self.run_comparison, args=(self.benchmark,), daemon=True).start()
+    
+    def run_comparison(self, comparison):
+        """Run an A/B comparison and print each variant's speed and the verdict"""
+        def on_run(label, index, sample):
+            if index >= 0 and label == comparison.variants[0][0]:
+                self.root.after(0, lambda: self.status_var.set(f"Comparing... {index + 1}/{comparison.runs}"))
+        
+        try:
+            self.root.after(0, lambda: self.status_var.set("Comparing..."))
+            self.output_queue.put(f"\n⚖️ Comparing {' vs '.join(label for label, _ in comparison.variants)} "
+                                  f"on {comparison.name}\n")
+            self.output_queue.put("=" * 60 + "\n")
+            with span(f"compare {comparison.name}", "run"):
+                report = comparison.run(on_run)
+            self.output_queue.put("\n".join(comparison_lines(report)) + "\n")
+            self.root.after(0, lambda: self.status_var.set("Comparison finished"))
+        except Exception as e:
+            self.output_queue.put(f"❌ Comparison error: {e}\n")
+            self.root.after(0, lambda: self.status_var.set("Comparison failed"))
+        finally:
+            self.benchmark = None
+            flush_trace()
+    
+    def profile_async(self):
+        """Profile the executable of the current source in a separate thread"""
+        sources = split_sources(self.source_var.get())
+        if not sources:
+            messagebox.showerror("Profile", "No source file selected")
+            return
+        output_dir, exe_file = self.executable_path(self.compiler_var.get(), sources[0])
+        if not exe_file.exists():
+            messagebox.showerror("Profile", f"Executable not found: {exe_file}\nBuild it first.")
+            return
+        
+        profiler = Profiler.from_config(self.config.config, [str(exe_file)], cwd=str(output_dir))
+        threading.Thread(target=self.run_profile, args=(profiler,), daemon=True).start()
+    
+    def run_profile(self, profiler):
+        """Profile one run and print the hot functions and flamegraph path"""
+        try:
+            self.root.after(0, lambda: self.profile_btn.config(state='disabled'))
+            self.root.after(0, lambda: self.status_var.set("Profiling..."))
+            self.output_queue.put(f"\n🔥 Profiling {Path(profiler.argv[0]).name}\n")
+            self.output_queue.put("=" * 60 + "\n")
+            report = profiler.run()
+            self.output_queue.put("\n".join(profile_lines(report)) + "\n")
+            self.root.after(0, lambda: self.status_var.set(
+                "Profile written" if report["error"] is None else "Profiling failed"))
+        except Exception as e:
+            self.output_queue.put(f"❌ Profiling error: {e}\n")
+            self.root.after(0, lambda: self.status_var.set("Profiling failed"))
+        finally:
+            self.root.after(0, lambda: self.profile_btn.config(state='normal'))
+            flush_trace()
+    
     def stop_build(self):
         """Stop the current build process"""
+        if self.batch is not None:
+            self.batch.cancel()
+            self.output_queue.put("\n⏹️ Batch build stopping after running jobs\n")
         if self.build_process and self.build_process.poll() is None:
             self.build_process.terminate()
             self.output_queue.put("\n⏹️ Build stopped by user\n")
@@ -927,6 +1290,7 @@ Made with ❤️ for Linux developers!
     
     def clear_output(self):
         """Clear the output text area"""
+        self.renderer.clear()
         self.output.config(state='normal')
         self.output.delete('1.0', tk.END)
         self.output.config(state='disabled')
@@ -935,7 +1299,8 @@ Made with ❤️ for Linux developers!
         """Copy output to clipboard"""
         try:
             self.root.clipboard_clear()
-            self.root.clipboard_append(self.output.get('1.0', tk.END))
+            # Full log, including lines paged out of the widget
+            self.root.clipboard_append(self.renderer.text())
             self.status_var.set("Output copied to clipboard")
         except Exception as e:
             messagebox.showerror("Copy Error", f"Failed to copy output: {e}")
@@ -950,8 +1315,8 @@ Made with ❤️ for Linux developers!
         )
         if filename:
             try:
-                with open(filename, 'w') as f:
-                    f.write(self.output.get('1.0', tk.END))
+                # Full log, including lines paged out of the widget
+                self.renderer.save(filename)
                 messagebox.showinfo("Success", f"Log saved to {filename}")
                 self.status_var.set("Log saved successfully")
             except Exception as e:
@@ -973,6 +1338,7 @@ Made with ❤️ for Linux developers!
         """Reset settings to defaults"""
         if messagebox.askyesno("Confirm Reset", "Reset all settings to defaults?"):
             self.config.config = self.config.default_config.copy()
+            self.engine.config = self.config.config
             
             # Update UI
             for key, var in self.path_vars.items():
@@ -993,36 +1359,17 @@ Made with ❤️ for Linux developers!
                     f"Config file location:\n{self.config.config_file}\n\n"
                     f"Open with your preferred text editor.")
     
-    def process_queue(self):
-        """Process output queue and update UI with color coding"""
-        try:
-            while True:
-                line = self.output_queue.get_nowait()
-                self.output.config(state='normal')
-                
-                # Simple color coding for Linux terminal style
-                if "error:" in line.lower() or "❌" in line:
-                    self.output.tag_config("error", foreground="#ff4444")
-                    self.output.insert(tk.END, line, "error")
-                elif "warning:" in line.lower() or "⚠️" in line:
-                    self.output.tag_config("warning", foreground="#ffaa00")
-                    self.output.insert(tk.END, line, "warning")
-                elif "✅" in line or "successful" in line.lower():
-                    self.output.tag_config("success", foreground="#44ff44")
-                    self.output.insert(tk.END, line, "success")
-                elif line.startswith("🔨") or line.startswith("📁") or line.startswith("⚡"):
-                    self.output.tag_config("info", foreground="#44aaff")
-                    self.output.insert(tk.END, line, "info")
-                else:
-                    self.output.insert(tk.END, line)
-                
-                self.output.see(tk.END)
-                self.output.config(state='disabled')
-        except queue.Empty:
-            pass
-        
-        # Schedule next check
-        self.root.after(100, self.process_queue)
+    def output_tag(self, line):
+        """Color tag for one output line, Linux terminal style"""
+        if "error:" in line.lower() or "❌" in line:
+            return "error"
+        elif "warning:" in line.lower() or "⚠️" in line:
+            return "warning"
+        elif "✅" in line or "successful" in line.lower():
+            return "success"
+        elif line.startswith("🔨") or line.startswith("📁") or line.startswith("⚡"):
+            return "info"
+        return None
     
     def run(self):
         """Start the GUI application"""
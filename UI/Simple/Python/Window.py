@@ -14,6 +14,11 @@ import json
 from pathlib import Path
 import queue
 import time
+import sys
+
+# Shared modules live in UI/Core/Python
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Core" / "Python"))
+from ui_wakeup import Wakeup, NotifyingQueue
 
 class CompilerConfig:
     """Configuration manager for compiler paths and settings"""
@@ -88,7 +93,7 @@ class CompilerGUI:
         self.root = tk.Tk()
         self.config = CompilerConfig()
         self.build_process = None
-        self.output_queue = queue.Queue()
+        self.output_queue = NotifyingQueue()
         
         # Variables
         self.compiler_var = tk.StringVar(value="gcc")
@@ -100,8 +105,8 @@ class CompilerGUI:
         self.setup_ui()
         self.setup_styles()
         
-        # Start output queue processor
-        self.process_queue()
+        # Drain the output queue whenever a worker puts something in it
+        self.output_queue.wakeup = Wakeup(self.root, self.process_queue)
     
     def setup_ui(self):
         """Setup the main UI"""
@@ -551,9 +556,6 @@ class CompilerGUI:
                 self.output.config(state='disabled')
         except queue.Empty:
             pass
-        
-        # Schedule next check
-        self.root.after(100, self.process_queue)
     
     def run(self):
         """Start the GUI application"""